@@ -5,6 +5,7 @@
 // GNU General Public License as published by the Free Software Foundation; 
 // either version 2 of the License, or (at your option) any later version.  
 // elementpool.js for gethamquestions (2023-07-21)
+// 2026-10-19 - load sharded bundles (gethambrowserbundle.py), questions found by qid map
 //
 /** Class containing the Amateur Radio Element Question Pool
  * Generated from the question pooly by gethamquestions.py
@@ -23,11 +24,16 @@ class ElementPool {
 	 * @property {object} element - an element pool object, created by gethamquestions.py
 	 * @property {function} getFileSuccess - a function called by getElementByFileName on success
 	 * @property {function} getFileFail - a function called by GetElementByFileName on fail
+	 * @property {object} manifest - manifest of a sharded bundle, see getManifestByUrl
+	 * @property {Array} shards - the loaded subelement shards, by shard number
      */
 	constructor(element=null) {
 		this.element = element;
 		this.getFileSuccess =null;
 		this.getFileFail = null
+		this.manifest = null;
+		this.baseUrl = '';
+		this.shards = [];
 	}
 
 	EpSuccess(json) {
@@ -115,24 +121,7 @@ class ElementPool {
 					//debug('getQuestionsByIds()', 'Info', `        Question = "${q[qI].qid}", text ="${q[qI].text}"`);
 					let indx = qIds.indexOf(q[qI].qid);
 					if (indx != -1)	{
-						let question = {};
-						question.qid = q[qI].qid;
-						question.figure = q[qI].figure;
-						if (question.figure) {
-							//debug('getQuestionsByIds()', 'Info', `        Question = "${q[qI].qid}", figure ="${q[qI].figure}"`);	
-						}
-						let correct = ['A', 'B', 'C', 'D'].indexOf(q[qI].correct);
-						question.title = `Question #${q[qI].qid} ${q[qI].text}`;
-						let start = 0;
-						if (options.indexOf('strip-answer-prefix') != -1) {
-						   start = 3;	
-						}
-						question.answers = [];
-						for (let i=0; i<q[qI].answers.length; i++) {
-							question.answers[i] = q[qI].answers[i].substr(start);
-						}	
-						question.correct = correct;
-						result[indx] = question;
+						result[indx] = this.formatQuestion(q[qI], options);
 						resultMsgs[indx] = 'question found';
 					}
 				}
@@ -149,4 +138,109 @@ class ElementPool {
 		debug(`getQuestionsById()`, 'Exit', `${qIds}`);
 		return [result, resultMsgs];
 	}
+	/**
+	 * Format a question of the element pool for the getQuestionsBy methods
+	 * 
+	 * @param {object} q - a question of the element pool
+	 * @param {string} [options=''] options - 'strip-answer-prefix'
+	 * @return {object} question with .qid, .figure, .title, .answers, .correct
+	 */
+	formatQuestion(q, options='') {
+		let question = {};
+		question.qid = q.qid;
+		question.figure = q.figure;
+		let correct = ['A', 'B', 'C', 'D'].indexOf(q.correct);
+		question.title = `Question #${q.qid} ${q.text}`;
+		let start = 0;
+		if (options.indexOf('strip-answer-prefix') != -1) {
+		   start = 3;	
+		}
+		question.answers = [];
+		for (let i=0; i<q.answers.length; i++) {
+			question.answers[i] = q.answers[i].substr(start);
+		}	
+		question.correct = correct;
+		return question;
+	}
+	/**
+	 * Load the manifest of a sharded bundle written by gethambrowserbundle.py.
+	 * Subelement shards are then loaded on demand by getQuestionsByIdsFromShards.
+	 * 
+	 * @param {string} baseUrl - The url of the bundle directory, i.e. '/pools/element2/'
+	 * @param {function} [success] - function called with the manifest
+	 * @param {function} [fail] - function called if loading the manifest fails
+	 */
+	getManifestByUrl(baseUrl, success, fail) {
+		let self = this;
+		this.baseUrl = baseUrl.endsWith('/') ? baseUrl : baseUrl + '/';
+		this.manifest = null;
+		this.shards = [];
+		jQuery.getJSON(this.baseUrl + 'manifest.json', function(json) {
+			self.manifest = json;
+			if (typeof success == 'function') {
+				success(json);
+			}
+		})
+			.fail(function(evt) {
+				if (typeof fail == 'function') {
+					fail(evt);
+				}
+			})
+	}
+	/**
+	 * Get Questions by their ID from a sharded bundle, loading only the shards needed.
+	 * Each question is found with the manifest qid map, no search.
+	 * 
+	 * @param {Array} qIds - An array with the question ids
+	 * @param {string} [options=''] options - 'strip-answer-prefix'
+	 * @param {function} success - called with [[{questions}], [errorMessages]], as
+	 *                             returned by getQuestionsByIds
+	 * @param {function} [fail] - function called if loading a shard fails
+	 */
+	getQuestionsByIdsFromShards(qIds, options, success, fail) {
+		let self = this;
+		if (!this.manifest) {
+			success([[''], ['this.manifest is empty']]);
+			return;
+		}
+		if (!Array.isArray(qIds)) {
+			success([[''], ['input is not an array']]);
+			return;
+		}
+		let requests = [];
+		let loading = {};
+		for (let i=0; i<qIds.length; i++) {
+			let where = this.manifest.qids[qIds[i]];
+			if (where && !this.shards[where[0]] && !loading[where[0]]) {
+				let shardNum = where[0];
+				loading[shardNum] = true;
+				requests.push(jQuery.getJSON(this.baseUrl + this.manifest.shards[shardNum].file,
+					function(json) {
+						self.shards[shardNum] = json;
+					}));
+			}
+		}
+		jQuery.when.apply(jQuery, requests)
+			.done(function() {
+				let result = [];
+				let resultMsgs = [];
+				for (let i=0; i<qIds.length; i++) {
+					let where = self.manifest.qids[qIds[i]];
+					if (where) {
+						let q = self.shards[where[0]].groups[where[1]].questions[where[2]];
+						result[i] = self.formatQuestion(q, options);
+						resultMsgs[i] = 'question found';
+					} else {
+						result[i] = {};
+						resultMsgs[i] = `result is empty at index ${i}`;
+					}
+				}
+				success([result, resultMsgs]);
+			})
+			.fail(function(evt) {
+				if (typeof fail == 'function') {
+					fail(evt);
+				}
+			})
+	}
 }
@@ -0,0 +1,301 @@
+#-*- coding: utf-8 -*-
+"""
+Content addressed archive of all pool years with deduplicated storage
+
+Every string of a pool (question text, answers, descriptions, topics, fcc) is
+stored once in a shared object pack under the hash of its content; a pool year
+is a manifest of references.  Questions carried over verbatim between years
+add nothing to the pack but their references.
+
+    archive/
+        archive.json          catalog: pool key -> manifest, years, counts
+        objects.pack          one JSON line per object: ["<hash>", "<string>"]
+        objects.idx           hash -> [offset, length] in objects.pack
+        manifests/E3-2023.json.gz
+
+A manifest is the schema 2 element object (see gethamschema.py) with the
+strings table replaced by the hashes of its strings ("refs"), so loading a year
+reads its manifest, looks up its objects by offset and inflates.  Decoded
+strings are kept per archive and shared between the years loaded, so memory
+grows with the unique content touched, not the number of years.  The pack is
+append only; a stale or missing objects.idx is rebuilt by scanning the pack.
+
+Classes:
+
+    PoolArchive
+
+Functions:
+    content_hash
+    pool_key
+    main
+
+Usage
+    python gethamarchive.py archive --add output/element3.json output/element4.json
+    python gethamarchive.py archive --lookup G1A01 --year 2025
+    python gethamarchive.py archive --export E3-2023 element3-2023.json
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import mmap
+import os
+from gethamquestionclasses import msg
+from gethamcompress import open_text
+from gethamschema import element_dict, inflate_element, normalize_element, read_element
+
+ARCHIVE_VERSION = 1
+CATALOG_FN = 'archive.json'
+PACK_FN = 'objects.pack'
+INDEX_FN = 'objects.idx'
+MANIFEST_DIR = 'manifests'
+HASH_CHARS = 20                   # 80 bits of sha256, collisions are checked on add
+ELEMENT_BY_PREFIX = {'T': '2', 'G': '3', 'E': '4'}
+_SEPARATORS = (',', ':')
+
+def content_hash(string):
+    """
+    Returns the object key of a string
+
+    """
+    return hashlib.sha256(string.encode('utf-8')).hexdigest()[:HASH_CHARS]
+
+def pool_key(element):
+    """
+    Returns the archive key of an element JSON object, i.e. 'E3-2023'
+
+    """
+    return f'E{element["elem"]}-{(element.get("yrvalid") or {}).get("begin", "")}'
+
+def _write_json(path, obj):
+    """
+    Writes obj as compact JSON (gzip for .gz), replacing path atomically
+    """
+    # the extension is kept, open_text compresses by it
+    tmp = os.path.join(os.path.dirname(path), '.tmp.' + os.path.basename(path))
+    with open_text(tmp, 'w') as file:
+        json.dump(obj, file, separators=_SEPARATORS, ensure_ascii=False)
+    os.replace(tmp, path)
+
+class PoolArchive:
+    """
+    A class to store pool years in a deduplicated object pack
+
+    ...
+
+    Attributes
+    ----------
+    archive_dir : str
+        The archive directory
+    catalog : dict
+        pool key -> {'elem', 'yrvalid', 'manifest', 'questions', 'strings'}
+    index : dict
+        object hash -> [offset, length] in the pack
+    strings : dict
+        object hash -> string, the objects decoded so far
+
+    """
+    def __init__(self, archive_dir, load_cache_size=4):
+        self.archive_dir = archive_dir
+        os.makedirs(os.path.join(archive_dir, MANIFEST_DIR), exist_ok=True)
+        self.catalog = {}
+        catalog_FN = self._path(CATALOG_FN)
+        if os.path.isfile(catalog_FN):
+            with open(catalog_FN, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') != ARCHIVE_VERSION:
+                raise ValueError(f'{catalog_FN}: archive version {data.get("version")} '
+                                 f'is not {ARCHIVE_VERSION}')
+            self.catalog = data['pools']
+        self.strings = {}
+        self.index = self._load_index()
+        self._pack = None
+        self.load = functools.lru_cache(maxsize=load_cache_size)(self._load)
+
+    def _path(self, name):
+        return os.path.join(self.archive_dir, name)
+
+    def _load_index(self):
+        """
+        Returns the object index, rebuilt from the pack if it is missing or stale
+        """
+        pack_FN = self._path(PACK_FN)
+        pack_size = os.path.getsize(pack_FN) if os.path.isfile(pack_FN) else 0
+        index_FN = self._path(INDEX_FN)
+        if os.path.isfile(index_FN):
+            with open(index_FN, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('pack_size') == pack_size:
+                return data['objects']
+        index = {}
+        if pack_size:
+            msg('Info', 'I771', f'rebuilding {index_FN}')
+            offset = 0
+            with open(pack_FN, 'rb') as file:
+                for line in file:
+                    key, _ = json.loads(line)
+                    index[key] = [offset, len(line)]
+                    offset += len(line)
+        return index
+
+    def _save_index(self):
+        _write_json(self._path(INDEX_FN), {'pack_size': self._pack_size(),
+                                           'objects': self.index})
+
+    def _pack_size(self):
+        pack_FN = self._path(PACK_FN)
+        return os.path.getsize(pack_FN) if os.path.isfile(pack_FN) else 0
+
+    def _close_pack(self):
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
+
+    def get_string(self, key):
+        """
+        Returns the string stored under a hash
+        """
+        string = self.strings.get(key)
+        if string is None:
+            if self._pack is None:
+                with open(self._path(PACK_FN), 'rb') as file:
+                    self._pack = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            offset, length = self.index[key]
+            _, string = json.loads(self._pack[offset:offset + length])
+            self.strings[key] = string
+        return string
+
+    def add(self, element):
+        """
+        Stores a pool year (Element, element JSON object of either schema),
+        replacing an earlier one with the same key.  Returns (key, new objects,
+        new bytes)
+
+        """
+        element = normalize_element(inflate_element(element_dict(element)))
+        refs = []
+        lines = []
+        for string in element.pop('strings'):
+            key = content_hash(string)
+            if key in self.index:
+                if self.get_string(key) != string:
+                    raise ValueError(f'hash collision on {key}')
+            else:
+                lines.append(json.dumps([key, string], ensure_ascii=False).encode('utf-8')
+                             + b'\n')
+            self.strings[key] = string
+            refs.append(key)
+        new_bytes = sum(len(line) for line in lines)
+        if lines:
+            self._close_pack()
+            offset = self._pack_size()
+            with open(self._path(PACK_FN), 'ab') as file:
+                for line in lines:
+                    file.write(line)
+                    self.index[json.loads(line)[0]] = [offset, len(line)]
+                    offset += len(line)
+            self._save_index()
+        key = pool_key(element)
+        element['refs'] = refs
+        manifest_FN = os.path.join(MANIFEST_DIR, f'{key}.json.gz')
+        _write_json(self._path(manifest_FN), element)
+        self.catalog[key] = {'elem': element['elem'], 'yrvalid': element.get('yrvalid'),
+                             'manifest': manifest_FN,
+                             'questions': sum(len(g['questions'])
+                                              for se in element['subelements']
+                                              for g in se['groups']),
+                             'strings': len(refs)}
+        _write_json(self._path(CATALOG_FN), {'version': ARCHIVE_VERSION,
+                                             'pools': dict(sorted(self.catalog.items()))})
+        self.load.cache_clear()
+        return key, len(lines), new_bytes
+
+    def _load(self, key):
+        """
+        Returns the schema 1 element JSON object of a pool key, i.e. 'E3-2023'.
+        load() keeps the last few and returns the same objects, do not change them
+        """
+        entry = self.catalog.get(key)
+        if entry is None:
+            raise KeyError(f'no pool {key} in {self.archive_dir}')
+        with open_text(self._path(entry['manifest'])) as file:
+            element = json.load(file)
+        element['strings'] = [self.get_string(ref) for ref in element.pop('refs')]
+        return inflate_element(element)
+
+    def pool_for(self, elem, year):
+        """
+        Returns the key of the element pool valid in year, or None
+        """
+        year = int(year)
+        for key, entry in sorted(self.catalog.items(), reverse=True):
+            yrvalid = entry.get('yrvalid') or {}
+            begin, end = str(yrvalid.get('begin', '')), str(yrvalid.get('end', ''))
+            if not (begin.isdigit() and end.isdigit()):
+                # a pool with no valid years is not matched by year
+                continue
+            if entry['elem'] == str(elem) and int(begin) <= year <= int(end):
+                return key
+        return None
+
+    def lookup(self, qid, year):
+        """
+        Returns the question dict of qid in the pool valid in year, or None
+        """
+        key = self.pool_for(ELEMENT_BY_PREFIX.get(qid[:1].upper(), ''), year)
+        if key is None:
+            return None
+        for subelement in self.load(key)['subelements']:
+            for group in subelement['groups']:
+                for question in group['questions']:
+                    if question['qid'] == qid:
+                        return question
+        return None
+
+    def stats(self):
+        """
+        Returns a dict of the archive sizes
+        """
+        manifests = sum(os.path.getsize(self._path(entry['manifest']))
+                        for entry in self.catalog.values())
+        return {'pools': len(self.catalog), 'objects': len(self.index),
+                'references': sum(entry['strings'] for entry in self.catalog.values()),
+                'pack_bytes': self._pack_size(), 'manifest_bytes': manifests}
+
+def main():
+    """
+    Add pools to an archive, look up questions or export a year if called from
+    commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Deduplicated archive of pool years')
+    parser.add_argument('archive_dir', help='archive directory')
+    parser.add_argument('--add', nargs='+', default=[], help='element JSON files to store')
+    parser.add_argument('--lookup', nargs='+', default=[], help='qids to look up')
+    parser.add_argument('--year', type=int, default=0, help='pool year of --lookup')
+    parser.add_argument('--export', nargs=2, metavar=('KEY', 'OUT_FN'),
+                        help='write a pool year as element JSON, i.e. E3-2023 out.json')
+    args = parser.parse_args()
+    archive = PoolArchive(args.archive_dir)
+    for element_FN in args.add:
+        key, objects, size = archive.add(read_element(element_FN))
+        msg('Info', 'I772', f'{element_FN}: {key} stored, {objects} new objects ({size:,} bytes)')
+    for qid in args.lookup:
+        question = archive.lookup(qid, args.year)
+        msg('Info', 'I773', f'{qid} {args.year}: ' +
+            (json.dumps(question, ensure_ascii=False) if question else 'not in the archive'))
+    if args.export:
+        with open(args.export[1], 'w', encoding='utf-8') as file:
+            file.write(json.dumps(archive.load(args.export[0]), indent=2))
+        msg('Info', 'I774', f'{args.export[0]} written to {args.export[1]}')
+    stats = archive.stats()
+    msg('Info', 'I775', f'{args.archive_dir}: {stats["pools"]} pools, {stats["objects"]} objects '
+        f'({stats["pack_bytes"]:,} bytes) for {stats["references"]} references, '
+        f'manifests {stats["manifest_bytes"]:,} bytes')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,286 @@
+#-*- coding: utf-8 -*-
+"""
+Autocomplete of qids, group ids and group topics with typo tolerance
+
+Two sorted key arrays are built from an element pool:
+
+    ids    - qids and group ids (t1a01, t1a), ranked first
+    topics - every group topic, keyed also from each word on, so "interf"
+             and "use of" both reach "Purpose and permissible use of ..."
+
+Keys are lower case with single spaces.  A prefix is a contiguous slice of a
+sorted array, found with bisect: O(log n + k) for the top k.  When fewer than k
+keys start with the query, keys within a bounded edit distance of it are
+added, best first.  The edit distance search walks the sorted array like a
+trie: Levenshtein rows are kept per depth and reused for the prefix a key
+shares with the previous key, and a prefix that is already too far from the
+query is skipped with one bisect.  The arrays are the whole structure, so they
+save to and load from JSON without a rebuild.
+
+Classes:
+
+    Autocomplete
+
+Functions:
+    normalize_key
+    main
+
+Usage
+    python gethamautocomplete.py output/element2.json t1a interfrence --save element2.ac.json
+    python gethamautocomplete.py element2.ac.json "e7c0" --load
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import bisect
+import json
+import re
+import time
+from gethamquestionclasses import msg
+from gethamcompress import open_text
+
+AUTOCOMPLETE_VERSION = 1
+_END = '\uffff'
+_SPACES = re.compile(r'\s+')
+
+def normalize_key(text):
+    """
+    Returns the lookup key of a text: lower case, single spaces, no leading dash
+
+    """
+    return _SPACES.sub(' ', text.lower()).strip().lstrip('–-').strip()
+
+def _max_distance(query):
+    return 0 if len(query) < 3 else 1 if len(query) < 6 else 2
+
+class _SortedKeys:
+    """
+    Sorted keys with the entry each key points to
+
+    """
+    def __init__(self, pairs):
+        pairs = sorted(set(pairs))
+        self.keys = [key for key, _ in pairs]
+        self.entries = [entry for _, entry in pairs]
+
+    def prefix(self, prefix):
+        """
+        Returns the (low, high) slice of the keys starting with prefix
+
+        """
+        return (bisect.bisect_left(self.keys, prefix),
+                bisect.bisect_left(self.keys, prefix + _END))
+
+    def fuzzy(self, query, max_distance):
+        """
+        Returns [(distance, low, high)]: slices of keys with a prefix within
+        max_distance edits of query, distance being the best over the prefixes
+
+        """
+        keys = self.keys
+        width = len(query) + 1
+        rows = [list(range(width))]      # rows[d]: query prefixes vs key[:d]
+        found = []
+        previous = ''
+        pos = 0
+        while pos < len(keys):
+            key = keys[pos]
+            common = 0
+            limit = min(len(previous), len(key), len(rows) - 1)
+            while common < limit and previous[common] == key[common]:
+                common += 1
+            del rows[common + 1:]
+            previous = key
+            best = min(row[-1] for row in rows)
+            depth = common
+            skip_to = None
+            while depth < len(key) and min(rows[depth]) < best:
+                above = rows[depth]
+                char = key[depth]
+                row = [above[0] + 1]
+                for i in range(1, width):
+                    row.append(min(above[i] + 1, row[i - 1] + 1,
+                                   above[i - 1] + (query[i - 1] != char)))
+                rows.append(row)
+                depth += 1
+                best = min(best, row[-1])
+                if min(row) > max_distance:
+                    # no key sharing key[:depth] can come within max_distance
+                    skip_to = self.prefix(key[:depth])[1]
+                    break
+            if best <= max_distance:
+                found.append((best, pos, pos + 1))
+            pos = skip_to if skip_to is not None else pos + 1
+        return found
+
+    def to_list(self):
+        return [self.keys, self.entries]
+
+    @classmethod
+    def from_list(cls, data):
+        obj = cls([])
+        obj.keys, obj.entries = data
+        return obj
+
+class Autocomplete:
+    """
+    A class to complete qids, group ids and topics
+
+    ...
+
+    Attributes
+    ----------
+    entries : list
+        [kind, text, value] per completion: ['qid', 'T1A01', 'T1A01'],
+        ['group', 'T1A Purpose and ...', 'T1A'], ['topic', 'Interference', 'T1A']
+    ids : _SortedKeys
+        qid and group id keys
+    topics : _SortedKeys
+        topic keys, from every word on
+
+    """
+    def __init__(self, element_pool=None, data=None):
+        """
+        Builds from an ElementPool (or element JSON object), or restores the
+        data of to_dict()
+
+        """
+        if data is not None:
+            self.entries = data['entries']
+            self.ids = _SortedKeys.from_list(data['ids'])
+            self.topics = _SortedKeys.from_list(data['topics'])
+            return
+        if isinstance(element_pool, dict):
+            subelements = element_pool['subelements']
+        else:
+            subelements = element_pool.element_pool['subelements']
+        self.entries = []
+        id_pairs = []
+        topic_pairs = []
+        for subelement in subelements:
+            for group in subelement['groups']:
+                code = group['subelement'] + group['group_id']
+                id_pairs.append((code.lower(), len(self.entries)))
+                self.entries.append(['group', f'{code} {group.get("description", "")}'.strip(),
+                                     code])
+                for question in group['questions']:
+                    id_pairs.append((question['qid'].lower(), len(self.entries)))
+                    self.entries.append(['qid', question['qid'], question['qid']])
+                for topic in group.get('topics', []):
+                    key = normalize_key(topic)
+                    if not key:
+                        continue
+                    entry = len(self.entries)
+                    self.entries.append(['topic', topic.lstrip('–- ').strip(), code])
+                    words = key.split(' ')
+                    for start in range(len(words)):
+                        topic_pairs.append((' '.join(words[start:]), entry))
+        self.ids = _SortedKeys(id_pairs)
+        self.topics = _SortedKeys(topic_pairs)
+
+    def _collect(self, index, low, high, seen, results, count, distance):
+        for pos in range(low, high):
+            entry = index.entries[pos]
+            if entry not in seen:
+                seen.add(entry)
+                kind, text, value = self.entries[entry]
+                results.append({'kind': kind, 'text': text, 'value': value,
+                                'distance': distance})
+                if len(results) >= count:
+                    return True
+        return False
+
+    def complete(self, query, count=10, max_distance=None):
+        """
+        Returns up to count completions [{'kind', 'text', 'value', 'distance'}]:
+        id prefixes, topic prefixes, then keys within max_distance edits
+        (default by query length: 0 below 3 characters, 1 below 6, else 2)
+
+        """
+        key = normalize_key(query)
+        if not key:
+            return []
+        results = []
+        seen = set()
+        for index in (self.ids, self.topics):
+            if self._collect(index, *index.prefix(key), seen, results, count, 0):
+                return results
+        if max_distance is None:
+            max_distance = _max_distance(key)
+        if max_distance:
+            matches = [(distance, order, index, low, high)
+                       for order, index in enumerate((self.ids, self.topics))
+                       for distance, low, high in index.fuzzy(key, max_distance)]
+            matches.sort(key=lambda match: match[:2])
+            for distance, _, index, low, high in matches:
+                if self._collect(index, low, high, seen, results, count, distance):
+                    break
+        return results
+
+    def to_dict(self):
+        """
+        Returns a JSON serializable dict, Autocomplete(data=...) restores it
+
+        """
+        return {'version': AUTOCOMPLETE_VERSION, 'entries': self.entries,
+                'ids': self.ids.to_list(), 'topics': self.topics.to_list()}
+
+    def save(self, out_FN):
+        """
+        Writes the structure as JSON (.gz/.xz compressed by extension)
+
+        """
+        with open_text(out_FN, 'w') as file:
+            json.dump(self.to_dict(), file, separators=(',', ':'), ensure_ascii=False)
+
+    @classmethod
+    def load(cls, in_FN):
+        """
+        Reads a structure written by save
+
+        """
+        with open_text(in_FN) as file:
+            data = json.load(file)
+        if data.get('version') != AUTOCOMPLETE_VERSION:
+            raise ValueError(f'{in_FN}: autocomplete version {data.get("version")} '
+                             f'is not {AUTOCOMPLETE_VERSION}')
+        return cls(data=data)
+
+def main():
+    """
+    Build, save or load an autocomplete structure and complete queries if
+    called from commandline
+
+    """
+    # imported here: a loaded structure needs no element pool
+    from gethamelementclasses import ElementPool
+    parser = argparse.ArgumentParser(description='Autocomplete qids and topics')
+    parser.add_argument('in_FN', help='element JSON file, or a saved structure with --load')
+    parser.add_argument('queries', nargs='*', help='queries to complete')
+    parser.add_argument('--load', action='store_true', help='in_FN is a saved structure')
+    parser.add_argument('--save', default='', help='write the structure to this file')
+    parser.add_argument('--count', type=int, default=5, help='completions per query')
+    args = parser.parse_intermixed_args()
+    start = time.perf_counter()
+    if args.load:
+        autocomplete = Autocomplete.load(args.in_FN)
+    else:
+        autocomplete = ElementPool(element_FN=args.in_FN).get_autocomplete()
+    msg('Info', 'I751', f'{"loaded" if args.load else "built"} in '
+        f'{(time.perf_counter() - start) * 1000:.1f}ms: {len(autocomplete.ids.keys)} id keys, '
+        f'{len(autocomplete.topics.keys)} topic keys')
+    if args.save:
+        autocomplete.save(args.save)
+        msg('Info', 'I752', f'written to {args.save}')
+    for query in args.queries:
+        start = time.perf_counter()
+        results = autocomplete.complete(query, args.count)
+        elapsed = (time.perf_counter() - start) * 1e6
+        msg('Info', 'I753', f'{query!r} ({elapsed:.0f}us): ' + '; '.join(
+            f'{r["value"]} {r["text"][:40]}' + (f' ~{r["distance"]}' if r['distance'] else '')
+            for r in results))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#-*- coding: utf-8 -*-
+"""
+Write a sharded browser bundle of an element pool for elementpool.js
+
+Instead of the whole element JSON the browser loads a small manifest, then only
+the subelement shards holding the questions it needs.  The manifest carries a
+prebuilt qid map, qid -> [shard, group index, question index], so a question is
+found without searching.  Every file is also written precompressed:
+
+    .gz - gzip, serve with "Content-Encoding: gzip"
+    .xz - lzma, the smallest artifact for storage (brotli is not in the
+          standard library, browsers do not decode xz; decompress at the CDN)
+
+Functions:
+    write_browser_bundle
+    main
+
+Usage
+    python gethambrowserbundle.py element2.json ./web/element2
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import lzma
+import os
+from gethamquestionclasses import msg
+from gethamschema import read_element
+
+BUNDLE_VERSION = 1
+_SEPARATORS = (',', ':')
+
+def _write_artifacts(path, data):
+    """
+    Writes data and its .gz/.xz versions, returns a dict of the sizes and hash
+
+    """
+    with open(path, 'wb') as file:
+        file.write(data)
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as file:
+        file.write(gz_data)
+    xz_data = lzma.compress(data, preset=9 | lzma.PRESET_EXTREME)
+    with open(path + '.xz', 'wb') as file:
+        file.write(xz_data)
+    return {'bytes': len(data), 'gz': len(gz_data), 'xz': len(xz_data),
+            'sha256': hashlib.sha256(data).hexdigest()}
+
+def write_browser_bundle(element, out_dir):
+    """
+    Writes manifest.json and one shard per subelement into out_dir
+
+    Parameters
+    ----------
+    element : dict
+        An element JSON object (see gethamquestions.py)
+    out_dir : str
+        The directory to write, created if needed
+
+    Returns
+    -------
+    dict, the manifest
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    shards = []
+    qids = {}
+    for shard_num, subelement in enumerate(element['subelements']):
+        shard_FN = f'{subelement["sub_el"]}.json'
+        for group_num, group in enumerate(subelement['groups']):
+            for question_num, question in enumerate(group['questions']):
+                qids[question['qid']] = [shard_num, group_num, question_num]
+        data = json.dumps(subelement, separators=_SEPARATORS).encode('utf-8')
+        info = _write_artifacts(os.path.join(out_dir, shard_FN), data)
+        shards.append(dict({'sub_el': subelement['sub_el'],
+                            'description': subelement['description'],
+                            'file': shard_FN}, **info))
+    manifest = {
+        'version': BUNDLE_VERSION,
+        'elem': element['elem'],
+        'elname': element['elname'],
+        'yrvalid': element['yrvalid'],
+        'effective': element['effective'],
+        'timestamp': element.get('timestamp', ''),
+        'shards': shards,
+        'qids': qids,
+    }
+    data = json.dumps(manifest, separators=_SEPARATORS).encode('utf-8')
+    info = _write_artifacts(os.path.join(out_dir, 'manifest.json'), data)
+    msg('Info', 'I671', f'browser bundle written to {out_dir}: manifest {info["bytes"]:,} '
+        f'bytes ({info["gz"]:,} gz), {len(shards)} shards of '
+        f'{sum(s["bytes"] for s in shards):,} bytes '
+        f'({sum(s["gz"] for s in shards):,} gz, {sum(s["xz"] for s in shards):,} xz)')
+    return manifest
+
+def main():
+    """
+    Write a browser bundle if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Write a sharded browser bundle')
+    parser.add_argument('element_FN', help='element JSON file, i.e. element2.json')
+    parser.add_argument('out_dir', help='output directory')
+    args = parser.parse_args()
+    write_browser_bundle(read_element(args.element_FN), args.out_dir)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#-*- coding: utf-8 -*-
+"""
+Build an enriched, query ready bundle of an element pool and its help
+
+The element JSON (from gethamquestions.py) and the help history file (see
+ElementHelp) are joined by qid once, at build time.  The bundle holds one flat
+record per question with its group topics, topics, explanation and memory aid,
+so serving a question is a single dict lookup.  The same pass produces the help
+coverage report (what ElementHelp.print_summary reported, plus questions with
+no help at all and help for qids not in the pool).
+
+Classes:
+
+    ElementBundle
+
+Functions:
+    build_bundle
+    print_coverage
+    main
+
+Usage
+    python gethambundle.py element2.json aianswers.history.json element2.bundle.json
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import datetime
+import json
+import os
+from gethamquestionclasses import msg
+from gethamhelpcache import HELP_FIELDS
+from gethamhelploader import iter_help_history, runtime_help
+from gethamschema import read_element
+
+BUNDLE_VERSION = 1
+
+def build_bundle(element_FN, help_FN, out_FN=''):
+    """
+    Join an element JSON file and a help history file into a bundle
+
+    Parameters
+    ----------
+    element_FN : str
+        Element JSON file (either schema), i.e. element2.json
+    help_FN : str
+        Help history file, i.e. aianswers.history.json, or '' for no help
+    out_FN : str
+        The bundle file to write, or '' to only return the bundle
+
+    Returns
+    -------
+    dict with the element attributes, 'questions' {qid: record} and 'coverage'
+    """
+    help_index = {}
+    if help_FN:
+        help_index = {qid: runtime_help(cur) for qid, cur in iter_help_history(help_FN)}
+    element = read_element(element_FN)
+
+    coverage = {'questions': 0, 'helps': 0}
+    for field in HELP_FIELDS:
+        coverage[f'{field}_valid'] = 0
+        coverage[f'{field}_edited'] = 0
+    missing = {'help': [], 'topics': [], 'explanation': [], 'memory_aid': []}
+    questions = {}
+    for subelement in element['subelements']:
+        for group in subelement['groups']:
+            for q in group['questions']:
+                coverage['questions'] += 1
+                record = {key: value for key, value in q.items() if key != 'topics'}
+                record['elem'] = element['elem']
+                record['group_topics'] = group['topics']
+                helps = help_index.pop(q['qid'], None)
+                if helps is None:
+                    missing['help'].append(q['qid'])
+                else:
+                    coverage['helps'] += 1
+                for field in HELP_FIELDS:
+                    record[field] = helps[field] if helps else ''
+                    if helps and helps[f'{field}_valid']:
+                        coverage[f'{field}_valid'] += 1
+                    else:
+                        missing[field].append(q['qid'])
+                    if helps and helps[f'{field}_edited']:
+                        coverage[f'{field}_edited'] += 1
+                questions[q['qid']] = record
+    coverage['missing'] = missing
+    coverage['orphans'] = sorted(help_index)
+
+    bundle = {
+        'version': BUNDLE_VERSION,
+        'timestamp': str(datetime.datetime.now()),
+        'element_file': element_FN,
+        'help_file': help_FN,
+        'elem': element['elem'],
+        'elname': element['elname'],
+        'yrvalid': element['yrvalid'],
+        'effective': element['effective'],
+        'coverage': coverage,
+        'questions': questions,
+    }
+    if out_FN:
+        os.makedirs(os.path.dirname(out_FN) or '.', exist_ok=True)
+        with open(out_FN, 'w', encoding='utf-8') as file:
+            json.dump(bundle, file, indent=1)
+        msg('Info', 'I641', f'bundle written to {out_FN}, questions={len(questions)}')
+    return bundle
+
+def print_coverage(coverage):
+    """
+    Prints the help coverage report of a bundle
+
+    """
+    print(f'questions:           {coverage["questions"]}')
+    print(f'helps:               {coverage["helps"]}')
+    print(f'topics valid:        {coverage["topics_valid"]}')
+    print(f'topics edited:       {coverage["topics_edited"]}')
+    print(f'explanations valid:  {coverage["explanation_valid"]}')
+    print(f'explanations edited: {coverage["explanation_edited"]}')
+    print(f'memory aids valid:   {coverage["memory_aid_valid"]}')
+    print(f'memory aids edited:  {coverage["memory_aid_edited"]}')
+    headings = (('help', 'questions with no help:'),
+                ('explanation', 'questions with no explanation:'),
+                ('memory_aid', 'questions with no memory aids:'))
+    for key, heading in headings:
+        if coverage['missing'][key]:
+            print(heading)
+            for qid in coverage['missing'][key]:
+                print(f'    {qid}')
+    if coverage['orphans']:
+        print('help for questions not in the pool:')
+        for qid in coverage['orphans']:
+            print(f'    {qid}')
+
+class ElementBundle:
+    """
+    A class to serve questions and help from a bundle built by build_bundle
+
+    ...
+
+    Attributes
+    ----------
+    bundle : dict
+        The bundle object
+    questions : dict
+        qid -> question record with group_topics, topics, explanation, memory_aid
+
+    """
+    def __init__(self, bundle_FN='', bundle_obj=None):
+        if bundle_FN:
+            with open(bundle_FN, 'r', encoding='utf-8') as file:
+                bundle_obj = json.load(file)
+        self.bundle = bundle_obj or {'questions': {}}
+        self.questions = self.bundle['questions']
+
+    def get(self, qid):
+        """
+        Returns the record of one question, or None
+
+        """
+        return self.questions.get(qid)
+
+    def get_questions_by_ids(self, qids):
+        """
+        Returns the records for a list (or blank separated string) of qids,
+        in the order requested, skipping unknown qids
+
+        """
+        if isinstance(qids, str):
+            qids = qids.split()
+        return [self.questions[qid] for qid in qids if qid in self.questions]
+
+def main():
+    """
+    Build a bundle and print its coverage report if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Join element JSON and help into a bundle')
+    parser.add_argument('element_FN', help='element JSON file, i.e. element2.json')
+    parser.add_argument('help_FN', help='help history file, i.e. aianswers.history.json')
+    parser.add_argument('out_FN', help='bundle file, i.e. element2.bundle.json')
+    args = parser.parse_args()
+    bundle = build_bundle(args.element_FN, args.help_FN, args.out_FN)
+    print_coverage(bundle['coverage'])
+
+if __name__ == '__main__':
+    main()
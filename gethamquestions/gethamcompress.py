@@ -0,0 +1,168 @@
+#-*- coding: utf-8 -*-
+"""
+Transparent gzip/lzma compressed files for element JSON, text exports and help
+
+Readers sniff the magic bytes, not the file name, so element{N}.json,
+element{N}.json.gz and element{N}.json.xz (or a renamed copy) all load the same
+way.  Writers pick the compression from the extension:
+
+    .gz - gzip, level 1-9 (default 9), cheap to decode, CDN "Content-Encoding"
+    .xz - lzma, preset 0-9 (default 6), smallest, slower to write
+
+Functions:
+    sniff_compression
+    open_text
+    read_bytes
+    compressed_name
+    benchmark
+    main
+
+Usage
+    python gethamcompress.py output/element3.json --benchmark
+    python gethamcompress.py output/element3.json output/element3.json.gz --level 6
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import gzip
+import json
+import lzma
+import os
+import time
+from gethamquestionclasses import msg
+
+MAGIC = {b'\x1f\x8b': 'gz', b'\xfd7zXZ\x00': 'xz'}
+EXTENSIONS = ('gz', 'xz')
+DEFAULT_LEVEL = {'gz': 9, 'xz': 6}
+
+def sniff_compression(path):
+    """
+    Returns 'gz' or 'xz' from the magic bytes of a file, '' if not compressed
+
+    """
+    with open(path, 'rb') as file:
+        head = file.read(6)
+    for magic_bytes, compression in MAGIC.items():
+        if head.startswith(magic_bytes):
+            return compression
+    return ''
+
+def _extension(path):
+    compression = os.path.splitext(path)[1][1:]
+    return compression if compression in EXTENSIONS else ''
+
+def compressed_name(path, compression):
+    """
+    Returns path with the compression extension added ('' leaves it unchanged)
+
+    """
+    return f'{path}.{compression}' if compression else path
+
+def open_text(path, mode='r', encoding=None, level=None):
+    """
+    Opens a text file that may be compressed.  Reading sniffs the magic bytes,
+    writing ('w') compresses according to the .gz/.xz extension of path.  The
+    encoding defaults to utf-8-sig for reading and utf-8 for writing
+
+    """
+    compression = sniff_compression(path) if 'r' in mode else _extension(path)
+    if encoding is None:
+        encoding = 'utf-8-sig' if 'r' in mode else 'utf-8'
+    if compression == 'gz':
+        level = DEFAULT_LEVEL['gz'] if level is None else level
+        if 'r' in mode:
+            return gzip.open(path, 'rt', encoding=encoding)
+        return gzip.open(path, 'wt', encoding=encoding, compresslevel=level)
+    if compression == 'xz':
+        if 'r' in mode:
+            return lzma.open(path, 'rt', encoding=encoding)
+        level = DEFAULT_LEVEL['xz'] if level is None else level
+        return lzma.open(path, 'wt', encoding=encoding, preset=level)
+    return open(path, mode, encoding=encoding)
+
+def read_bytes(path):
+    """
+    Returns the (decompressed) content of a file
+
+    """
+    compression = sniff_compression(path)
+    if compression == 'gz':
+        with gzip.open(path, 'rb') as file:
+            return file.read()
+    if compression == 'xz':
+        with lzma.open(path, 'rb') as file:
+            return file.read()
+    with open(path, 'rb') as file:
+        return file.read()
+
+def _compress(data, compression, level):
+    if compression == 'gz':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if compression == 'xz':
+        return lzma.compress(data, preset=level)
+    return data
+
+def _decompress(data, compression):
+    if compression == 'gz':
+        return gzip.decompress(data)
+    if compression == 'xz':
+        return lzma.decompress(data)
+    return data
+
+def benchmark(path, gz_levels=(1, 6, 9), xz_levels=(0, 6, 9), repeat=5):
+    """
+    Compresses a file at each level and times loading it back (decompress and
+    json.loads for .json files, decode for text).  Returns a list of
+    {'compression', 'level', 'bytes', 'ratio', 'write_ms', 'load_ms'}
+
+    """
+    data = read_bytes(path)
+    is_json = '.json' in os.path.basename(path)
+    runs = [('', 0)] + [('gz', level) for level in gz_levels] \
+           + [('xz', level) for level in xz_levels]
+    results = []
+    for compression, level in runs:
+        start = time.perf_counter()
+        packed = _compress(data, compression, level)
+        write_ms = (time.perf_counter() - start) * 1000
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = _decompress(packed, compression).decode('utf-8-sig')
+            if is_json:
+                json.loads(text)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        results.append({'compression': compression or 'none', 'level': level,
+                        'bytes': len(packed), 'ratio': len(packed) / len(data),
+                        'write_ms': write_ms, 'load_ms': best})
+    return results
+
+def main():
+    """
+    Compress a file or benchmark the compression levels if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Compress element files, benchmark levels')
+    parser.add_argument('in_FN', help='element JSON, text export or help file')
+    parser.add_argument('out_FN', nargs='?', default='', help='file to write, .gz or .xz')
+    parser.add_argument('--level', type=int, default=None, help='gzip level or xz preset')
+    parser.add_argument('--benchmark', action='store_true', help='size and load time per level')
+    args = parser.parse_args()
+    if args.out_FN:
+        with open_text(args.in_FN) as file:
+            text = file.read()
+        with open_text(args.out_FN, 'w', level=args.level) as file:
+            file.write(text)
+        msg('Info', 'I711', f'{args.out_FN} written, {os.path.getsize(args.out_FN):,} bytes '
+            f'(from {os.path.getsize(args.in_FN):,})')
+    if args.benchmark:
+        for result in benchmark(args.in_FN):
+            msg('Info', 'I712', f'{result["compression"]:4} level {result["level"]}: '
+                f'{result["bytes"]:>9,} bytes ({result["ratio"]:6.1%}) '
+                f'write={result["write_ms"]:7.1f}ms load={result["load_ms"]:6.1f}ms')
+
+if __name__ == '__main__':
+    main()
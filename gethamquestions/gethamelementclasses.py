@@ -1,9 +1,17 @@
 #pylint: disable-msg=too-many-instance-attributes
 from gethamquestionclasses import msg
+from gethamhelpcache import HELP_FIELDS
+from gethamhelploader import iter_help_history, runtime_help
+from gethamschema import inflate_element, read_element
+from gethamfcc import FccIndex
+from gethamautocomplete import Autocomplete
 from pathlib import Path
+import functools
 import json
 import textwrap
 
+RENDER_CACHE_SIZE = 4096
+
 def print_wrap(prefix, preferredWidth, message):
     #preferredWidth = 70
     wrapper = textwrap.TextWrapper(initial_indent=prefix, 
@@ -339,12 +347,146 @@ class Element:
         """
         return f'Element("{self.elem }","","","","{self.subelements},")'
     
+class FrozenDict(dict):
+    """
+    A dict that refuses changes, for rendered records shared between callers.
+    It is still a dict, so json.dumps and existing readers work unchanged.
+
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('rendered question records are read-only')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
 class ElementPool:
     """
+    A class to look up questions of an element pool object (element JSON)
+
+    Rendered get_questions_by_ids records are built once per (qid, options) and
+    held in a bounded LRU cache; callers share the read-only records.  A schema
+    2 element object (see gethamschema.py) is inflated on construction.
+    element_FN loads an element JSON file instead, either schema, compressed or
+    not, i.e. ElementPool(element_FN='element2.json.gz').
+
     """
-    #TODO: add fileFN parameter, obj=element_pool, i.e. ElementHelp
-    def __init__(self, element_pool):
-        self.element_pool = element_pool
+    def __init__(self, element_pool=None, render_cache_size=RENDER_CACHE_SIZE, element_FN=''):
+        if element_FN:
+            element_pool = read_element(element_FN)
+        self.element_pool = inflate_element(element_pool)
+        self.element_FN = element_FN
+        self._qids = None
+        self._ordinals = None
+        self._fcc_index = None
+        self._autocomplete = None
+        self._columns = None
+        self._related = None
+        self._index = None
+        self._render = functools.lru_cache(maxsize=render_cache_size)(self._render_question)
+        self._render_json = functools.lru_cache(maxsize=render_cache_size)(
+            self._render_question_json)
+
+    def get_qids(self):
+        """
+        Returns the list of qids in pool order.  The position of a qid in the
+        list is its dense ordinal 0...n-1, used by the array based modules
+
+        """
+        if self._qids is None:
+            self._qids = [q['qid'] for q in self.iter_questions()]
+        return self._qids
+
+    def get_ordinals(self):
+        """
+        Returns a dict qid -> dense ordinal
+
+        """
+        if self._ordinals is None:
+            self._ordinals = {qid: i for i, qid in enumerate(self.get_qids())}
+        return self._ordinals
+
+    def get_fcc_index(self):
+        """
+        Returns the FccIndex of the questions' FCC citations (see gethamfcc.py),
+        i.e. get_fcc_index().lookup('97.301-97.305')
+
+        """
+        if self._fcc_index is None:
+            self._fcc_index = FccIndex(self.iter_questions())
+        return self._fcc_index
+
+    def get_autocomplete(self):
+        """
+        Returns the Autocomplete of the qids, group ids and topics (see
+        gethamautocomplete.py), i.e. get_autocomplete().complete('t1a', 5)
+
+        """
+        if self._autocomplete is None:
+            self._autocomplete = Autocomplete(self)
+        return self._autocomplete
+
+    def get_columns(self):
+        """
+        Returns the PoolColumns of the questions (see gethamquery.py)
+
+        """
+        if self._columns is None:
+            # imported here: numpy is needed by queries only
+            from gethamquery import PoolColumns
+            self._columns = PoolColumns(self)
+        return self._columns
+
+    def query(self, *predicates, **keywords):
+        """
+        Returns a Query of the questions matching every predicate (see
+        gethamquery.py), i.e. query(subelement('T5'), ~deleted(), has_figure=True)
+        .cursor(page_size=20)
+
+        """
+        from gethamquery import Query
+        return Query(self.get_columns(), predicates, **keywords)
+
+    def get_related(self):
+        """
+        Returns the (neighbors, scores) arrays of the related questions (see
+        gethamrelated.py), read from the table beside element_FN or built
+
+        """
+        if self._related is None:
+            # imported here: numpy is needed by related questions only
+            from gethamrelated import build_related, read_related, related_FN
+            if self.element_FN:
+                self._related = read_related(related_FN(self.element_FN), self.get_qids())
+            if self._related is None:
+                self._related = build_related(list(self.iter_questions()))
+        return self._related
+
+    def related(self, qid, k=5):
+        """
+        Returns the qids of the k questions most similar to qid, best first
+
+        """
+        ordinal = self.get_ordinals().get(qid)
+        if ordinal is None:
+            return []
+        neighbors, _ = self.get_related()
+        qids = self.get_qids()
+        return [qids[i] for i in neighbors[ordinal, :k]]
+
+    def iter_questions(self):
+        """
+        Yields every question dict of the element pool, in pool order
+
+        """
+        for se in self.element_pool['subelements']:
+            for g in se['groups']:
+                yield from g['questions']
 
     def get_questions_by_ids(self, qids, options=''):
         """
@@ -372,30 +514,68 @@ class ElementPool:
         {question}, 
         {question}
         }]
+        Records are shared, read-only (FrozenDict, answers and topics are tuples)
         """
-        result = []
-        e = self.element_pool
-        for se in e['subelements']:
-            for g in se['groups']:
-                topics = g['topics']
-                for q in g['questions']:
-                    if q['qid'] in qids:
-                        question = {}
-                        question['qid'] = q['qid']
-                        question['topics'] = topics
-                        if q['figure']:
-                            question['figure'] = q['figure']
-                        question['question'] = f'#{q["qid"]} {q["text"]}'
-                        start = 0
-                        if options.find('strip-answer-prefix') != -1:
-                            start = 3
-                        question['answers'] = []
-                        for answer in q['answers']:
-                            question['answers'].append(answer[start:])
-                        question['correct answer'] = \
-                            q['answers'][['A', 'B', 'C', 'D'].index(q['correct'])][start:]
-                        result.append(question)
-        return result
+        strip = options.find('strip-answer-prefix') != -1
+        return [self._render(qid, strip) for qid in self._find_qids(qids)]
+
+    def get_questions_json(self, qids, options=''):
+        """
+        Returns the get_questions_by_ids result as UTF-8 JSON bytes, joined from
+        records serialized once and cached
+
+        """
+        strip = options.find('strip-answer-prefix') != -1
+        return b'[' + b','.join(self._render_json(qid, strip)
+                                for qid in self._find_qids(qids)) + b']'
+
+    def render_cache_info(self):
+        """
+        Returns the functools cache_info() of the rendered records cache
+
+        """
+        return self._render.cache_info()
+
+    def _find_qids(self, qids):
+        """
+        Returns the requested qids (list or blank separated string) that are in
+        the pool, once each, in pool order
+
+        """
+        if isinstance(qids, str):
+            qids = qids.split()
+        ordinals = self.get_ordinals()
+        found = sorted({ordinals[qid] for qid in qids if qid in ordinals})
+        pool_qids = self.get_qids()
+        return [pool_qids[i] for i in found]
+
+    def _render_question(self, qid, strip):
+        """
+        Builds the read-only get_questions_by_ids record of one question
+
+        """
+        if self._index is None:
+            self._index = {}
+            for se in self.element_pool['subelements']:
+                for g in se['groups']:
+                    topics = tuple(g['topics'])
+                    for q in g['questions']:
+                        self._index[q['qid']] = (q, topics)
+        q, topics = self._index[qid]
+        start = 3 if strip else 0
+        question = {}
+        question['qid'] = q['qid']
+        question['topics'] = topics
+        if q['figure']:
+            question['figure'] = q['figure']
+        question['question'] = f'#{q["qid"]} {q["text"]}'
+        question['answers'] = tuple(answer[start:] for answer in q['answers'])
+        question['correct answer'] = \
+            q['answers'][['A', 'B', 'C', 'D'].index(q['correct'])][start:]
+        return FrozenDict(question)
+
+    def _render_question_json(self, qid, strip):
+        return json.dumps(self._render(qid, strip)).encode('utf-8')
 
 # an example ElementHelp file is aianswers.history.json
 class ElementHelp:
@@ -403,35 +583,21 @@ class ElementHelp:
         self.version = "0.15ex"
         self.version_date = "2023-07-23"
         self.element_help = {}
+        el_help = {}
         if help_FN:
             path = Path(help_FN)
             if path.is_file():
-                el_help = ''
+                # stream the history file, only the "current" records are decoded
                 try:
-                    #open(file, mode='r', buffering=- 1, encoding=None, errors=None, newline=None, closefd=True, opener=None)
-                    with path.open(mode='rt', encoding='UTF-8') as f:
-                        el_help = json.load(f)
-                except:
-                    print("An exception occurred, path.open")       
+                    for key, cur in iter_help_history(path):
+                        el_help.update({key: runtime_help(cur)})
+                except (OSError, ValueError) as err:
+                    print(f"An exception occurred, iter_help_history: {err}")
         if help_obj:
-            el_help = help_obj
+            el_help = {key: runtime_help(item['current']) for key, item in help_obj.items()}
         # sort the keys
-        el_help_sort_keys = list(el_help.keys())
-        el_help_sort_keys.sort()
-        # import "current" aihelp
-        for key in el_help_sort_keys:
-            help = {}
-            cur = el_help[key]['current']
-            help["topics"] = cur.get("topics") if cur.get("topics_valid") else ''
-            help["explanation"] = cur.get("explanation") if cur.get("explanation_valid") else ''
-            help["memory_aid"] = cur.get("memory_aid") if cur.get("memory_aid_valid") else ''
-            help["topics_valid"] = cur.get("topics_valid")
-            help["explanation_valid"] = cur.get("explanation_valid")
-            help["memory_aid_valid"] = cur.get("memory_aid_valid")
-            help["topics_edited"] = cur.get("topics_edited") if cur.get("topics_edited") else ''
-            help["explanation_edited"] = cur.get("explanation_edited") if cur.get("explanation_edited") else ''
-            help["memory_aid_edited"] = cur.get("memory_aid_edited") if cur.get("memory_aid_edited") else ''
-            self.element_help.update({key: help})
+        for key in sorted(el_help):
+            self.element_help.update({key: el_help[key]})
 
     def get_version(self):
         return self.version
@@ -523,6 +689,75 @@ class ElementHelp:
                     # 'memory_aid': e[qid]['memory_aid']}})
         return result
     
+    def apply_cache(self, cache, questions):
+        """
+        Fills missing help from a HelpCache (see gethamhelpcache.py)
+
+        Parameters
+            cache - a HelpCache
+            questions - iterable of question dicts, i.e. ElementPool.iter_questions()
+
+        Return
+            the number of questions whose help came from the cache
+        """
+        applied = 0
+        for q in questions:
+            helps = self.element_help.get(q['qid'])
+            if helps and all(helps[f'{field}_valid'] for field in HELP_FIELDS):
+                continue
+            cached = cache.get_question(q)
+            if not cached:
+                continue
+            # a new record has every field with its _valid and _edited keys
+            helps = helps or runtime_help({})
+            for field in HELP_FIELDS:
+                if not helps.get(f'{field}_valid') and cached[field]:
+                    helps[field] = cached[field]
+                    helps[f'{field}_valid'] = True
+            self.element_help.update({q['qid']: helps})
+            applied += 1
+        return applied
+
+    def update_cache(self, cache, questions):
+        """
+        Stores the valid help of each question in a HelpCache
+        Return
+            the number of questions stored
+        """
+        stored = 0
+        for q in questions:
+            helps = self.element_help.get(q['qid'])
+            if helps and any(helps[f'{field}_valid'] for field in HELP_FIELDS):
+                cache.put_question(q, {field: helps[field] if helps[f'{field}_valid'] else ''
+                                       for field in HELP_FIELDS})
+                stored += 1
+        return stored
+
+    def migrate(self, pairs, min_similarity=0.0, same_correct=True):
+        """
+        Re-keys the help from old to new qids with a near-duplicate mapping
+        (see gethamneardup.py), help without a match is dropped
+
+        Parameters
+            pairs - [{'old': 'T1A01', 'new': 'T1A03', 'similarity': 0.91,
+                      'same_correct': True}, ...]
+            min_similarity - pairs below it are not migrated
+            same_correct - migrate only pairs whose correct answer text is unchanged
+
+        Return
+            list of the new qids that received help
+        """
+        migrated = {}
+        for pair in pairs:
+            helps = self.element_help.get(pair['old'])
+            if helps is None or pair['similarity'] < min_similarity:
+                continue
+            if same_correct and not pair.get('same_correct', True):
+                continue
+            migrated[pair['new']] = dict(helps)
+        self.element_help = {key: migrated[key] for key in sorted(migrated)}
+        return list(self.element_help)
+
     def export_help(self, help_FN):
         export_help = {}
         for qid, h in self.element_help.items():
@@ -0,0 +1,452 @@
+#-*- coding: utf-8 -*-
+"""
+Batched, concurrency limited AI enrichment of an element pool.
+
+Questions are packed several to a prompt under a token budget, the prompts are
+sent to a chat completion endpoint N at a time, and each answered batch is merged
+into an ElementHelp history file (i.e. aianswers.history.json) as it arrives; the
+file is written every few batches and when the run ends.  Failed requests are retried with exponential backoff.  With a HelpCache
+(gethamhelpcache.py) questions already answered in an earlier pool year are
+filled from the cache and never sent.
+
+Classes:
+
+    EnrichmentPipeline
+
+Functions:
+    estimate_tokens
+    question_prompt
+    pack_batches
+    post_json
+    main
+
+Usage
+    python gethamenrichment.py element2.json aianswers.history.json --stub
+    python gethamenrichment.py element2.json aianswers.history.json --cache help.cache.json
+    (--stub runs the local stub server from gethamstubllm.py, no network needed)
+
+Change Log
+    2026-10-19 v03 - write the history every write_every batches and at the end
+    2026-10-19 v02 - consult the help cache before generating
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import ssl
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+from gethamquestionclasses import msg
+from gethamelementclasses import ElementPool
+from gethamhelpcache import HELP_FIELDS, HelpCache
+
+PROMPT_OVERHEAD_TOKENS = 120
+SYSTEM_PROMPT = (
+    'You are helping students prepare for the FCC Amateur Radio exams. '
+    'For every question below return a JSON array with one object per question, '
+    'with the keys "qid", "topics" (topics separated by ";"), "explanation" and '
+    '"memory_aid".  Return only the JSON array.'
+)
+
+def estimate_tokens(text):
+    """
+    Return a rough token count for text (about 4 characters per token)
+
+    """
+    return len(text) // 4 + 1
+
+def question_prompt(question):
+    """
+    Return the prompt text for one question dict of an element JSON file
+
+    """
+    correct = ['A', 'B', 'C', 'D'].index(question['correct'])
+    lines = [f'#{question["qid"]} {question["text"]}']
+    lines.extend(question['answers'])
+    lines.append(f'Correct answer: {question["answers"][correct]}')
+    return '\n'.join(lines)
+
+def pack_batches(questions, token_budget):
+    """
+    Group questions so the prompt of each batch stays under token_budget
+
+    Parameters
+    ----------
+    questions : iterable
+        Question dicts of an element JSON file
+    token_budget : int
+        Maximum estimated prompt tokens per batch.  A question larger than
+        the budget is sent in a batch of its own.
+
+    Returns
+    -------
+    list of lists of (qid, prompt text)
+    """
+    batches = []
+    batch = []
+    used = PROMPT_OVERHEAD_TOKENS
+    for question in questions:
+        text = question_prompt(question)
+        tokens = estimate_tokens(text)
+        if batch and used + tokens > token_budget:
+            batches.append(batch)
+            batch = []
+            used = PROMPT_OVERHEAD_TOKENS
+        batch.append((question['qid'], text))
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+async def post_json(url, payload, headers=None, timeout=60):
+    """
+    POST a JSON payload with a minimal HTTP/1.1 client and return (status, body)
+
+    """
+    parts = urlsplit(url)
+    secure = parts.scheme == 'https'
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or '/'
+    body = json.dumps(payload).encode('utf-8')
+    request = [
+        f'POST {path} HTTP/1.1',
+        f'Host: {parts.hostname}',
+        'Content-Type: application/json',
+        f'Content-Length: {len(body)}',
+        'Connection: close',
+    ]
+    for key, value in (headers or {}).items():
+        request.append(f'{key}: {value}')
+    data = ('\r\n'.join(request) + '\r\n\r\n').encode('latin-1') + body
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(
+            parts.hostname, port, ssl=ssl.create_default_context() if secure else None)
+        try:
+            writer.write(data)
+            await writer.drain()
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            length = None
+            chunked = False
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                key = key.strip().lower()
+                if key == 'content-length':
+                    length = int(value)
+                elif key == 'transfer-encoding' and 'chunked' in value.lower():
+                    chunked = True
+            if chunked:
+                chunks = []
+                while True:
+                    size = int((await reader.readline()).split(b';')[0], 16)
+                    if size == 0:
+                        break
+                    chunks.append(await reader.readexactly(size))
+                    await reader.readline()
+                response = b''.join(chunks)
+            elif length is not None:
+                response = await reader.readexactly(length)
+            else:
+                response = await reader.read()
+            return status, response
+        finally:
+            writer.close()
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+class EnrichmentPipeline:
+    """
+    A class to generate AI help (topics, explanation, memory aid) for an element pool
+
+    ...
+
+    Attributes
+    ----------
+    url : str
+        The chat completion endpoint, i.e. http://127.0.0.1:8765/v1/chat/completions
+    model : str
+        The model name sent with each request
+    concurrency : int
+        Maximum number of requests in flight
+    token_budget : int
+        Maximum estimated prompt tokens per request
+    retries : int
+        Number of retries for a failed request
+    backoff : float
+        Base delay in seconds, doubled after each failed attempt
+    help_FN : str
+        The help history file results are merged into
+    write_every : int
+        Answered batches merged between writes of the help history file
+    cache : HelpCache
+        Consulted before generating and updated with every result, or None
+    stats : dict
+        requests, retries, failures, questions, cached, elapsed
+
+    """
+    #pylint: disable-msg=too-many-arguments
+    def __init__(self, url, help_FN, model='gpt-3.5-turbo', concurrency=4,
+                 token_budget=1500, retries=3, backoff=0.5, api_key=None, cache=None,
+                 write_every=10):
+        self.url = url
+        self.help_FN = help_FN
+        self.model = model
+        self.concurrency = concurrency
+        self.token_budget = token_budget
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self.write_every = write_every
+        self.api_key = api_key if api_key is not None else os.environ.get('OPENAI_API_KEY', '')
+        self.history = {}
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'questions': 0,
+                      'cached': 0, 'elapsed': 0.0}
+        self._lock = None
+        self._questions = {}
+        self._unwritten = 0             # batches merged since the last write_history
+    #pylint: enable-msg=too-many-arguments
+
+    def load_history(self):
+        """
+        Load the existing help history file, if there is one
+
+        """
+        path = Path(self.help_FN)
+        if path.is_file():
+            with path.open(mode='rt', encoding='utf-8-sig') as file:
+                self.history = json.load(file)
+        return self.history
+
+    def needs_help(self, qid, force=False):
+        """
+        Returns True if any help field of qid is missing and was not edited by hand
+
+        """
+        if force:
+            return True
+        cur = self.history.get(qid, {}).get('current', {})
+        for field in HELP_FIELDS:
+            if not cur.get(f'{field}_valid') and not cur.get(f'{field}_edited'):
+                return True
+        return False
+
+    def merge_result(self, result):
+        """
+        Merge one AI answer into the history, keeping the prior "current" record
+        in "history" and never replacing fields that were edited by hand
+
+        """
+        qid = result.get('qid')
+        if not qid:
+            return False
+        entry = self.history.setdefault(qid, {'current': {}, 'history': []})
+        prior = entry.get('current', {})
+        cur = dict(prior)
+        for field in HELP_FIELDS:
+            if prior.get(f'{field}_edited'):
+                continue
+            value = result.get(field, '')
+            if isinstance(value, list):
+                value = '; '.join(value)
+            cur[field] = value
+            cur[f'{field}_valid'] = bool(value)
+        cur['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        cur['model'] = self.model
+        if prior:
+            entry.setdefault('history', []).append(prior)
+        entry['current'] = cur
+        return True
+
+    def write_history(self):
+        """
+        Write the help history, replacing the file atomically
+
+        """
+        path = Path(self.help_FN)
+        tmp = path.with_name(path.name + '.tmp')
+        with tmp.open(mode='wt', encoding='utf-8') as file:
+            file.write(json.dumps(self.history, indent=2))
+        os.replace(tmp, path)
+        self._unwritten = 0
+
+    def build_request(self, batch):
+        """
+        Returns the chat completion payload for a batch of (qid, prompt text)
+
+        """
+        return {
+            'model': self.model,
+            'temperature': 0.2,
+            'messages': [
+                {'role': 'system', 'content': SYSTEM_PROMPT},
+                {'role': 'user', 'content': '\n\n'.join(text for _, text in batch)},
+            ],
+        }
+
+    async def request_batch(self, batch):
+        """
+        Send one batch, retrying with backoff, and return the list of results
+
+        """
+        headers = {'Authorization': f'Bearer {self.api_key}'} if self.api_key else {}
+        payload = self.build_request(batch)
+        for attempt in range(self.retries + 1):
+            self.stats['requests'] += 1
+            try:
+                status, body = await post_json(self.url, payload, headers)
+                if status == 200:
+                    content = json.loads(body)['choices'][0]['message']['content']
+                    results = json.loads(content)
+                    if isinstance(results, list):
+                        return results
+                    msg('Warning', 'W601', f'response is not a list, status={status}')
+                else:
+                    msg('Warning', 'W602', f'HTTP status {status}, attempt {attempt + 1}')
+            except (OSError, asyncio.TimeoutError, ValueError, KeyError, IndexError) as err:
+                msg('Warning', 'W603', f'{type(err).__name__}: {err}, attempt {attempt + 1}')
+            if attempt < self.retries:
+                self.stats['retries'] += 1
+                delay = self.backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+        self.stats['failures'] += 1
+        msg('Error', 'E601', f'batch failed: {" ".join(qid for qid, _ in batch)}')
+        return []
+
+    async def _worker(self, semaphore, batch):
+        async with semaphore:
+            results = await self.request_batch(batch)
+        wanted = {qid for qid, _ in batch}
+        async with self._lock:
+            merged = 0
+            for result in results:
+                if isinstance(result, dict) and result.get('qid') in wanted:
+                    merged += self.merge_result(result)
+                    if self.cache is not None:
+                        self.cache.put_question(self._questions[result['qid']],
+                                                self.history[result['qid']]['current'])
+            if merged:
+                self.stats['questions'] += merged
+                self._unwritten += 1
+                # the whole file is rewritten, blocking the event loop, so not per batch
+                if self._unwritten >= self.write_every:
+                    self.write_history()
+
+    async def run(self, questions, force=False):
+        """
+        Enrich the questions that still need help, and return the stats
+
+        Parameters
+        ----------
+        questions : iterable
+            Question dicts of an element JSON file
+        force : bool
+            Regenerate help for all questions, not only the missing ones
+        """
+        start = time.perf_counter()
+        self.load_history()
+        todo = [q for q in questions if self.needs_help(q['qid'], force)]
+        if self.cache is not None and not force:
+            todo = self.apply_cache(todo)
+        self._questions = {q['qid']: q for q in todo}
+        batches = pack_batches(todo, self.token_budget)
+        msg('Info', 'I601', f'{len(todo)} questions in {len(batches)} batches, '
+            f'concurrency={self.concurrency}')
+        self._lock = asyncio.Lock()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            await asyncio.gather(*(self._worker(semaphore, batch) for batch in batches))
+        finally:
+            # also when interrupted, the answers merged so far are kept
+            if self._unwritten:
+                self.write_history()
+        self.stats['elapsed'] = time.perf_counter() - start
+        return self.stats
+
+    def apply_cache(self, questions):
+        """
+        Merge cached help for questions, and return the questions still to generate
+
+        """
+        todo = []
+        for q in questions:
+            cached = self.cache.get_question(q)
+            if cached and all(cached[field] for field in HELP_FIELDS):
+                self.merge_result(dict(cached, qid=q['qid']))
+                self.stats['cached'] += 1
+            else:
+                todo.append(q)
+        if self.stats['cached']:
+            # written with the first answered batches, or at the end of run
+            self._unwritten += 1
+        return todo
+
+async def _run(args):
+    with open(args.element_FN, 'r', encoding='utf-8-sig') as file:
+        element = json.load(file)
+    questions = list(ElementPool(element).iter_questions())
+    if args.limit:
+        questions = questions[:args.limit]
+    url = args.url
+    server = None
+    if args.stub:
+        # imported here, the stub is only needed for offline runs
+        from gethamstubllm import start_stub_server
+        server = await start_stub_server('127.0.0.1', 0, latency=args.stub_latency,
+                                         fail_rate=args.stub_fail_rate)
+        port = server.sockets[0].getsockname()[1]
+        url = f'http://127.0.0.1:{port}/v1/chat/completions'
+    pipeline = EnrichmentPipeline(url, args.help_FN, model=args.model,
+                                  concurrency=args.concurrency,
+                                  token_budget=args.token_budget,
+                                  retries=args.retries, backoff=args.backoff,
+                                  cache=HelpCache(args.cache) if args.cache else None,
+                                  write_every=args.write_every)
+    try:
+        stats = await pipeline.run(questions, force=args.force)
+        if pipeline.cache is not None:
+            pipeline.cache.save()
+            pipeline.cache.print_summary()
+    finally:
+        if server:
+            server.close()
+            await server.wait_closed()
+    rate = stats['questions'] / stats['elapsed'] if stats['elapsed'] else 0
+    msg('Info', 'I602', f'questions={stats["questions"]} cached={stats["cached"]} '
+        f'requests={stats["requests"]} '
+        f'retries={stats["retries"]} failures={stats["failures"]} '
+        f'elapsed={stats["elapsed"]:.2f}s rate={rate:.1f} questions/s')
+
+def main():
+    """
+    Execute the enrichment pipeline if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Generate AI help for an element pool')
+    parser.add_argument('element_FN', help='element JSON file, i.e. element2.json')
+    parser.add_argument('help_FN', help='help history file, i.e. aianswers.history.json')
+    parser.add_argument('--url', default='https://api.openai.com/v1/chat/completions')
+    parser.add_argument('--model', default='gpt-3.5-turbo')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--token-budget', type=int, default=1500)
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=0.5)
+    parser.add_argument('--write-every', type=int, default=10,
+                        help='batches merged between writes of the help file')
+    parser.add_argument('--limit', type=int, default=0, help='only the first N questions')
+    parser.add_argument('--force', action='store_true', help='regenerate all help')
+    parser.add_argument('--cache', default='', help='help cache file, i.e. help.cache.json')
+    parser.add_argument('--stub', action='store_true', help='use the local stub server')
+    parser.add_argument('--stub-latency', type=float, default=0.2)
+    parser.add_argument('--stub-fail-rate', type=float, default=0.0)
+    asyncio.run(_run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,13 @@ try:
     from xml.etree.cElementTree import XML
 except ImportError:
     from xml.etree.ElementTree import XML
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import posixpath
+import re
+import threading
 import zipfile
 
 WORDNAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
@@ -19,15 +26,29 @@ SYMDICT = {
     'F0B4' : 'x',
     '0000' : 'u\\unkn'
 }
+RELNAMESPACE = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+EMBED = RELNAMESPACE + 'embed'
+LINKID = RELNAMESPACE + 'id'
+BLIP = '{http://schemas.openxmlformats.org/drawingml/2006/main}blip'
+IMAGEDATA = '{urn:schemas-microsoft-com:vml}imagedata'
+RELATIONSHIP = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+REGEX_FIGURE = re.compile(r'[fF]igure\s+(?P<fig>[TGE]\d?-\d+)')
+DOCUMENT_RELS = 'word/_rels/document.xml.rels'
+FIGURE_INDEX = 'figures.json'
+FIGURE_SEARCH = 2                 # paragraphs before/after an image searched for its label
 
-def get_docx_text(path):
+def get_docx_text(path, figures=None):
     """
     Take the path of a docx file as argument, return the text in unicode.
+    If figures is a dict, the images of the document are added to it from
+    the same parse, {figure id: media member} (see _label_figures).
     """
 
-    document = zipfile.ZipFile(path)
-    xml_content = document.read('word/document.xml')
-    document.close()
+    with zipfile.ZipFile(path) as document:
+        xml_content = document.read('word/document.xml')
+        rels_content = None
+        if figures is not None and DOCUMENT_RELS in document.namelist():
+            rels_content = document.read(DOCUMENT_RELS)
     tree = XML(xml_content)
 
     paragraphs = []
@@ -36,20 +57,127 @@ def get_docx_text(path):
     # replace .getiterator with .iter
     texts = []
     paragraphs = []
+    images = []                     # [(texts, [image rIds])] of every paragraph
     for elt in tree.iter():
         if elt.tag == PARA:
             if texts:
                 paragraphs.append(''.join(texts))
             texts = []
+            if rels_content is not None:
+                images.append((texts, []))
         elif elt.tag == SYM:
             sym = elt.attrib[CHAR].upper()
             sym = SYMDICT.get(sym, 'u\\unkn')
             texts.append(sym)
         elif elt.tag == TEXT:
             texts.append(elt.text)
+        elif images and elt.tag == BLIP and EMBED in elt.attrib:
+            images[-1][1].append(elt.attrib[EMBED])
+        elif images and elt.tag == IMAGEDATA and LINKID in elt.attrib:
+            images[-1][1].append(elt.attrib[LINKID])
 
     if texts:
         paragraphs.append(''.join(texts))
         texts = []
+    if rels_content is not None:
+        figures.update(_label_figures(XML(rels_content), images))
 
     return paragraphs
+
+def _label_figures(rels, paragraphs):
+    """
+    Return {figure id: media member} of the images of the paragraphs
+    [(texts, [image rIds])], i.e. {'T-1': 'word/media/image1.png'}.  An image
+    is labeled by the "Figure T-1" text of its paragraph, else of the nearest
+    paragraph around it; images with no label are keyed by their member name.
+    """
+    targets = {}
+    for rel in rels.iter(RELATIONSHIP):
+        if rel.attrib.get('Type', '').endswith('/image') and \
+                rel.attrib.get('TargetMode') != 'External':
+            targets[rel.attrib['Id']] = posixpath.normpath(
+                posixpath.join('word', rel.attrib['Target']))
+    labels = [REGEX_FIGURE.search(''.join(text for text in texts if text))
+              for texts, _ in paragraphs]
+
+    figures = {}
+    for i, (_, rids) in enumerate(paragraphs):
+        for rid in rids:
+            if rid not in targets:
+                continue
+            label = labels[i]
+            for distance in range(1, FIGURE_SEARCH + 1):
+                if label:
+                    break
+                for j in (i - distance, i + distance):
+                    if 0 <= j < len(labels) and labels[j] and not paragraphs[j][1]:
+                        label = labels[j]
+                        break
+            key = label.group('fig') if label else targets[rid]
+            figures.setdefault(key, targets[rid])
+    return figures
+
+def get_docx_figures(path):
+    """
+    Take the path of a docx file, return {figure id: media member} of the
+    images, i.e. {'T-1': 'word/media/image1.png'}
+    """
+    figures = {}
+    get_docx_text(path, figures)
+    return figures
+
+def _store_member(document, member, asset_dir):
+    """
+    Stream one member of an open ZipFile into the asset store, return the
+    asset file name (sha256 of the content and the member's extension)
+    """
+    digest = hashlib.sha256()
+    tmp = os.path.join(asset_dir, f'.tmp-{threading.get_ident()}-{posixpath.basename(member)}')
+    with document.open(member) as source, open(tmp, 'wb') as target:
+        for block in iter(lambda: source.read(1 << 16), b''):
+            digest.update(block)
+            target.write(block)
+    asset = digest.hexdigest()[:24] + posixpath.splitext(member)[1].lower()
+    if os.path.isfile(os.path.join(asset_dir, asset)):
+        os.remove(tmp)
+    else:
+        os.replace(tmp, os.path.join(asset_dir, asset))
+    return asset
+
+def extract_docx_figures(path, asset_dir, figures=None, workers=4):
+    """
+    Take the path of a docx file and an asset directory, write each figure
+    image once under the hash of its content and return (figures, written):
+    {figure id: asset file name} and the number of images written.  figures
+    is the {figure id: media member} of get_docx_text, else the document is
+    parsed here.
+
+    The asset directory keeps figures.json: the figures of the last document
+    and the asset of each member content seen (zip CRC and size), so an
+    unchanged image is not read again on a later run.
+    """
+    os.makedirs(asset_dir, exist_ok=True)
+    index_FN = os.path.join(asset_dir, FIGURE_INDEX)
+    index = {'members': {}, 'figures': {}}
+    if os.path.isfile(index_FN):
+        with open(index_FN, 'r', encoding='utf-8') as file:
+            index = json.load(file)
+    if figures is None:
+        figures = get_docx_figures(path)
+    # one ZipFile for all members, its reads are locked and seek per member
+    with zipfile.ZipFile(path) as document:
+        infos = {member: document.getinfo(member) for member in set(figures.values())}
+        keys = {member: f'{info.CRC:08x}-{info.file_size}' for member, info in infos.items()}
+        pending = [member for member, key in keys.items()
+                   if not os.path.isfile(os.path.join(asset_dir, index['members'].get(key, '')))]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for member, asset in zip(pending, executor.map(
+                    lambda member: _store_member(document, member, asset_dir), pending)):
+                index['members'][keys[member]] = asset
+    assets = {figure: index['members'][keys[member]] for figure, member in figures.items()}
+    index['figures'] = dict(sorted(assets.items()))
+    tmp = index_FN + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        json.dump(index, file, indent=1)
+    os.replace(tmp, index_FN)
+    return index['figures'], len(pending)
@@ -0,0 +1,227 @@
+#-*- coding: utf-8 -*-
+"""
+Structured FCC rule citations and a range index over them
+
+Question.fcc is a raw string such as "[97.301(d)]", "[97.13(c)(2), 1.1307(b)]",
+"[97.101(b), (c)]" or "[97.13, 1.1305-1.1319]".  parse_fcc turns it into
+Citation keys (part, section, paragraph path); a bare "(c)" continues the
+previous section and "1.1305-1.1319" becomes one citation spanning the range.
+Anything else ("PRB-1", "ITU Radio Regulations") is kept as other text.
+
+Citations compare as tuples, so everything under a section or paragraph is a
+contiguous key range:
+
+    97.119     covers (97, 119) ... (97, 119, <max>)
+    97.119(f)  covers (97, 119, 'f') ... (97, 119, 'f', <max>)
+
+FccIndex keeps the point citations in one sorted key list (bisect, O(log n + k))
+and the few range citations sorted by start with a running maximum end, so a
+query stops scanning as soon as no earlier range can reach it.
+
+Classes:
+
+    Citation
+    FccIndex
+
+Functions:
+    parse_fcc
+    citation_key
+    main
+
+Usage
+    python gethamfcc.py output/element3.json 97.301-97.305
+    python gethamfcc.py output/element3.json 97.119
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import bisect
+import re
+from collections import namedtuple
+from gethamquestionclasses import msg
+
+Citation = namedtuple('Citation', ['part', 'section', 'paragraphs', 'end_section'])
+Citation.__doc__ = """A CFR citation: part 97, section 301, paragraphs ('d',), end_section
+for a range citation (1.1305-1.1319) else None"""
+
+_CITATION = re.compile(r'^(?P<part>\d+)\.(?P<section>\d+)'
+                       r'(?:\s*-\s*(?:(?P=part)\.)?(?P<end>\d+))?(?P<paras>[\s()\w]*)$')
+_PARAS_ONLY = re.compile(r'^\(+[\w()\s]*\)$')
+_PARA = re.compile(r'\(+\s*(\w+)\s*\)')
+_SPLIT = re.compile(r',|\band\b|;')
+_MAX = '\uffff'
+
+def _para_key(para):
+    """
+    Paragraph sort key: numbers padded so (9) sorts before (10), letters lower case
+
+    """
+    return para.zfill(4) if para.isdigit() else para.lower()
+
+def parse_fcc(fcc):
+    """
+    Returns (citations, others) of a Question.fcc string: a list of Citation and
+    a list of the parts that are not CFR citations
+
+    """
+    citations = []
+    others = []
+    text = fcc.strip().strip('[]').strip()
+    if not text:
+        return citations, others
+    previous = None
+    for item in _SPLIT.split(text):
+        item = item.strip()
+        if not item:
+            continue
+        match = _CITATION.match(item)
+        if match:
+            paragraphs = tuple(_para_key(p) for p in _PARA.findall(match.group('paras')))
+            end = int(match.group('end')) if match.group('end') else None
+            previous = Citation(int(match.group('part')), int(match.group('section')),
+                                paragraphs, end)
+            citations.append(previous)
+        elif previous and _PARAS_ONLY.match(item):
+            paragraphs = tuple(_para_key(p) for p in _PARA.findall(item))
+            citations.append(previous._replace(paragraphs=paragraphs, end_section=None))
+        else:
+            others.append(item)
+    return citations, others
+
+def citation_key(citation):
+    """
+    Returns the sort key of a Citation (its start for a range citation)
+
+    """
+    return (citation.part, citation.section) + citation.paragraphs
+
+def _query_range(reference):
+    """
+    Returns the (low, high) keys covered by '97.119', '97.119(f)' or '97.301-97.305'
+
+    """
+    citations, _ = parse_fcc(reference)
+    if len(citations) != 1:
+        raise ValueError(f'not a single FCC citation: {reference!r}')
+    citation = citations[0]
+    low = citation_key(citation)
+    if citation.end_section is not None:
+        return low, (citation.part, citation.end_section, _MAX)
+    return low, low + (_MAX,)
+
+class FccIndex:
+    """
+    A class to find the questions citing a CFR part/section/paragraph range
+
+    ...
+
+    Attributes
+    ----------
+    keys : list
+        Sorted keys of the point citations
+    key_qids : list
+        qid of each key
+    ranges : list
+        (start key, end key, qid) of range citations, sorted by start
+    starts : list
+        Start key of each range
+    max_end : list
+        Running maximum of the range ends
+    citations : dict
+        qid -> list of Citation
+    others : dict
+        qid -> list of unparsed references
+    order : dict
+        qid -> position in the pool, results are returned in pool order
+
+    """
+    def __init__(self, questions):
+        """
+        Builds the index from question dicts (ElementPool.iter_questions()) or
+        Question objects
+
+        """
+        self.citations = {}
+        self.others = {}
+        self.order = {}
+        points = []
+        ranges = []
+        for question in questions:
+            if not isinstance(question, dict):
+                question = vars(question)
+            qid = question['qid']
+            self.order.setdefault(qid, len(self.order))
+            citations, others = parse_fcc(question.get('fcc', ''))
+            self.citations[qid] = citations
+            if others:
+                self.others[qid] = others
+            for citation in citations:
+                key = citation_key(citation)
+                if citation.end_section is None:
+                    points.append((key, qid))
+                else:
+                    ranges.append((key, (citation.part, citation.end_section, _MAX), qid))
+        points.sort()
+        self.keys = [key for key, _ in points]
+        self.key_qids = [qid for _, qid in points]
+        ranges.sort(key=lambda item: (item[0], item[2]))
+        self.ranges = ranges
+        self.starts = [start for start, _, _ in ranges]
+        self.max_end = []
+        for _, end, _ in ranges:
+            self.max_end.append(max(end, self.max_end[-1]) if self.max_end else end)
+
+    def find(self, low, high):
+        """
+        Returns the qids (pool order) citing anything between keys low and high
+
+        """
+        found = set(self.key_qids[bisect.bisect_left(self.keys, low):
+                                  bisect.bisect_right(self.keys, high)])
+        pos = bisect.bisect_right(self.starts, high)
+        while pos > 0 and self.max_end[pos - 1] >= low:
+            pos -= 1
+            start, end, qid = self.ranges[pos]
+            if end >= low and start <= high:
+                found.add(qid)
+        return sorted(found, key=self.order.get)
+
+    def lookup(self, reference):
+        """
+        Returns the qids citing a reference: '97.119' (anything under the
+        section), '97.119(f)', or a section range '97.301-97.305'
+
+        """
+        return self.find(*_query_range(reference))
+
+    def section_range(self, part, first, last):
+        """
+        Returns the qids citing any section first...last of a part
+
+        """
+        return self.find((part, first), (part, last, _MAX))
+
+def main():
+    """
+    Look up the questions citing FCC rules if called from commandline
+
+    """
+    # imported here: only the command line reads element files
+    from gethamelementclasses import ElementPool
+    parser = argparse.ArgumentParser(description='Questions citing FCC rule sections')
+    parser.add_argument('element_FN', help='element JSON file, i.e. element3.json')
+    parser.add_argument('references', nargs='+', help="i.e. 97.119, 97.119(f), 97.301-97.305")
+    args = parser.parse_args()
+    pool = ElementPool(element_FN=args.element_FN)
+    index = pool.get_fcc_index()
+    for reference in args.references:
+        qids = index.lookup(reference)
+        msg('Info', 'I741', f'{reference}: {len(qids)} questions: {" ".join(qids)}')
+    unparsed = sorted({other for others in index.others.values() for other in others})
+    if unparsed:
+        msg('Info', 'I742', f'not CFR citations: {"; ".join(unparsed)}')
+
+if __name__ == '__main__':
+    main()
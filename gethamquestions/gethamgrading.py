@@ -0,0 +1,289 @@
+#-*- coding: utf-8 -*-
+"""
+Vectorized bulk grading of exam answer sheets
+
+Questions are addressed by their dense ordinal in an ElementPool
+(ElementPool.get_ordinals()), the correct answers are held as a numpy uint8
+array (A=0 ... D=3), and whole batches of answer sheets are graded with array
+operations: no Python loop per answer.
+
+Classes:
+
+    GradingEngine
+
+Functions:
+    letters_to_codes
+    main
+
+Usage
+    python gethamgrading.py element2.json --sheets 1000000
+    (grades random sheets and compares with a pure Python loop)
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from gethamquestionclasses import msg
+from gethamelementclasses import ElementPool
+
+PASS_THRESHOLD = 0.74
+UNANSWERED = 255
+_LETTER_CODES = np.full(256, UNANSWERED, dtype=np.uint8)
+_LETTER_CODES[[ord('A'), ord('B'), ord('C'), ord('D')]] = [0, 1, 2, 3]
+_LETTER_CODES[[ord('a'), ord('b'), ord('c'), ord('d')]] = [0, 1, 2, 3]
+
+def letters_to_codes(letters):
+    """
+    Returns a uint8 array of answer codes (A=0 ... D=3, anything else 255)
+
+    Parameters
+    ----------
+    letters : str, bytes, list of str or numpy array
+        'ABDC...', b'ABDC...', ['A', 'B', ...] or an array of dtype S1/U1/uint8.
+        A uint8 array is taken to be codes already.
+    """
+    if isinstance(letters, np.ndarray):
+        if letters.dtype == np.uint8:
+            return letters
+        if letters.dtype.kind == 'U':
+            letters = letters.astype('S1')
+        return _LETTER_CODES[letters.view(np.uint8).reshape(letters.shape)]
+    if isinstance(letters, str):
+        letters = letters.encode('ascii', 'replace')
+    elif not isinstance(letters, (bytes, bytearray)):
+        letters = ''.join(letter[:1] or ' ' for letter in letters).encode('ascii', 'replace')
+    return _LETTER_CODES[np.frombuffer(letters, dtype=np.uint8)]
+
+class GradeResult:
+    """
+    A class to represent the result of grading a batch of sheets
+
+    ...
+
+    Attributes
+    ----------
+    scores : numpy int array
+        Number of correct answers per sheet
+    totals : numpy int array
+        Number of questions per sheet
+    percent : numpy float array
+        scores / totals
+    passed : numpy bool array
+        percent >= the pass threshold
+    attempts : numpy int array
+        Per question ordinal, the number of times it was asked
+    correct_counts : numpy int array
+        Per question ordinal, the number of correct answers
+    skipped : int
+        Answers to unknown qids (ordinal -1), not graded
+
+    """
+    #pylint: disable-msg=too-many-arguments
+    def __init__(self, scores, totals, attempts, correct_counts, threshold, skipped=0):
+        self.scores = scores
+        self.totals = totals
+        self.percent = scores / np.maximum(totals, 1)
+        self.passed = (totals > 0) & (scores >= np.ceil(threshold * totals - 1e-9))
+        self.attempts = attempts
+        self.correct_counts = correct_counts
+        self.skipped = skipped
+
+    def __str__(self):
+        return (f'GradeResult(sheets={len(self.scores)}, passed={int(self.passed.sum())}, '
+                f'mean={float(self.percent.mean()) if len(self.percent) else 0:.3f}, '
+                f'skipped={self.skipped})')
+
+class GradingEngine:
+    """
+    A class to grade answer sheets against an element pool
+
+    ...
+
+    Attributes
+    ----------
+    qids : list
+        qid of each ordinal
+    ordinals : dict
+        qid -> ordinal
+    correct : numpy uint8 array
+        The correct answer code of each ordinal
+    threshold : float
+        Fraction of correct answers needed to pass, 0.74 (26 of 35, 37 of 50)
+
+    """
+    def __init__(self, element_pool, threshold=PASS_THRESHOLD):
+        """
+        Parameters
+        ----------
+        element_pool : ElementPool or element JSON object
+        threshold : float
+        """
+        if not isinstance(element_pool, ElementPool):
+            element_pool = ElementPool(element_pool)
+        self.qids = element_pool.get_qids()
+        self.ordinals = element_pool.get_ordinals()
+        self.correct = letters_to_codes([q['correct'] for q in element_pool.iter_questions()])
+        self.threshold = threshold
+
+    def to_ordinals(self, qids):
+        """
+        Returns an int32 array of ordinals for an iterable of qids (-1 if unknown)
+
+        """
+        ordinals = self.ordinals
+        return np.fromiter((ordinals.get(qid, -1) for qid in qids), dtype=np.int32)
+
+    def grade_rows(self, sheet_ids, qid_ordinals, choices, num_sheets=None):
+        """
+        Grade answers given one row per answer (long format)
+
+        Parameters
+        ----------
+        sheet_ids : int array
+            The sheet 0...num_sheets-1 each row belongs to
+        qid_ordinals : int array
+            The question ordinal of each row
+        choices : uint8 codes or letters, see letters_to_codes
+            The answer chosen in each row
+        num_sheets : int
+            Number of sheets, default max(sheet_ids) + 1
+
+        Returns
+        -------
+        GradeResult, rows of unknown qids are skipped
+        """
+        # intp: sheet_ids * 2 must not overflow a small sheet id dtype
+        sheet_ids = np.asarray(sheet_ids).astype(np.intp)
+        qid_ordinals = np.asarray(qid_ordinals)
+        choices = letters_to_codes(choices)
+        if num_sheets is None:
+            num_sheets = int(sheet_ids.max()) + 1 if sheet_ids.size else 0
+        known = self._known(qid_ordinals)
+        skipped = int(known.size - np.count_nonzero(known))
+        if skipped:
+            sheet_ids, qid_ordinals, choices = sheet_ids[known], qid_ordinals[known], \
+                choices[known]
+        is_correct = self.correct[qid_ordinals] == choices
+        # one bincount gives scores and totals: bin 2*sheet+1 counts correct answers
+        by_sheet = np.bincount(sheet_ids * 2 + is_correct, minlength=2 * num_sheets)
+        by_sheet = by_sheet.reshape(-1, 2)
+        attempts, correct_counts = self._count_questions(qid_ordinals, is_correct)
+        return GradeResult(by_sheet[:, 1], by_sheet.sum(axis=1), attempts, correct_counts,
+                           self.threshold, skipped)
+
+    def grade_matrix(self, qid_ordinals, choices):
+        """
+        Grade sheets of equal length given as 2-D arrays (one row per sheet)
+
+        Parameters
+        ----------
+        qid_ordinals : int array, shape (sheets, questions per sheet)
+            uint16 is enough for any pool and keeps a million sheets at 70 MB
+        choices : uint8 codes or S1 letters, same shape
+
+        Returns
+        -------
+        GradeResult, answers to unknown qids are skipped
+        """
+        qid_ordinals = np.asarray(qid_ordinals)
+        choices = letters_to_codes(np.asarray(choices))
+        known = self._known(qid_ordinals)
+        skipped = int(known.size - np.count_nonzero(known))
+        if skipped:
+            is_correct = (self.correct[np.where(known, qid_ordinals, 0)] == choices) & known
+            attempts, correct_counts = self._count_questions(qid_ordinals[known],
+                                                             is_correct[known])
+            totals = np.count_nonzero(known, axis=1)
+        else:
+            is_correct = self.correct[qid_ordinals] == choices
+            attempts, correct_counts = self._count_questions(qid_ordinals.ravel(),
+                                                             is_correct.ravel())
+            totals = np.full(qid_ordinals.shape[0], qid_ordinals.shape[1])
+        return GradeResult(np.count_nonzero(is_correct, axis=1), totals,
+                           attempts, correct_counts, self.threshold, skipped)
+
+    def _known(self, qid_ordinals):
+        """
+        Returns the bool mask of the ordinals of the pool (to_ordinals gives
+        -1 for an unknown qid)
+
+        """
+        return (qid_ordinals >= 0) & (qid_ordinals < len(self.correct))
+
+    def _count_questions(self, qid_ordinals, is_correct):
+        """
+        Returns (attempts, correct counts) per ordinal with a single bincount
+
+        """
+        num_q = len(self.correct)
+        counts = np.bincount(qid_ordinals.astype(np.intp) * 2 + is_correct,
+                             minlength=2 * num_q).reshape(-1, 2)
+        return counts.sum(axis=1), counts[:, 1]
+
+    def question_report(self, result, min_attempts=1):
+        """
+        Returns [(qid, attempts, correct, fraction correct)] hardest first
+
+        """
+        asked = np.nonzero(result.attempts >= min_attempts)[0]
+        fraction = result.correct_counts[asked] / result.attempts[asked]
+        order = np.argsort(fraction, kind='stable')
+        return [(self.qids[asked[i]], int(result.attempts[asked[i]]),
+                 int(result.correct_counts[asked[i]]), float(fraction[i])) for i in order]
+
+def _grade_python(correct_letters, sheets):
+    """
+    The pure Python loop the engine replaces, used by the benchmark
+
+    """
+    scores = []
+    for sheet in sheets:
+        score = 0
+        for qid, choice in sheet:
+            if correct_letters[qid] == choice:
+                score += 1
+        scores.append(score)
+    return scores
+
+def main():
+    """
+    Benchmark the engine on random sheets if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Benchmark vectorized grading')
+    parser.add_argument('element_FN', help='element JSON file, i.e. element2.json')
+    parser.add_argument('--sheets', type=int, default=100000)
+    parser.add_argument('--per-sheet', type=int, default=35)
+    args = parser.parse_args()
+    with open(args.element_FN, 'r', encoding='utf-8-sig') as file:
+        engine = GradingEngine(json.load(file))
+    rng = np.random.default_rng(1)
+    ordinals = rng.integers(0, len(engine.qids), (args.sheets, args.per_sheet),
+                            dtype=np.uint16)
+    # answer correctly 75% of the time
+    choices = np.where(rng.random(ordinals.shape) < 0.75, engine.correct[ordinals],
+                       rng.integers(0, 4, ordinals.shape)).astype(np.uint8)
+    start = time.perf_counter()
+    result = engine.grade_matrix(ordinals, choices)
+    vector_time = time.perf_counter() - start
+    msg('Info', 'I651', f'{result} in {vector_time * 1000:.1f}ms')
+
+    sample = min(args.sheets, 20000)
+    letters = 'ABCD'
+    correct_letters = {qid: letters[code] for qid, code in zip(engine.qids, engine.correct)}
+    sheets = [[(engine.qids[o], letters[c]) for o, c in zip(row_o, row_c)]
+              for row_o, row_c in zip(ordinals[:sample].tolist(), choices[:sample].tolist())]
+    start = time.perf_counter()
+    scores = _grade_python(correct_letters, sheets)
+    loop_time = (time.perf_counter() - start) * args.sheets / sample
+    if scores != result.scores[:sample].tolist():
+        msg('Error', 'E651', 'python and vectorized scores differ')
+    msg('Info', 'I652', f'pure Python loop (extrapolated from {sample} sheets): '
+        f'{loop_time * 1000:.1f}ms, speedup {loop_time / vector_time:.0f}x')
+
+if __name__ == '__main__':
+    main()
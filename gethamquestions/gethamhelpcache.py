@@ -0,0 +1,179 @@
+#-*- coding: utf-8 -*-
+"""
+Content addressed cache of AI help results (topics, explanation, memory aid)
+
+Help is stored under a hash of the normalized question text, answers and correct
+answer, not under the qid, so questions carried over from an earlier pool year
+(with or without a new qid) find their help again.  The cache is bounded, least
+recently used entries are evicted first, and hits/misses are counted.
+
+Classes:
+
+    HelpCache
+
+Functions:
+    normalize_text
+    question_key
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from gethamquestionclasses import msg
+
+CACHE_VERSION = 1
+HELP_FIELDS = ('topics', 'explanation', 'memory_aid')
+REGEX_ANSWER_PREFIX = re.compile(r'^[A-D]\.\s*')
+REGEX_SPACE = re.compile(r'\s+')
+
+def normalize_text(text):
+    """
+    Returns text lower cased, with ASCII quotes/dashes and single blanks
+
+    """
+    text = text.replace(u"\u2013", '-').replace(u"\u2019", "'").replace(u"\u2018", "'")
+    text = text.replace(u"\u201c", '"').replace(u"\u201d", '"')
+    return REGEX_SPACE.sub(' ', text).strip().lower()
+
+def question_key(text, answers, correct):
+    """
+    Returns the cache key (sha256 hex) of a question
+
+    Parameters
+    ----------
+    text : str
+        The question text
+    answers : list
+        The four answers, with or without the "A. " prefix
+    correct : str
+        The correct answer A-D, part of the key since the explanation depends on it
+    """
+    parts = [normalize_text(text)]
+    parts.extend(normalize_text(REGEX_ANSWER_PREFIX.sub('', answer)) for answer in answers)
+    parts.append(correct.upper())
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+class HelpCache:
+    """
+    A class to represent a bounded LRU cache of help results
+
+    ...
+
+    Attributes
+    ----------
+    cache_FN : str
+        The JSON file the cache is loaded from and saved to, or ''
+    max_entries : int
+        Maximum number of entries, the least recently used entry is evicted
+    entries : OrderedDict
+        key -> {'topics', 'explanation', 'memory_aid'}, oldest first
+    hits, misses, evictions : int
+        Statistics since the cache was created
+
+    """
+    def __init__(self, cache_FN='', max_entries=20000):
+        self.cache_FN = cache_FN
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if cache_FN and Path(cache_FN).is_file():
+            self.load(cache_FN)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key):
+        """
+        Returns the help for key, or None.  Counts a hit or a miss
+
+        """
+        help_item = self.entries.get(key)
+        if help_item is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return help_item
+
+    def put(self, key, help_item):
+        """
+        Stores the help fields of help_item under key, evicting if the cache is full
+
+        """
+        self.entries[key] = {field: help_item.get(field, '') for field in HELP_FIELDS}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_question(self, question):
+        """
+        Returns the help for a question dict of an element JSON file, or None
+
+        """
+        return self.get(question_key(question['text'], question['answers'],
+                                     question['correct']))
+
+    def put_question(self, question, help_item):
+        """
+        Stores help for a question dict of an element JSON file
+
+        """
+        self.put(question_key(question['text'], question['answers'], question['correct']),
+                 help_item)
+
+    def stats(self):
+        """
+        Returns a dict of the cache statistics
+
+        """
+        lookups = self.hits + self.misses
+        return {'entries': len(self.entries), 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def print_summary(self):
+        """
+        Prints the cache statistics
+
+        """
+        stats = self.stats()
+        msg('Info', 'I621', f'help cache: entries={stats["entries"]}/{stats["max_entries"]} '
+            f'hits={stats["hits"]} misses={stats["misses"]} '
+            f'evictions={stats["evictions"]} hit rate={stats["hit_rate"]:.1%}')
+
+    def load(self, cache_FN):
+        """
+        Load entries from a cache file, keeping their LRU order
+
+        """
+        with open(cache_FN, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('version') != CACHE_VERSION:
+            msg('Warning', 'W621', f'ignoring help cache version {data.get("version")}')
+            return
+        for key, help_item in data['entries']:
+            self.put(key, help_item)
+
+    def save(self, cache_FN=''):
+        """
+        Save the entries (oldest first) to the cache file, replacing it atomically
+
+        """
+        cache_FN = cache_FN or self.cache_FN
+        tmp = cache_FN + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as file:
+            json.dump({'version': CACHE_VERSION, 'entries': list(self.entries.items())},
+                      file)
+        os.replace(tmp, cache_FN)
@@ -0,0 +1,219 @@
+#-*- coding: utf-8 -*-
+"""
+Streaming loader for ElementHelp history files (i.e. aianswers.history.json)
+
+A history file is an object keyed by qid; each entry holds the "current" help
+plus every earlier revision.  Only "current" is read at runtime, so the loader
+memory maps the file, skips over all other members with a byte scanner, and
+json-decodes nothing but the "current" records, keeping only the help fields
+and their *_valid/*_edited flags.
+
+Functions:
+    iter_help_history
+    runtime_help
+    compact_help_history
+    profile_load
+    main
+
+Usage
+    python gethamhelploader.py aianswers.history.json
+    python gethamhelploader.py aianswers.history.json --compact aianswers.runtime.json
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import time
+import tracemalloc
+from gethamquestionclasses import msg
+from gethamhelpcache import HELP_FIELDS
+from gethamcompress import sniff_compression, read_bytes, open_text
+
+CURRENT_KEYS = HELP_FIELDS + tuple(f'{field}_valid' for field in HELP_FIELDS) \
+               + tuple(f'{field}_edited' for field in HELP_FIELDS)
+BOM = b'\xef\xbb\xbf'
+
+_WS = re.compile(rb'[ \t\n\r]*')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_SCALAR = re.compile(rb'[^,}\]\s]+')
+# runs of anything but brackets, strings consumed whole, up to the next bracket
+_SKIP = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*', re.S)
+
+def _skip_ws(buf, pos):
+    return _WS.match(buf, pos).end()
+
+def _expect(buf, pos, char):
+    pos = _skip_ws(buf, pos)
+    if buf[pos:pos + 1] != char:
+        raise ValueError(f'expected {char!r} at byte {pos}')
+    return pos + 1
+
+def _string_end(buf, pos):
+    match = _STRING.match(buf, pos)
+    if not match:
+        raise ValueError(f'bad string at byte {pos}')
+    return match.end()
+
+def _value_end(buf, pos):
+    """
+    Returns the byte offset just past the JSON value starting at pos
+
+    """
+    char = buf[pos:pos + 1]
+    if char == b'"':
+        return _string_end(buf, pos)
+    if char in (b'{', b'['):
+        depth = 0
+        while True:
+            pos = _SKIP.match(buf, pos).end()
+            char = buf[pos:pos + 1]
+            if char in (b'{', b'['):
+                depth += 1
+            elif char in (b'}', b']'):
+                depth -= 1
+            else:
+                raise ValueError(f'unterminated value at byte {pos}')
+            pos += 1
+            if depth == 0:
+                return pos
+    match = _SCALAR.match(buf, pos)
+    if not match:
+        raise ValueError(f'bad value at byte {pos}')
+    return match.end()
+
+def _iter_members(buf, pos):
+    """
+    Yields (key, value start, value end) for the object starting at pos,
+    then returns the offset past the closing brace as StopIteration.value
+
+    """
+    pos = _expect(buf, pos, b'{')
+    pos = _skip_ws(buf, pos)
+    if buf[pos:pos + 1] == b'}':
+        return pos + 1
+    while True:
+        pos = _skip_ws(buf, pos)
+        end = _string_end(buf, pos)
+        key = json.loads(buf[pos:end].decode('utf-8'))
+        pos = _skip_ws(buf, _expect(buf, end, b':'))
+        end = _value_end(buf, pos)
+        yield key, pos, end
+        pos = _skip_ws(buf, end)
+        char = buf[pos:pos + 1]
+        if char == b'}':
+            return pos + 1
+        if char != b',':
+            raise ValueError(f'expected "," or "}}" at byte {pos}')
+        pos += 1
+
+def iter_help_history(help_FN):
+    """
+    Yields (qid, current) for every entry of a help history file
+
+    current is the "current" record reduced to the help fields and their
+    *_valid/*_edited flags.  Earlier revisions are skipped without decoding.
+    A gzip/lzma compressed file is decompressed into memory instead of mapped.
+    """
+    if os.path.getsize(help_FN) == 0:
+        return
+    if sniff_compression(help_FN):
+        yield from _iter_current(read_bytes(help_FN))
+        return
+    with open(help_FN, 'rb') as file, \
+         mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        yield from _iter_current(buf)
+
+def _iter_current(buf):
+    start = len(BOM) if buf[:len(BOM)] == BOM else 0
+    for qid, pos, _ in _iter_members(buf, start):
+        current = {}
+        for key, begin, end in _iter_members(buf, pos):
+            if key == 'current':
+                record = json.loads(buf[begin:end].decode('utf-8'))
+                current = {k: record[k] for k in CURRENT_KEYS if k in record}
+        yield qid, current
+
+def runtime_help(cur):
+    """
+    Returns the ElementHelp runtime record for a "current" help record
+
+    """
+    help_item = {}
+    for field in HELP_FIELDS:
+        help_item[field] = cur.get(field) if cur.get(f'{field}_valid') else ''
+    for field in HELP_FIELDS:
+        help_item[f'{field}_valid'] = cur.get(f'{field}_valid')
+    for field in HELP_FIELDS:
+        help_item[f'{field}_edited'] = cur.get(f'{field}_edited') \
+            if cur.get(f'{field}_edited') else ''
+    return help_item
+
+def compact_help_history(help_FN, out_FN):
+    """
+    Writes a runtime only copy of a help history file, {qid: {'current': {...}}},
+    and returns the number of entries.  The copy loads with ElementHelp as before.
+
+    """
+    count = 0
+    tmp = out_FN + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        file.write('{')
+        for qid, current in iter_help_history(help_FN):
+            file.write(',\n' if count else '\n')
+            file.write(f'{json.dumps(qid)}: {json.dumps({"current": current})}')
+            count += 1
+        file.write('\n}\n')
+    os.replace(tmp, out_FN)
+    return count
+
+def _load_full(help_FN):
+    with open_text(help_FN) as file:
+        el_help = json.load(file)
+    return {qid: runtime_help(entry['current']) for qid, entry in el_help.items()}
+
+def _load_streaming(help_FN):
+    return {qid: runtime_help(current) for qid, current in iter_help_history(help_FN)}
+
+def profile_load(help_FN, loader='streaming'):
+    """
+    Load a help file and return (entries, seconds, peak bytes, retained bytes)
+
+    loader is 'full' (json.load of the whole file) or 'streaming'
+    """
+    load = _load_full if loader == 'full' else _load_streaming
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load(help_FN)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result), elapsed, peak, retained
+
+def main():
+    """
+    Report load time and memory of a help history file, optionally compacting it
+
+    """
+    parser = argparse.ArgumentParser(description='Load or compact a help history file')
+    parser.add_argument('help_FN', help='help history file, i.e. aianswers.history.json')
+    parser.add_argument('--compact', default='', help='write a runtime only file')
+    args = parser.parse_args()
+    files = [args.help_FN]
+    if args.compact:
+        count = compact_help_history(args.help_FN, args.compact)
+        msg('Info', 'I631', f'{count} entries written to {args.compact}')
+        files.append(args.compact)
+    for help_FN in files:
+        size = os.path.getsize(help_FN)
+        for loader in ('full', 'streaming'):
+            entries, elapsed, peak, retained = profile_load(help_FN, loader)
+            msg('Info', 'I632', f'{help_FN} ({size:,} bytes) {loader:9}: entries={entries} '
+                f'time={elapsed * 1000:.1f}ms peak={peak:,} retained={retained:,}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+#-*- coding: utf-8 -*-
+"""
+Memory profiling of the pipeline stages with tracemalloc
+
+Each stage runs on its own under tracemalloc and reports
+
+    peak     - the highest traced memory while the stage ran
+    retained - traced memory still held by the stage result afterwards
+    top      - the source lines holding most of the retained memory
+
+Stages: get_file, get_docx_text, get_element_pool (parse and build the Element
+objects, write the JSON), json.dumps as in State.close_element, ElementPool
+loading and ElementHelp loading.  They run on the real pools in output/ and on
+synthetic pools (text, docx and help history) scaled to any size.  Budgets
+give the maximum peak bytes per stage; the run fails (exit code 1) when one is
+exceeded or a stage raises.
+
+Functions:
+    synthetic_pool_lines
+    write_synthetic_docx
+    write_synthetic_help
+    profile_stage
+    run_suite
+    main
+
+Usage
+    python gethammemprofile.py
+    python gethammemprofile.py --scale 10 --budget get_element_pool=50000000
+    python gethammemprofile.py --budgets budgets.json --top 5
+    (budgets.json: {"get_element_pool": 50000000, "ElementHelp@synthetic-10": 20000000})
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+from gethamquestionclasses import msg
+from gethamexternalfunctions import get_docx_text
+from gethamelementclasses import ElementPool, ElementHelp
+import gethamquestions
+
+REPO_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'output')
+GROUP_IDS = 'ABCDEFGH'
+
+def synthetic_pool_lines(scale=1):
+    """
+    Returns the lines of a synthetic Element 4 pool text file.  scale=1 is about
+    the size of the real pool (10 subelements, 620 questions), the largest
+    scale the qid format allows is 13 (99 questions per group)
+
+    """
+    per_group = min(12 * scale, 99)
+    groups = min(5 + scale, len(GROUP_IDS))
+    lines = ['2020-2024 Extra Class', 'FCC Element 4 Question Pool',
+             'Effective July 1, 2020', '']
+    for sub in range(10):
+        lines.append(f'SUBELEMENT E{sub} - SYNTHETIC TOPIC {sub} '
+                     f'[{groups} Exam Questions - {groups} Groups]')
+        lines.append('')
+        for group in GROUP_IDS[:groups]:
+            lines.append(f'E{sub}{group} Synthetic topic one; topic two: sub a, sub b; '
+                         f'topic three for group {group}')
+            lines.append('')
+            for num in range(1, per_group + 1):
+                qid = f'E{sub}{group}{num:02d}'
+                lines.append(f'{qid} ({"ABCD"[num % 4]}) [97.{num}(a)]')
+                lines.append(f'What is the synthetic question number {qid} about, in a '
+                             'sentence of typical length for the question pool?')
+                for letter in 'ABCD':
+                    lines.append(f'{letter}. Answer {letter} of {qid} with some typical words')
+                lines.append('~~')
+                lines.append('')
+    lines.append('~~~~End of question pool text~~~~')
+    return lines
+
+def write_synthetic_docx(lines, docx_FN):
+    """
+    Writes lines as the paragraphs of a minimal .docx file
+
+    """
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    paragraphs = ''.join(f'<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>' if line
+                         else '<w:p/>' for line in lines)
+    with zipfile.ZipFile(docx_FN, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml',
+                      '<?xml version="1.0" encoding="UTF-8"?><Types xmlns="http://schemas.'
+                      'openxmlformats.org/package/2006/content-types"/>')
+        # libmagic only reports "Microsoft Word 2007+" with a _rels/.rels member
+        docx.writestr('_rels/.rels',
+                      '<?xml version="1.0" encoding="UTF-8"?><Relationships xmlns="http://'
+                      'schemas.openxmlformats.org/package/2006/relationships"/>')
+        docx.writestr('word/document.xml',
+                      f'<?xml version="1.0" encoding="UTF-8"?><w:document xmlns:w="{namespace}">'
+                      f'<w:body>{paragraphs}</w:body></w:document>')
+
+def write_synthetic_help(qids, help_FN, revisions=3):
+    """
+    Writes a help history file with revisions earlier versions per qid
+
+    """
+    history = {}
+    for qid in qids:
+        entries = []
+        for rev in range(revisions + 1):
+            entries.append({
+                'topics': f'Topic of {qid}; revision {rev}', 'topics_valid': True,
+                'explanation': f'Explanation of {qid}, revision {rev}. ' * 8,
+                'explanation_valid': True,
+                'memory_aid': f'Memory aid of {qid}, revision {rev}. ' * 3,
+                'memory_aid_valid': True})
+        history[qid] = {'current': entries[-1], 'history': entries[:-1]}
+    with open(help_FN, 'w', encoding='utf-8') as file:
+        json.dump(history, file, indent=2)
+
+def profile_stage(name, func, top=3):
+    """
+    Runs func() under tracemalloc and returns a result dict:
+    name, peak, retained, seconds, top [(site, bytes)], error ('' if it ran)
+
+    """
+    gc.collect()
+    tracemalloc.start(1)
+    before = tracemalloc.take_snapshot()
+    base, _ = tracemalloc.get_traced_memory()
+    if hasattr(tracemalloc, 'reset_peak'):
+        # Python 3.9+, on 3.8 the peak includes the snapshot taken above
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+         contextlib.redirect_stdout(devnull):
+        try:
+            result = func()
+            error = ''
+        except Exception as exc: # pylint: disable=broad-except
+            result = None
+            error = f'{type(exc).__name__}: {exc}'
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    sites = []
+    for stat in after.compare_to(before, 'lineno')[:top]:
+        frame = stat.traceback[0]
+        sites.append((f'{os.path.basename(frame.filename)}:{frame.lineno}', stat.size_diff))
+    del result
+    return {'name': name, 'peak': peak - base, 'retained': current - base,
+            'seconds': seconds, 'top': sites, 'error': error}
+
+def _stages(label, txt_FN, docx_FN, json_FN, help_FN):
+    """
+    Returns [(stage@label, func)] for one data set, files may be ''
+
+    """
+    stages = []
+    if txt_FN:
+        stages.append(('get_file', lambda: gethamquestions.get_file(txt_FN)))
+    if docx_FN:
+        stages.append(('get_docx_text', lambda: get_docx_text(docx_FN)))
+    for suffix, source_FN in (('', txt_FN), ('(docx)', docx_FN)):
+        if not source_FN:
+            continue
+        # json.dumps runs on the element the get_element_pool stage built
+        holder = {}
+
+        def element_pool(source_FN=source_FN, holder=holder):
+            holder['element'] = gethamquestions.get_element_pool(source_FN)
+            return holder['element']
+
+        def close_element_dumps(holder=holder):
+            return json.dumps(holder.pop('element', None), default=vars, indent=2)
+        stages.append(('get_element_pool' + suffix, element_pool))
+        stages.append(('json.dumps' + suffix, close_element_dumps))
+    if json_FN:
+        def element_pool_load():
+            with open(json_FN, 'r', encoding='utf-8-sig') as file:
+                pool = ElementPool(json.load(file))
+            pool.get_ordinals()
+            return pool
+        stages.append(('ElementPool', element_pool_load))
+    if help_FN:
+        stages.append(('ElementHelp', lambda: ElementHelp(help_FN)))
+    return [(f'{name}@{label}', func) for name, func in stages]
+
+def run_suite(scales=(1, 10), top=3, real=True):
+    """
+    Profiles every stage on the real pools in output/ and on synthetic pools,
+    returns the list of result dicts
+
+    """
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        # get_element_pool writes ./output, keep that out of the repository
+        os.chdir(work_dir)
+        try:
+            data_sets = []
+            if real:
+                for elem in ('3', '4'):
+                    txt_FN = os.path.join(REPO_OUTPUT, f'Element{elem}.txt')
+                    json_FN = os.path.join(REPO_OUTPUT, f'Element{elem}.json')
+                    data_sets.append((f'Element{elem}',
+                                      txt_FN if os.path.isfile(txt_FN) else '', '',
+                                      json_FN if os.path.isfile(json_FN) else '', ''))
+            for scale in scales:
+                lines = synthetic_pool_lines(scale)
+                txt_FN = os.path.join(work_dir, f'synthetic{scale}.txt')
+                with open(txt_FN, 'w', encoding='utf-8') as file:
+                    file.write('\n'.join(lines) + '\n')
+                docx_FN = os.path.join(work_dir, f'synthetic{scale}.docx')
+                write_synthetic_docx(lines, docx_FN)
+                with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+                     contextlib.redirect_stdout(devnull):
+                    element = gethamquestions.get_element_pool(txt_FN)
+                json_FN = os.path.join(work_dir, f'synthetic{scale}.json')
+                os.replace(os.path.join('output', f'element{element.elem}.json'), json_FN)
+                qids = [q.qid for se in element.subelements for g in se.groups
+                        for q in g.questions]
+                help_FN = os.path.join(work_dir, f'synthetic{scale}.history.json')
+                write_synthetic_help(qids, help_FN)
+                data_sets.append((f'synthetic-{scale}', txt_FN, docx_FN, json_FN, help_FN))
+            for data_set in data_sets:
+                for name, func in _stages(*data_set):
+                    results.append(profile_stage(name, func, top))
+        finally:
+            os.chdir(cwd)
+    return results
+
+def check_budgets(results, budgets):
+    """
+    Returns the results over budget.  A budget key is a stage name (all data
+    sets) or stage@dataset
+
+    """
+    over = []
+    for result in results:
+        stage = result['name'].split('@')[0]
+        budget = budgets.get(result['name'], budgets.get(stage))
+        if budget is not None and result['peak'] > budget:
+            over.append((result, budget))
+    return over
+
+def main():
+    """
+    Run the memory profiling suite if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='tracemalloc profile of pipeline stages')
+    parser.add_argument('--scale', type=int, action='append',
+                        help='synthetic pool scale, repeatable (default 1 and 10)')
+    parser.add_argument('--no-real', action='store_true', help='skip the pools in output/')
+    parser.add_argument('--top', type=int, default=3, help='allocation sites per stage')
+    parser.add_argument('--budgets', default='', help='JSON file of peak byte budgets')
+    parser.add_argument('--budget', action='append', default=[],
+                        help='stage=bytes or stage@dataset=bytes, repeatable')
+    args = parser.parse_args()
+    budgets = {}
+    if args.budgets:
+        with open(args.budgets, 'r', encoding='utf-8') as file:
+            budgets.update(json.load(file))
+    for item in args.budget:
+        key, _, value = item.partition('=')
+        budgets[key] = int(float(value))
+
+    results = run_suite(tuple(args.scale or (1, 10)), args.top, not args.no_real)
+    for result in results:
+        msg('Info', 'I691', f'{result["name"]:36} peak={result["peak"]:>13,} '
+            f'retained={result["retained"]:>13,} time={result["seconds"] * 1000:8.1f}ms')
+        if result['error']:
+            msg('Error', 'E692', f'    {result["name"]} failed: {result["error"]}')
+        for site, size in result['top']:
+            msg('Info', 'I692', f'    {site:34} {size:>13,}')
+    over = check_budgets(results, budgets)
+    for result, budget in over:
+        msg('Error', 'E691', f'{result["name"]} peak {result["peak"]:,} over budget {budget:,}')
+    # a failed stage stopped early, its peak says nothing about the budget
+    failed = [result for result in results if result['error']]
+    sys.exit(1 if over or failed else 0)
+
+if __name__ == '__main__':
+    main()
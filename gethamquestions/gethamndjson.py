@@ -0,0 +1,187 @@
+#-*- coding: utf-8 -*-
+"""
+NDJSON export of flat question records for data pipelines
+
+One JSON object per line, in pool order:
+
+    {"qid": "T1A01", "element": "2", "subelement": "T1", "group": "A",
+     "text": "...", "answers": ["A. ...", "B. ...", "C. ...", "D. ..."],
+     "correct": "C", "figure": "", "fcc": "[97.1]", "topics": ["..."]}
+
+From a pool source (.docx/.txt) the records are written by the parser as each
+question closes (State.on_question), so a consumer reading the pipe starts
+before the pool is parsed; the parser messages go to stderr.  An element JSON
+file (either schema, compressed or not) can be exported as well.  topics are
+the question topics of the element JSON, or the group topics while parsing.
+
+Classes:
+
+    NdjsonWriter
+
+Functions:
+    question_record
+    export_pool
+    export_element
+    iter_ndjson
+    main
+
+Usage
+    python gethamndjson.py element2.docx - | indexer
+    python gethamndjson.py output/element2.json element2.ndjson.gz
+    python gethamndjson.py --read element2.ndjson.gz
+
+Change Log
+    2026-10-19 v01 - initial version
+    2026-10-19 v02 - exit 1 without a traceback when the consumer closes the pipe
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+from gethamquestionclasses import msg
+from gethamcompress import open_text
+from gethamschema import read_element
+
+def question_record(question, elem, group_topics=()):
+    """
+    Returns the flat record of a Question object or question dict
+
+    """
+    if not isinstance(question, dict):
+        question = vars(question)
+    return {'qid': question['qid'], 'element': elem,
+            'subelement': question['subelement'], 'group': question['group'],
+            'text': question['text'], 'answers': list(question['answers']),
+            'correct': question['correct'], 'figure': question['figure'],
+            'fcc': question['fcc'], 'topics': list(question.get('topics', group_topics))}
+
+class NdjsonWriter:
+    """
+    A class to write question records as NDJSON, usable as State.on_question
+
+    ...
+
+    Attributes
+    ----------
+    out_FN : str
+        The file written, '-' for stdout, .gz/.xz compressed
+    count : int
+        Records written
+
+    """
+    def __init__(self, out_FN='-'):
+        self.out_FN = out_FN
+        self.count = 0
+        # kept: export_pool redirects sys.stdout to stderr while parsing
+        self.to_stdout = out_FN == '-'
+        self.file = sys.stdout if self.to_stdout else open_text(out_FN, 'w')
+
+    def write(self, record):
+        """
+        Writes one record as a line
+
+        """
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def __call__(self, question, state):
+        self.write(question_record(question, state.cur_element.elem,
+                                   state.cur_group.topics))
+        if self.to_stdout:
+            # let the consumer start on each record
+            self.file.flush()
+
+    def close(self):
+        """
+        Closes the file (stdout is flushed only)
+
+        """
+        if self.to_stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+def export_pool(source_FN, out_FN='-'):
+    """
+    Parses a pool source writing each question as it closes, returns the count.
+    get_element_pool also writes ./output/element{N}.json as usual
+
+    """
+    # imported here: gethamquestions is the parser, not needed for reading
+    from gethamquestions import get_element_pool
+    writer = NdjsonWriter(out_FN)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            get_element_pool(source_FN, on_question=writer)
+    finally:
+        writer.close()
+    return writer.count
+
+def export_element(element_FN, out_FN='-'):
+    """
+    Writes the questions of an element JSON file, returns the count
+
+    """
+    element = read_element(element_FN)
+    writer = NdjsonWriter(out_FN)
+    try:
+        for subelement in element['subelements']:
+            for group in subelement['groups']:
+                for question in group['questions']:
+                    writer.write(question_record(question, element['elem'],
+                                                 group.get('topics', ())))
+    finally:
+        writer.close()
+    return writer.count
+
+def iter_ndjson(ndjson_FN='-'):
+    """
+    Yields the records of an NDJSON file ('-' for stdin), one line at a time
+
+    """
+    if ndjson_FN == '-':
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+    with open_text(ndjson_FN) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    """
+    Export questions as NDJSON or read an export if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='NDJSON export of question records')
+    parser.add_argument('in_FN', help="pool .docx/.txt, element JSON, or NDJSON with --read")
+    parser.add_argument('out_FN', nargs='?', default='-', help="NDJSON file, '-' for stdout")
+    parser.add_argument('--read', action='store_true', help='read an export, print a summary')
+    args = parser.parse_args()
+    if args.read:
+        count = 0
+        groups = set()
+        for record in iter_ndjson(args.in_FN):
+            count += 1
+            groups.add(record['subelement'] + record['group'])
+        msg('Info', 'I721', f'{args.in_FN}: records={count} groups={len(groups)}')
+    else:
+        try:
+            if '.json' in args.in_FN:
+                count = export_element(args.in_FN, args.out_FN)
+            else:
+                count = export_pool(args.in_FN, args.out_FN)
+        except BrokenPipeError:
+            # the consumer stopped reading (i.e. | head): no traceback, and
+            # stdout to devnull so the flush at exit does not raise again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        # stdout may be the export
+        with contextlib.redirect_stdout(sys.stderr):
+            msg('Info', 'I722', f'{count} records written to {args.out_FN}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#-*- coding: utf-8 -*-
+"""
+Near-duplicate questions across pool years (MinHash/LSH), to carry over help
+
+A new pool rewords many questions lightly and numbers them anew, so help kept
+by qid (ElementHelp) is lost.  Each question (normalized text and answers) is
+a set of character 5-gram shingles; its MinHash signature is the minimum of
+NUM_PERM multiply-shift hashes over the shingles (numpy, one array operation
+per question).  The signatures are cut into BANDS bands of ROWS rows and an
+old/new pair becomes a candidate when any band is equal (LSH), so the work
+grows with the number of questions and candidates, not old x new.  Candidates
+are scored with the exact Jaccard similarity of their shingles (the lower of
+text and answers, and text only) and matched one to one, best first, above
+min_similarity.
+
+The mapping file (old -> new qid with the similarity) is applied with
+ElementHelp.migrate.  With the default 32 bands of 4 rows, pairs with a
+Jaccard similarity of 0.5 are candidates with a probability of 0.87, of 0.7
+with 0.9998.
+
+Functions:
+    shingles
+    minhash_signatures
+    lsh_candidates
+    match_pools
+    write_migrated_help
+    main
+
+Usage
+    python gethamneardup.py output/element2-2018.json output/element2.json --out map.json
+    python gethamneardup.py old.json new.json --help-in aianswers2.history.json
+        --help-out aianswers2.migrated.history.json
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from collections import defaultdict
+import numpy as np
+from gethamquestionclasses import msg
+from gethamhelpcache import normalize_text
+from gethamschema import read_element
+
+SHINGLE_CHARS = 5
+BANDS = 32
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+DEFAULT_MIN_SIMILARITY = 0.6
+_ANSWER_PREFIX = re.compile(r'^[A-D]\.\s*')
+_rng = np.random.default_rng(20261019)
+_HASH_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_HASH_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+
+def _question_string(question):
+    answers = ' | '.join(_ANSWER_PREFIX.sub('', answer) for answer in question['answers'])
+    return normalize_text(question['text'] + ' || ' + answers)
+
+def shingles(question, text_only=False):
+    """
+    Returns the set of crc32 hashes of the character 5-grams of a question dict
+    (text and answers, or the text only)
+
+    """
+    text = normalize_text(question['text']) if text_only else _question_string(question)
+    if len(text) < SHINGLE_CHARS:
+        return {zlib.crc32(text.encode('utf-8'))}
+    return {zlib.crc32(text[i:i + SHINGLE_CHARS].encode('utf-8'))
+            for i in range(len(text) - SHINGLE_CHARS + 1)}
+
+def minhash_signatures(shingle_sets):
+    """
+    Returns the uint32 (questions, NUM_PERM) MinHash signatures of shingle sets
+
+    """
+    signatures = np.empty((len(shingle_sets), NUM_PERM), dtype=np.uint32)
+    for row, shingle_set in enumerate(shingle_sets):
+        values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+        # multiply-shift hashing, uint64 arithmetic wraps modulo 2**64
+        hashed = (_HASH_A[:, None] * values[None, :] + _HASH_B[:, None]) >> np.uint64(32)
+        signatures[row] = hashed.min(axis=1)
+    return signatures
+
+def lsh_candidates(old_signatures, new_signatures):
+    """
+    Returns the set of (old row, new row) pairs sharing at least one band
+
+    """
+    candidates = set()
+    for band in range(BANDS):
+        columns = slice(band * ROWS, (band + 1) * ROWS)
+        buckets = defaultdict(list)
+        for row, key in enumerate(map(bytes, old_signatures[:, columns])):
+            buckets[key].append(row)
+        for new_row, key in enumerate(map(bytes, new_signatures[:, columns])):
+            for old_row in buckets.get(key, ()):
+                candidates.add((old_row, new_row))
+    return candidates
+
+def _questions(element):
+    return [q for se in element['subelements'] for g in se['groups'] for q in g['questions']]
+
+def match_pools(old_element, new_element, min_similarity=DEFAULT_MIN_SIMILARITY):
+    """
+    Returns (pairs, candidates): the one to one matches of the questions of two
+    element JSON objects, [{'old', 'new', 'similarity', 'same_correct'}] best
+    first, and the number of LSH candidate pairs scored
+
+    """
+    old_questions = _questions(old_element)
+    new_questions = _questions(new_element)
+    old_shingles = [shingles(q) for q in old_questions]
+    new_shingles = [shingles(q) for q in new_questions]
+    candidates = lsh_candidates(minhash_signatures(old_shingles),
+                                minhash_signatures(new_shingles))
+    scored = []
+    for old_row, new_row in candidates:
+        a, b = old_shingles[old_row], new_shingles[new_row]
+        similarity = len(a & b) / len(a | b)
+        if similarity < min_similarity:
+            continue
+        # the same answers to another question are no match
+        a = shingles(old_questions[old_row], text_only=True)
+        b = shingles(new_questions[new_row], text_only=True)
+        similarity = min(similarity, len(a & b) / len(a | b))
+        if similarity >= min_similarity:
+            scored.append((-similarity, old_row, new_row))
+    scored.sort()
+    used_old = set()
+    used_new = set()
+    pairs = []
+    for similarity, old_row, new_row in scored:
+        if old_row in used_old or new_row in used_new:
+            continue
+        used_old.add(old_row)
+        used_new.add(new_row)
+        old, new = old_questions[old_row], new_questions[new_row]
+        pairs.append({'old': old['qid'], 'new': new['qid'], 'similarity': round(-similarity, 4),
+                      'same_correct': _correct_answer(old) == _correct_answer(new)})
+    return pairs, len(candidates)
+
+def _correct_answer(question):
+    pos = 'ABCD'.find(question['correct'])
+    if 0 <= pos < len(question['answers']):
+        return normalize_text(_ANSWER_PREFIX.sub('', question['answers'][pos]))
+    return ''
+
+def write_migrated_help(element_help, out_FN):
+    """
+    Writes ElementHelp.element_help as a help history file ({qid: {'current':
+    ...}}) that ElementHelp loads, returns the number of entries
+
+    """
+    tmp = out_FN + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        json.dump({qid: {'current': helps} for qid, helps in element_help.items()}, file,
+                  indent=2)
+    os.replace(tmp, out_FN)
+    return len(element_help)
+
+def main():
+    """
+    Match the questions of two pool years, optionally migrate help, if called
+    from commandline
+
+    """
+    # imported here: matching needs no ElementHelp
+    from gethamelementclasses import ElementHelp
+    parser = argparse.ArgumentParser(description='Map old qids to new qids of reworded questions')
+    parser.add_argument('old_FN', help='element JSON of the earlier pool')
+    parser.add_argument('new_FN', help='element JSON of the new pool')
+    parser.add_argument('--out', default='', help='write the mapping JSON here')
+    parser.add_argument('--min-similarity', type=float, default=DEFAULT_MIN_SIMILARITY)
+    parser.add_argument('--help-in', default='', help='help history file keyed by the old qids')
+    parser.add_argument('--help-out', default='', help='write the migrated help history here')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    pairs, candidates = match_pools(read_element(args.old_FN), read_element(args.new_FN),
+                                    args.min_similarity)
+    elapsed = time.perf_counter() - start
+    renamed = sum(pair['old'] != pair['new'] for pair in pairs)
+    msg('Info', 'I801', f'{len(pairs)} matches ({renamed} with a new qid) from {candidates} '
+        f'candidates in {elapsed * 1000:.0f}ms')
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as file:
+            json.dump({'old': args.old_FN, 'new': args.new_FN,
+                       'min_similarity': args.min_similarity, 'pairs': pairs}, file, indent=2)
+        msg('Info', 'I802', f'mapping written to {args.out}')
+    if args.help_in:
+        element_help = ElementHelp(args.help_in)
+        migrated = element_help.migrate(pairs)
+        msg('Info', 'I803', f'help of {len(migrated)} questions migrated')
+        if args.help_out:
+            write_migrated_help(element_help.element_help, args.help_out)
+            msg('Info', 'I804', f'help written to {args.help_out}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,492 @@
+#-*- coding: utf-8 -*-
+"""
+Composable question filters over columnar pool attributes
+
+The questions of one or more ElementPools (i.e. all pool years of an element)
+are laid out once as numpy columns, one row per question in pool order:
+
+    pool        int16  ordinal of the pool (PoolColumns.pools)
+    subelement  int16  ordinal of the subelement id (PoolColumns.subelements)
+    group       int16  ordinal of the group code, T1A (PoolColumns.groups)
+    correct     uint8  A=0 ... D=3
+    has_figure  bool
+    deleted     bool   fcc or text marks it withdrawn, i.e. E6B06 (D) WITHDRAWN do not use
+
+A filter is a Predicate built from the functions below and combined with
+& | ~; it evaluates to a boolean mask with a few array operations.  Regex and
+FCC citation masks are computed once per pattern and kept.  A Query streams
+the matching questions through a Cursor, one page at a time.
+
+    query = pool.query(subelement('G5'), has_figure(), fcc('97.3'), ~deleted())
+    query = pool.query(subelement='G5', has_figure=True, text=r'impedance')
+    for page in query.cursor(page_size=20):
+        ...
+
+Classes:
+
+    PoolColumns
+    Predicate
+    Query
+    Cursor
+
+Functions:
+    subelement
+    group
+    qid
+    element
+    year
+    correct
+    has_figure
+    figure
+    deleted
+    fcc
+    text
+    main
+
+Usage
+    python gethamquery.py output/element3.json --subelement G5 --has-figure
+    python gethamquery.py output/element3.json output/element4.json --text "impedance" --benchmark
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import re
+import time
+import numpy as np
+from gethamquestionclasses import msg
+
+DEFAULT_PAGE_SIZE = 50
+ANSWER_LETTERS = 'ABCD'
+_DELETED = re.compile(r'\b(WITHDRAWN|DELETED)\b|(?i:\bquestion\s+(removed|deleted)\b)')
+
+def _is_deleted(question):
+    return bool(_DELETED.search(question.get('fcc') or '') or _DELETED.search(question['text']))
+
+class PoolColumns:
+    """
+    A class to hold the question attributes of element pools as numpy columns
+
+    ...
+
+    Attributes
+    ----------
+    pools : list
+        The ElementPool of each pool ordinal
+    labels : list
+        'E3 2023' per pool ordinal
+    questions : list
+        The question dict of each row
+    offsets : list
+        First row of each pool
+    subelements, groups : list
+        The ids of the subelement and group ordinals
+    pool, subelement, group, correct, has_figure, deleted : numpy arrays
+        One value per row
+
+    """
+    def __init__(self, pools):
+        """
+        Parameters
+        ----------
+        pools : ElementPool, element JSON object, or a list of them
+        """
+        # imported here: gethamelementclasses imports this module on demand
+        from gethamelementclasses import ElementPool
+        if not isinstance(pools, (list, tuple)):
+            pools = [pools]
+        self.pools = [p if isinstance(p, ElementPool) else ElementPool(p) for p in pools]
+        self.labels = []
+        self.questions = []
+        self.offsets = []
+        subelement_ordinals = {}
+        group_ordinals = {}
+        pool_col = []
+        subelement_col = []
+        group_col = []
+        for pool_ordinal, pool in enumerate(self.pools):
+            element = pool.element_pool
+            self.labels.append(f'E{element["elem"]} {(element.get("yrvalid") or {}).get("begin", "")}'
+                               .strip())
+            self.offsets.append(len(self.questions))
+            for se in element['subelements']:
+                se_ordinal = subelement_ordinals.setdefault(se['sub_el'], len(subelement_ordinals))
+                for g in se['groups']:
+                    code = g['subelement'] + g['group_id']
+                    g_ordinal = group_ordinals.setdefault(code, len(group_ordinals))
+                    for q in g['questions']:
+                        self.questions.append(q)
+                        pool_col.append(pool_ordinal)
+                        subelement_col.append(se_ordinal)
+                        group_col.append(g_ordinal)
+        self.subelements = list(subelement_ordinals)
+        self.groups = list(group_ordinals)
+        self._subelement_ordinals = subelement_ordinals
+        self._group_ordinals = group_ordinals
+        rows = len(self.questions)
+        self.pool = np.array(pool_col, dtype=np.int16)
+        self.subelement = np.array(subelement_col, dtype=np.int16)
+        self.group = np.array(group_col, dtype=np.int16)
+        self.correct = np.fromiter((ANSWER_LETTERS.find(q['correct']) & 0xff
+                                    for q in self.questions), dtype=np.uint8, count=rows)
+        self.has_figure = np.fromiter((bool(q['figure']) for q in self.questions),
+                                      dtype=bool, count=rows)
+        self.deleted = np.fromiter((_is_deleted(q) for q in self.questions),
+                                   dtype=bool, count=rows)
+        self._masks = {}
+
+    def __len__(self):
+        return len(self.questions)
+
+    def isin(self, column, ids, ordinals):
+        """
+        Returns the mask of rows whose column ordinal is one of ids
+        """
+        table = np.zeros(len(ordinals) + 1, dtype=bool)
+        table[[ordinals[i] for i in ids if i in ordinals]] = True
+        return table[column]
+
+    def cached_mask(self, key, build):
+        """
+        Returns the mask stored under key, building it with build() once
+        """
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = build()
+            mask.flags.writeable = False
+        return mask
+
+    def rows_mask(self, rows):
+        """
+        Returns the mask with the given rows set
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[np.fromiter(rows, dtype=np.intp)] = True
+        return mask
+
+class Predicate:
+    """
+    A class to represent a filter, combined with & | ~
+
+    ...
+
+    Attributes
+    ----------
+    evaluate : function
+        PoolColumns -> numpy bool mask
+    description : str
+        Readable form, i.e. (subelement G5 & has_figure)
+
+    """
+    def __init__(self, evaluate, description):
+        self.evaluate = evaluate
+        self.description = description
+
+    def __and__(self, other):
+        return Predicate(lambda c: self.evaluate(c) & other.evaluate(c),
+                         f'({self.description} & {other.description})')
+
+    def __or__(self, other):
+        return Predicate(lambda c: self.evaluate(c) | other.evaluate(c),
+                         f'({self.description} | {other.description})')
+
+    def __invert__(self):
+        return Predicate(lambda c: ~self.evaluate(c), f'~{self.description}')
+
+    def __repr__(self):
+        return f'Predicate({self.description})'
+
+def subelement(*ids):
+    """
+    Questions of the subelements, i.e. subelement('T5', 'T6')
+    """
+    return Predicate(lambda c: c.isin(c.subelement, ids, c._subelement_ordinals),
+                     f'subelement {" ".join(ids)}')
+
+def group(*codes):
+    """
+    Questions of the groups, i.e. group('T5A')
+    """
+    return Predicate(lambda c: c.isin(c.group, codes, c._group_ordinals),
+                     f'group {" ".join(codes)}')
+
+def qid(*qids):
+    """
+    Questions with the qids, in every pool that has them
+    """
+    wanted = set(qids)
+    return Predicate(lambda c: c.cached_mask(
+        ('qid', frozenset(wanted)),
+        lambda: c.rows_mask(i for i, q in enumerate(c.questions) if q['qid'] in wanted)),
+                     f'qid {" ".join(qids)}')
+
+def element(*elems):
+    """
+    Questions of the elements, i.e. element('3')
+    """
+    def evaluate(c):
+        pools = [i for i, pool in enumerate(c.pools) if pool.element_pool['elem'] in elems]
+        return np.isin(c.pool, np.array(pools, dtype=c.pool.dtype))
+    return Predicate(evaluate, f'element {" ".join(elems)}')
+
+def year(begin):
+    """
+    Questions of the pool years starting in begin, i.e. year('2023')
+    """
+    def evaluate(c):
+        pools = [i for i, pool in enumerate(c.pools)
+                 if str((pool.element_pool.get('yrvalid') or {}).get('begin')) == str(begin)]
+        return np.isin(c.pool, np.array(pools, dtype=c.pool.dtype))
+    return Predicate(evaluate, f'year {begin}')
+
+def correct(letter):
+    """
+    Questions whose correct answer is letter, A-D
+    """
+    return Predicate(lambda c: c.correct == ANSWER_LETTERS.find(letter.upper()),
+                     f'correct {letter}')
+
+def has_figure():
+    """
+    Questions that refer to a figure
+    """
+    return Predicate(lambda c: c.has_figure, 'has_figure')
+
+def figure(name):
+    """
+    Questions that refer to the figure, i.e. figure('T-1')
+    """
+    return Predicate(lambda c: c.cached_mask(
+        ('figure', name),
+        lambda: c.rows_mask(i for i, q in enumerate(c.questions) if q['figure'] == name)),
+                     f'figure {name}')
+
+def deleted():
+    """
+    Questions withdrawn from the pool: WITHDRAWN or DELETED in the fcc
+    reference or text, or "Question removed/deleted"
+    """
+    return Predicate(lambda c: c.deleted, 'deleted')
+
+def fcc(reference):
+    """
+    Questions citing an FCC rule: '97.3', '97.119(f)' or '97.301-97.305'
+    (see gethamfcc.py)
+    """
+    def build(c):
+        rows = []
+        for offset, pool in zip(c.offsets, c.pools):
+            ordinals = pool.get_ordinals()
+            rows.extend(offset + ordinals[q] for q in pool.get_fcc_index().lookup(reference))
+        return c.rows_mask(rows)
+    return Predicate(lambda c: c.cached_mask(('fcc', reference), lambda: build(c)),
+                     f'fcc {reference}')
+
+def text(pattern, answers=False, flags=re.IGNORECASE):
+    """
+    Questions whose text (and answers if answers) matches a regex
+    """
+    regex = re.compile(pattern, flags)
+    def build(c):
+        if answers:
+            texts = (q['text'] + '\n' + '\n'.join(q['answers']) for q in c.questions)
+        else:
+            texts = (q['text'] for q in c.questions)
+        return np.fromiter((bool(regex.search(t)) for t in texts), dtype=bool, count=len(c))
+    return Predicate(lambda c: c.cached_mask(('text', pattern, answers, flags),
+                                             lambda: build(c)),
+                     f'text /{pattern}/' + (' answers' if answers else ''))
+
+# keyword filters of Query; the flags take True or False (inverts)
+_KEYWORDS = {'subelement': subelement, 'group': group, 'qid': qid, 'element': element,
+             'year': year, 'correct': correct, 'has_figure': has_figure, 'figure': figure,
+             'deleted': deleted, 'fcc': fcc, 'text': text}
+_FLAGS = ('has_figure', 'deleted')
+
+def _keyword_predicate(name, value):
+    factory = _KEYWORDS.get(name)
+    if factory is None:
+        raise TypeError(f'unknown query keyword: {name}')
+    if name in _FLAGS:
+        if not isinstance(value, bool):
+            raise TypeError(f'query keyword {name} takes True or False, not {value!r}')
+        predicate = factory()
+        return predicate if value else ~predicate
+    if isinstance(value, bool):
+        raise TypeError(f'query keyword {name} takes a value, not {value!r}')
+    if isinstance(value, (list, tuple)):
+        return factory(*value)
+    return factory(value)
+
+class Query:
+    """
+    A class to represent the AND of predicates over PoolColumns
+
+    Queries are immutable: where() returns a new Query.
+
+    """
+    def __init__(self, columns, predicates=(), **keywords):
+        self.columns = columns
+        self.predicates = tuple(predicates) + tuple(
+            _keyword_predicate(name, value) for name, value in keywords.items())
+
+    def where(self, *predicates, **keywords):
+        """
+        Returns a Query with more predicates, i.e. where(~deleted(), subelement='T5')
+        """
+        return Query(self.columns, self.predicates + predicates, **keywords)
+
+    def mask(self):
+        """
+        Returns the boolean mask of the matching rows
+        """
+        mask = np.ones(len(self.columns), dtype=bool)
+        for predicate in self.predicates:
+            mask &= predicate.evaluate(self.columns)
+        return mask
+
+    def rows(self):
+        """
+        Returns the matching rows, in pool order
+        """
+        return np.flatnonzero(self.mask())
+
+    def count(self):
+        return int(np.count_nonzero(self.mask()))
+
+    def qids(self):
+        return [self.columns.questions[row]['qid'] for row in self.rows()]
+
+    def cursor(self, page_size=DEFAULT_PAGE_SIZE, offset=0):
+        """
+        Returns a Cursor over the matching questions
+        """
+        return Cursor(self.columns, self.rows(), page_size, offset)
+
+    def __repr__(self):
+        return f'Query({" & ".join(p.description for p in self.predicates) or "all"})'
+
+class Cursor:
+    """
+    A class to page through query results
+
+    ...
+
+    Attributes
+    ----------
+    rows : numpy int array
+        The matching rows
+    page_size : int
+        Questions per page
+    offset : int
+        Position of the next page, pass it to Query.cursor() to resume
+
+    """
+    def __init__(self, columns, rows, page_size=DEFAULT_PAGE_SIZE, offset=0):
+        if page_size < 1:
+            raise ValueError(f'page_size must be positive, not {page_size}')
+        self.columns = columns
+        self.rows = rows
+        self.page_size = page_size
+        self.offset = offset
+
+    @property
+    def total(self):
+        return len(self.rows)
+
+    def has_more(self):
+        return self.offset < len(self.rows)
+
+    def fetch(self):
+        """
+        Returns the next page: a list of question dicts, empty at the end
+        """
+        page = self.rows[self.offset:self.offset + self.page_size]
+        self.offset += len(page)
+        return [self.columns.questions[row] for row in page]
+
+    def fetch_labeled(self):
+        """
+        Returns the next page as (pool label, question dict) pairs
+        """
+        page = self.rows[self.offset:self.offset + self.page_size]
+        self.offset += len(page)
+        return [(self.columns.labels[self.columns.pool[row]], self.columns.questions[row])
+                for row in page]
+
+    def __iter__(self):
+        while self.has_more():
+            yield self.fetch()
+
+def _loop_filter(columns, args):
+    """
+    The filter of the command line arguments as a nested loop, for --benchmark
+    """
+    regex = re.compile(args.text, re.IGNORECASE) if args.text else None
+    found = []
+    for pool in columns.pools:
+        fcc_qids = set(pool.get_fcc_index().lookup(args.fcc)) if args.fcc else None
+        for se in pool.element_pool['subelements']:
+            if args.subelement and se['sub_el'] not in args.subelement:
+                continue
+            for g in se['groups']:
+                for q in g['questions']:
+                    if args.has_figure and not q['figure']:
+                        continue
+                    if fcc_qids is not None and q['qid'] not in fcc_qids:
+                        continue
+                    if regex and not regex.search(q['text']):
+                        continue
+                    if _is_deleted(q):
+                        continue
+                    found.append(q['qid'])
+    return found
+
+def main():
+    """
+    Filter the questions of element JSON files if called from commandline
+
+    """
+    # imported here: the module itself takes ElementPool objects
+    from gethamelementclasses import ElementPool
+    parser = argparse.ArgumentParser(description='Filter questions of element pools')
+    parser.add_argument('element_FNs', nargs='+', help='element JSON files, i.e. pool years')
+    parser.add_argument('--subelement', nargs='+', default=[], help='i.e. T5 T6')
+    parser.add_argument('--has-figure', action='store_true')
+    parser.add_argument('--fcc', default='', help='i.e. 97.3, 97.301-97.305')
+    parser.add_argument('--text', default='', help='regex on the question text')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--benchmark', action='store_true',
+                        help='time the query against a nested Python loop')
+    args = parser.parse_args()
+    columns = PoolColumns([ElementPool(element_FN=FN) for FN in args.element_FNs])
+    query = Query(columns, [~deleted()])
+    if args.subelement:
+        query = query.where(subelement(*args.subelement))
+    if args.has_figure:
+        query = query.where(has_figure())
+    if args.fcc:
+        query = query.where(fcc(args.fcc))
+    if args.text:
+        query = query.where(text(args.text))
+    cursor = query.cursor(args.page_size)
+    msg('Info', 'I761', f'{query}: {cursor.total} of {len(columns)} questions')
+    for number, page in enumerate(cursor, 1):
+        msg('Info', 'I762', f'page {number}: {" ".join(q["qid"] for q in page)}')
+    if args.benchmark:
+        repeat = 1000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            query.rows()
+        vectorized = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat // 10):
+            loop = _loop_filter(columns, args)
+        looped = (time.perf_counter() - start) / (repeat // 10)
+        if loop != query.qids():
+            msg('Error', 'E761', 'the loop and the query disagree')
+        msg('Info', 'I763', f'query {vectorized * 1e6:.0f}us, nested loop {looped * 1e6:.0f}us')
+
+if __name__ == '__main__':
+    main()
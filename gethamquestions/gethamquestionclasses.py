@@ -75,6 +75,21 @@ class State:
         self.el_effective = ''           #{'begin' : July 1, 2019, 'end' : date}
         self.el_num = ''
         self.source_lines = source_lines
+        self.schema = 1                  # 2: also write normalized element{N}.v2.json
+        self.compression = ''            # 'gz' or 'xz': write element{N}.json.gz/.xz
+        self.on_question = None          # callable(question, state) as each question closes
+        self.classify_topics = False     # assign group topics to questions (gethamtopics.py)
+        self.figures = None              # Future of extract_docx_figures, joined at close_element
+
+    def close_question(self, question):
+        """
+        closes a parsed Question object: adds it to the current Group and passes
+        it to on_question
+
+        """
+        self.cur_group.questions.append(question)
+        if self.on_question:
+            self.on_question(question, self)
 
     def close_group(self):
         """
@@ -99,17 +114,42 @@ class State:
         closes the current Element object
 
         """
+        # gethamcompress and gethamschema import msg from this module
+        from gethamcompress import open_text, compressed_name
         if self.cur_element:
+            if self.figures is not None:
+                # figure id -> asset file, extracted while the text was parsed
+                try:
+                    self.cur_element.figures, written = self.figures.result()
+                    msg('Info', 'I205', f'figures: {len(self.cur_element.figures)}, '
+                        f'{written} images written')
+                except Exception as err:  #pylint: disable-msg=broad-except
+                    # the element JSON is written without figures
+                    self.cur_element.figures = {}
+                    msg('Error', 'E205', f'figure extraction failed: '
+                        f'{type(err).__name__}: {err}')
+            if self.classify_topics:
+                from gethamtopics import classify_element
+                assigned = classify_element(self.cur_element)
+                msg('Info', 'I204', f'topics assigned to {assigned} questions')
             str_out = json.dumps(self.cur_element, default=vars, indent=2)
             #print(self.cur_element.filetype)
             # Writing element JSON to file
             # stackoverflow.com/questions/23793987/write-a-file-to-a-directory-that-doesnt-exist
-            outpath = f'./output/element{self.cur_element.elem }.json'
+            outpath = compressed_name(f'./output/element{self.cur_element.elem }.json',
+                                      self.compression)
             os.makedirs(os.path.dirname(outpath), exist_ok=True)
             #TODO: add Try exception
-            with open(outpath, 'w', encoding='utf-8') as file2:
+            with open_text(outpath, 'w') as file2:
                 file2.write(str_out)
-            msg('Info', 'I200', f'JSON written to element{self.cur_element.elem}.json')
+            msg('Info', 'I200', f'JSON written to {os.path.basename(outpath)}')
+            if self.schema == 2:
+                from gethamschema import write_element
+                outpath = compressed_name(f'./output/element{self.cur_element.elem}.v2.json',
+                                          self.compression)
+                size = write_element(self.cur_element, outpath)
+                msg('Info', 'I202', f'schema 2 JSON written to '
+                    f'{os.path.basename(outpath)}, {size:,} bytes')
 
     def print_summary(self):
         """
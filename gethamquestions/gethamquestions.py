@@ -29,6 +29,14 @@ Notes
     see function _parse_line() notes for Question Pool anomolies
 
 Change Log
+    2026-10-19 v20 - added --serve <socket>, query daemon (see gethamserve.py)
+    2026-10-19 v19 - added --figures <dir>, figure images into a hash named asset store
+    2026-10-19 v18 - added --topics, local TF-IDF question topics (see gethamtopics.py)
+    2026-10-19 v17 - added --sqlite <db>, load the parsed pool into SQLite (see gethamsqlite.py)
+    2026-10-19 v16 - get_element_pool(on_question=...) hook as questions close (see gethamndjson.py)
+    2026-10-19 v15 - added --compress gz|xz, compressed outputs, compressed/BOM text input
+    2026-10-19 v14 - added --schema 2, normalized element JSON (see gethamschema.py)
+    2026-10-19 v13 - added --watch <dir>, incremental rebuild (see gethamwatch.py)
     2023-07-05 v12 - processed group description string into topics and subtopics
     2023-07-04 v11 - problem with very long topic in T1C01
     2023-06-29 v10 - adding openai routine to identify topics for question; will be separate process
@@ -43,6 +51,7 @@ Change Log
     2023-05-21 v02 = Works for Question Pool only. Not for total file. Is not state based.
 """
 
+import argparse
 import re
 import json
 import sys
@@ -51,8 +60,11 @@ import os
 import os.path
 #import docx
 import magic
-#import zipfile
-from gethamexternalfunctions import get_docx_text
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from gethamexternalfunctions import get_docx_text, extract_docx_figures
+from gethamcompress import sniff_compression, read_bytes, open_text, compressed_name
+from gethamsqlite import connect, load_element
 from gethamelementclasses import Element, Subelement, Group, Question
 from gethamquestionclasses import msg, State, Filelines
 
@@ -174,12 +186,21 @@ def get_file_type(file_name):
     """
     Determine the file type and return:
     - "ASCII text" if it is a text file
+    - "UTF-8 Unicode" if it is a UTF-8 text file (with or without BOM)
     - "Microsoft Word" if it is a docx
     - "anything else" - not ASCII text or Microsoft Word
+    A gzip/lzma compressed file is typed by its decompressed content.
 
     """
 
-    tokens = magic.from_file(file_name).split()
+    if sniff_compression(file_name):
+        description = magic.from_buffer(read_bytes(file_name)[:1 << 16])
+    else:
+        description = magic.from_file(file_name)
+    # newer libmagic reports "Unicode text, UTF-8 text" for "UTF-8 Unicode text"
+    if description.startswith('Unicode text, UTF-8'):
+        return 'UTF-8 Unicode'
+    tokens = description.split()
     result = ''
     sep = ''
     i = 0
@@ -189,16 +210,18 @@ def get_file_type(file_name):
         i += 1
     return result
 
-def get_file(file_name):
+def get_file(file_name, figures=None):
     """
-    Read a file and return an iterable object list of all lines
+    Read a file and return an iterable object list of all lines, the figures
+    dict of a docx is filled as in get_docx_text
 
     """
 
     file_type = get_file_type(file_name)
     if file_type in ('ASCII text', 'UTF-8 Unicode'):
         try:
-            with open(file_name, 'r', encoding='UTF-8') as file:
+            # open_text sniffs the magic bytes, .txt.gz/.txt.xz read the same way
+            with open_text(file_name, encoding='UTF-8') as file:
                 lines = file.readlines()
             return lines
 
@@ -210,7 +233,7 @@ def get_file(file_name):
             print("Unexpected error:", sys.exc_info()[0])
             return ''
     elif file_type == 'Microsoft Word':
-        lines = get_docx_text(file_name)
+        lines = get_docx_text(file_name, figures)
         msg('Info', 'I400', 'get_file(' + file_name + ')' +
             'returned len(lines)= ' + str(len(lines)))
         return lines
@@ -255,197 +278,223 @@ def read_fline(filelines, skip_blank=True):
         line = ''
         return line, len(filelines)
 
-def get_element_pool(file_name):
+def get_element_pool(file_name, schema=1, compression='', on_question=None, topics=False,
+                     figures_dir=''):
     """
-    Extract the element pool from the source file
+    Extract the element pool from the source file, schema=2 also writes the
+    normalized element{N}.v2.json (see gethamschema.py), compression 'gz' or
+    'xz' writes the outputs compressed (see gethamcompress.py), on_question is
+    called with (question, state) as each question is parsed (see gethamndjson.py),
+    topics assigns group topics to the questions (see gethamtopics.py), a docx
+    source's figure images are written to figures_dir (see extract_docx_figures)
 
     """
     #State __init__(self, state, cur_element, cur_subelement, cur_group):
     #state.elname = ''
-    file_lines = get_file(file_name)
-    pool_state = State('initial', None, None, None, file_lines)
-    file_lines = Filelines(file_lines)  # convert to Filelines iterable
-    while pool_state.state != 'end':
-        line, count = read_fline(file_lines)
-        key, match = _parse_line(line, pool_state)
-        begin_state = pool_state.state
-
-        if key in ('removed', 'removed2', 'blank'):
-            continue
-        #match pool_state.state:
-            #case 'initial':
-        if pool_state.state == 'initial':
-                #match key:
-                    #case 'element':
-            if key == 'element':
-                # Can be ended by end of input
-                # Not currently allowed more than one element, so it can't end anything else
-                subelements = []
-                timestamp = datetime.datetime.now()
-                pool_state.cur_element = Element(pool_state.el_num, pool_state.el_name, \
-                    pool_state.el_yrvalid, pool_state.el_effective, subelements, \
-                    timestamp, file_name, get_file_type(file_name))
-                pool_state.state = 'element'
-                    #case 'end':
-            elif key == 'end':
-                msg('Error', 'E001', 'Premature end', count, line)
-                pool_state.state = 'end'
-                    #case 'data':
-            elif key == 'data':
-                msg('Debug', 'D002', 'Data line', count, line)
-                    #case _:
-            else:
-                msg('Debug', 'D004', 'Line b4 Element', count, line)
-
-            #case 'element':
-        elif pool_state.state == 'element':
-                #match key:
-                    #case 'subelement':
-            if key == 'subelement':
-                # Can be ended by subelement, end of input
-                # Can end group, subelement
-                #                        pool_state.close_group()
-                #                        pool_state.close_subelement()
-                # New subelement
-                description = match.group('description').strip().rstrip('-').strip()
-                pool_state.cur_subelement = \
-                    Subelement(pool_state.cur_element.elem, match.group('subelement'), \
-                                description, match.group('numq'), match.group('numg'), [])
-                pool_state.state = 'subelement'
-                    #case 'end':
-            elif key == 'end':
-                msg('Error', 'E003', 'Unexpected "end"', count, line)
-                pool_state.state = 'end'
-                    #case _:
-            else:
-                msg('Error', 'E004', '{key} from {pool_state.state}', count, line)
-                pool_state.state = 'end'
-            #case 'subelement':
-        elif pool_state.state == 'subelement':
-                #match key:
-                    #case 'group':
-            if key == 'group':
-                # Can be ended by subelement, group, end of input
-                # Can end group
-                pool_state.close_group()
-                # New group
-                subelem = match.group('subelem')
-                group_id = match.group('group_id')
-                description = match.group('description')
-                description = description.strip().rstrip('-').strip()
-                questions = []
-                pool_state.cur_group = Group(subelem, group_id, description, questions)
-                pool_state.state = 'group'
-                    #case 'end':
-            elif key == 'end':
-                msg('Error', 'E004', 'Unexpected "end"', count, line)
-                pool_state.state = 'end'
-                    #case _:
-            else:
-                msg('Error', 'E007', '{key} from {pool_state.state}', count, line)
-                msg('Error', 'D008', f'{begin_state}:{pool_state.state}', count, line)
-                pool_state.state = 'end'
-            #case 'group':
-        elif pool_state.state == 'group':
-                #match key:
-                    #case 'group':
-            if key == 'group':
-                # Can be ended by subelement, group, end of input
-                # Can end group
-                pool_state.close_group()
-                # New group
-                subelem = match.group('subelem')
-                group_id = match.group('group_id')
-                description = match.group('description')
-                questions = []
-                pool_state.cur_group = Group(subelem, group_id, description, questions)
-                pool_state.state = 'group'
-                    #case 'subelement':
-            elif key == 'subelement':
-                # Can be ended by subelement?, end of input
-                # Can end group, subelement?
-                pool_state.close_group()
-                pool_state.close_subelement()
-                sub_el = match.group('subelement')
-                description = match.group('description')
-                # couldn't get regex to elminiate final - in some cases
-                description = description.strip().rstrip('-').strip()
-                numq = match.group('numq')
-                numg = match.group('numg')
-                groups = []
-                pool_state.cur_subelement = \
-                    Subelement(pool_state.cur_element.elem, sub_el, \
-                                description, numq, numg, groups)
-                pool_state.state = 'subelement'
-                    #case 'question':
-            elif key == 'question':
-                msg('Debug', 'D002', f'{begin_state}:{pool_state.state}', count, line)
-                subelem = match.group('subelem')
-                group = match.group('group')
-                qnum = match.group('qnum')
-                qid = f'{subelem}{group}{qnum}'
-                ans = match.group('ans')
-                fcc = match.group('fcc')
-                # Get question lines from the file
-                text, count = read_fline(file_lines)      # read line 1 Question
-                figure = ''
-                regex_figure = re.compile(r'(^|\s)[fF]igure\s+(?P<fig>[TGE]\d?-\d+).?')
-                match = regex_figure.search(text)
-                if match:
-                    figure = match.group('fig')
-                answers = []
-
-                line, count = read_fline(file_lines)      # read line 2 Ans A.
-                answers.append(line.strip())
-                line, count = read_fline(file_lines)      # read line 3 Ans B.
-                answers.append(line.strip())
-                line, count = read_fline(file_lines)      # read line 4 Ans C.
-                answers.append(line.strip())
-                line, count = read_fline(file_lines)      # read line 5 Ans D.
-                answers.append(line.strip())
-                # ignore this line, ~~ at end of question
-                # Read line 6 Question End ~~, don't skip blank lines
-                line, count = read_fline(file_lines, False)
-                if line.strip() != '~~':
-                    msg('Error', 'E005', 'Missing quest end ~~', count, line)
-                cur_question = \
-                    Question(subelem, group, qnum, \
-                                qid, text.strip(), ans, figure, answers, fcc, \
-                                pool_state.cur_group.topics)
-                # Add question to Group
-                pool_state.cur_group.questions.append(cur_question)
-                    #case 'end':
-            elif key == 'end':
-                # Can end group, subelement
-                pool_state.close_group()
-                pool_state.close_subelement()
-                pool_state.close_element()
-                pool_state.state = 'end'
-                pool_state.print_summary()
-                    #case _:
+    executor = None
+    # the images are located by the docx text parse of get_file
+    figure_members = {} if figures_dir and zipfile.is_zipfile(file_name) else None
+    try:
+        file_lines = get_file(file_name, figure_members)
+        pool_state = State('initial', None, None, None, file_lines)
+        if figure_members is not None:
+            # and extracted in a thread while the text is parsed
+            executor = ThreadPoolExecutor(max_workers=1)
+            pool_state.figures = executor.submit(extract_docx_figures, file_name, figures_dir,
+                                                 figure_members)
+        pool_state.schema = schema
+        pool_state.compression = compression
+        pool_state.on_question = on_question
+        pool_state.classify_topics = topics
+        file_lines = Filelines(file_lines)  # convert to Filelines iterable
+        while pool_state.state != 'end':
+            line, count = read_fline(file_lines)
+            key, match = _parse_line(line, pool_state)
+            begin_state = pool_state.state
+
+            if key in ('removed', 'removed2', 'blank'):
+                continue
+            #match pool_state.state:
+                #case 'initial':
+            if pool_state.state == 'initial':
+                    #match key:
+                        #case 'element':
+                if key == 'element':
+                    # Can be ended by end of input
+                    # Not currently allowed more than one element, so it can't end anything else
+                    subelements = []
+                    timestamp = datetime.datetime.now()
+                    pool_state.cur_element = Element(pool_state.el_num, pool_state.el_name, \
+                        pool_state.el_yrvalid, pool_state.el_effective, subelements, \
+                        timestamp, file_name, get_file_type(file_name))
+                    pool_state.state = 'element'
+                        #case 'end':
+                elif key == 'end':
+                    msg('Error', 'E001', 'Premature end', count, line)
+                    pool_state.state = 'end'
+                        #case 'data':
+                elif key == 'data':
+                    msg('Debug', 'D002', 'Data line', count, line)
+                        #case _:
+                else:
+                    msg('Debug', 'D004', 'Line b4 Element', count, line)
+
+                #case 'element':
+            elif pool_state.state == 'element':
+                    #match key:
+                        #case 'subelement':
+                if key == 'subelement':
+                    # Can be ended by subelement, end of input
+                    # Can end group, subelement
+                    #                        pool_state.close_group()
+                    #                        pool_state.close_subelement()
+                    # New subelement
+                    description = match.group('description').strip().rstrip('-').strip()
+                    pool_state.cur_subelement = \
+                        Subelement(pool_state.cur_element.elem, match.group('subelement'), \
+                                    description, match.group('numq'), match.group('numg'), [])
+                    pool_state.state = 'subelement'
+                        #case 'end':
+                elif key == 'end':
+                    msg('Error', 'E003', 'Unexpected "end"', count, line)
+                    pool_state.state = 'end'
+                        #case _:
+                else:
+                    msg('Error', 'E004', '{key} from {pool_state.state}', count, line)
+                    pool_state.state = 'end'
+                #case 'subelement':
+            elif pool_state.state == 'subelement':
+                    #match key:
+                        #case 'group':
+                if key == 'group':
+                    # Can be ended by subelement, group, end of input
+                    # Can end group
+                    pool_state.close_group()
+                    # New group
+                    subelem = match.group('subelem')
+                    group_id = match.group('group_id')
+                    description = match.group('description')
+                    description = description.strip().rstrip('-').strip()
+                    questions = []
+                    pool_state.cur_group = Group(subelem, group_id, description, questions)
+                    pool_state.state = 'group'
+                        #case 'end':
+                elif key == 'end':
+                    msg('Error', 'E004', 'Unexpected "end"', count, line)
+                    pool_state.state = 'end'
+                        #case _:
+                else:
+                    msg('Error', 'E007', '{key} from {pool_state.state}', count, line)
+                    msg('Error', 'D008', f'{begin_state}:{pool_state.state}', count, line)
+                    pool_state.state = 'end'
+                #case 'group':
+            elif pool_state.state == 'group':
+                    #match key:
+                        #case 'group':
+                if key == 'group':
+                    # Can be ended by subelement, group, end of input
+                    # Can end group
+                    pool_state.close_group()
+                    # New group
+                    subelem = match.group('subelem')
+                    group_id = match.group('group_id')
+                    description = match.group('description')
+                    questions = []
+                    pool_state.cur_group = Group(subelem, group_id, description, questions)
+                    pool_state.state = 'group'
+                        #case 'subelement':
+                elif key == 'subelement':
+                    # Can be ended by subelement?, end of input
+                    # Can end group, subelement?
+                    pool_state.close_group()
+                    pool_state.close_subelement()
+                    sub_el = match.group('subelement')
+                    description = match.group('description')
+                    # couldn't get regex to elminiate final - in some cases
+                    description = description.strip().rstrip('-').strip()
+                    numq = match.group('numq')
+                    numg = match.group('numg')
+                    groups = []
+                    pool_state.cur_subelement = \
+                        Subelement(pool_state.cur_element.elem, sub_el, \
+                                    description, numq, numg, groups)
+                    pool_state.state = 'subelement'
+                        #case 'question':
+                elif key == 'question':
+                    msg('Debug', 'D002', f'{begin_state}:{pool_state.state}', count, line)
+                    subelem = match.group('subelem')
+                    group = match.group('group')
+                    qnum = match.group('qnum')
+                    qid = f'{subelem}{group}{qnum}'
+                    ans = match.group('ans')
+                    fcc = match.group('fcc')
+                    # Get question lines from the file
+                    text, count = read_fline(file_lines)      # read line 1 Question
+                    figure = ''
+                    regex_figure = re.compile(r'(^|\s)[fF]igure\s+(?P<fig>[TGE]\d?-\d+).?')
+                    match = regex_figure.search(text)
+                    if match:
+                        figure = match.group('fig')
+                    answers = []
+
+                    line, count = read_fline(file_lines)      # read line 2 Ans A.
+                    answers.append(line.strip())
+                    line, count = read_fline(file_lines)      # read line 3 Ans B.
+                    answers.append(line.strip())
+                    line, count = read_fline(file_lines)      # read line 4 Ans C.
+                    answers.append(line.strip())
+                    line, count = read_fline(file_lines)      # read line 5 Ans D.
+                    answers.append(line.strip())
+                    # ignore this line, ~~ at end of question
+                    # Read line 6 Question End ~~, don't skip blank lines
+                    line, count = read_fline(file_lines, False)
+                    if line.strip() != '~~':
+                        msg('Error', 'E005', 'Missing quest end ~~', count, line)
+                    cur_question = \
+                        Question(subelem, group, qnum, \
+                                    qid, text.strip(), ans, figure, answers, fcc, \
+                                    pool_state.cur_group.topics)
+                    # Add question to Group
+                    pool_state.close_question(cur_question)
+                        #case 'end':
+                elif key == 'end':
+                    # Can end group, subelement
+                    pool_state.close_group()
+                    pool_state.close_subelement()
+                    pool_state.close_element()
+                    pool_state.state = 'end'
+                    pool_state.print_summary()
+                        #case _:
+                else:
+                    #print(f'Error: {key} is not valid in state "{pool_state.state}" ', end='')
+                    msg('Error', 'E010', f'{key} not valid', count, line)
+                    msg('Info', 'I003', f'{begin_state}:{pool_state.state}', count, line)
+                    pool_state.state = 'end'
+                #case 'end':
+            elif pool_state.state == 'end':
+                pass
+                #case _:
             else:
-                #print(f'Error: {key} is not valid in state "{pool_state.state}" ', end='')
-                msg('Error', 'E010', f'{key} not valid', count, line)
-                msg('Info', 'I003', f'{begin_state}:{pool_state.state}', count, line)
-                pool_state.state = 'end'
-            #case 'end':
-        elif pool_state.state == 'end':
-            pass
-            #case _:
-        else:
-            pass
-        if begin_state != pool_state.state:
-            msg('Debug', 'D005', f'{begin_state}:{pool_state.state}', count, line)
-
+                pass
+            if begin_state != pool_state.state:
+                msg('Debug', 'D005', f'{begin_state}:{pool_state.state}', count, line)
+    finally:
+        if executor:
+            # also when the parse raises
+            executor.shutdown()
+    if pool_state.cur_element is None:
+        msg('Error', 'E011', f'No element header found in "{file_name}"')
+        return None
     # If windows doc file, write out txt file
     if pool_state.cur_element.filetype == 'Microsoft Word':
         # write out text file
         #out_lines = get_file(pool_state.cur_element.filename)
         out_lines = pool_state.source_lines
         #out_lines = Filelines(out_lines)
-        outpath3 = f'./output/element{pool_state.cur_element.elem}.txt'
+        outpath3 = compressed_name(f'./output/element{pool_state.cur_element.elem}.txt',
+                                   compression)
         os.makedirs(os.path.dirname(outpath3), exist_ok=True)
-        with open(outpath3, 'w', encoding='utf-8-sig') as file3:
+        with open_text(outpath3, 'w', encoding='utf-8-sig') as file3:
             line_num = 0
             for line in out_lines:
                 line_num += 1
@@ -455,7 +504,7 @@ def get_element_pool(file_name):
                         'Non ASCII in out txt', line_num, json.dumps(line))
                 file3.write(line + '\n')
         msg('Info', 'I201',
-            f'text written to element{pool_state.cur_element.elem }.txt, lines={len(out_lines)}')
+            f'text written to {os.path.basename(outpath3)}, lines={len(out_lines)}')
 
     return pool_state.cur_element
 
@@ -464,12 +513,56 @@ def main():
     Execute gethamquestions if called from commandline
 
     """
-    if len(sys.argv) >= 2:
-        msg('Debug', 'D001', sys.argv[1], 0, 'nond')
-        if os.path.isfile(sys.argv[1]):
-            get_element_pool(sys.argv[1])
+    parser = argparse.ArgumentParser(description='Parse an FCC element question pool')
+    parser.add_argument('file_name', nargs='?', default='', help='pool docx or text file')
+    parser.add_argument('--watch', default='', help='directory to watch and rebuild')
+    parser.add_argument('--schema', type=int, default=1, choices=(1, 2),
+                        help='2: also write the normalized element{N}.v2.json')
+    parser.add_argument('--compress', default='', choices=('', 'gz', 'xz'),
+                        help='write element{N}.json.gz/.xz and compressed text export')
+    parser.add_argument('--sqlite', default='', help='also load the pool into this database')
+    parser.add_argument('--figures', default='',
+                        help='write the figure images of a docx to this asset directory')
+    parser.add_argument('--topics', action='store_true',
+                        help='assign group topics to each question (local TF-IDF)')
+    parser.add_argument('--serve', default='', help='serve queries on this Unix socket')
+    parser.add_argument('--pool', action='append', default=[],
+                        help='element JSON file to serve, repeatable')
+    parser.add_argument('--help-file', action='append', default=[],
+                        help='help history file to serve, repeatable')
+    args = parser.parse_args()
+    if args.serve:
+        # gethamserve loads the pool classes only when serving
+        from gethamserve import serve
+        pool_FNs = args.pool or ([args.file_name] if args.file_name else [])
+        missing = [FN for FN in pool_FNs + args.help_file if not os.path.isfile(FN)]
+        if not pool_FNs:
+            msg('Error', 'E999', 'Not enough arguments, --serve needs a --pool')
+        elif missing:
+            msg('Error', 'E002', 'File not found: "' + '", "'.join(missing) + '"')
+        else:
+            serve(args.serve, pool_FNs, args.help_file)
+    elif args.watch:
+        # gethamwatch imports this module, so import it only when watching
+        from gethamwatch import Watcher
+        if os.path.isdir(args.watch):
+            Watcher(args.watch).run()
+        else:
+            msg('Error', 'E002', 'Directory not found: "' + args.watch + '"')
+    elif args.file_name:
+        msg('Debug', 'D001', args.file_name, 0, 'nond')
+        if os.path.isfile(args.file_name):
+            element = get_element_pool(args.file_name, args.schema, args.compress,
+                                       topics=args.topics, figures_dir=args.figures)
+            if element and args.sqlite:
+                conn = connect(args.sqlite)
+                try:
+                    count = load_element(conn, element)
+                finally:
+                    conn.close()
+                msg('Info', 'I203', f'{count} questions loaded into {args.sqlite}')
         else:
-            msg('Error', 'E002', 'File not found: "' + sys.argv[1] + '"')
+            msg('Error', 'E002', 'File not found: "' + args.file_name + '"')
     else:
         msg('Error', 'E999', 'Not enough arguments')
 
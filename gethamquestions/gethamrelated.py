@@ -0,0 +1,163 @@
+#-*- coding: utf-8 -*-
+"""
+Precomputed related questions: a top-k cosine similarity neighbor table
+
+Every question (text plus correct answer) is a TF-IDF vector over the pool
+(tokenize of gethamtopics.py), rows L2 normalized, as a float32 matrix.  The
+similarities are computed in blocks of rows, one matrix product per block
+(block x questions), so memory stays bounded for large pools; argpartition
+keeps the k best of each row.  The table is saved beside the element JSON:
+
+    output/element3.json -> output/element3.related.npz
+        neighbors  uint16 (questions, k)  ordinals, best first (ElementPool.get_qids())
+        scores     float16 (questions, k)
+        qids_crc   crc32 of the qids, a table of another pool is not used
+
+ElementPool.related(qid, k) is then a row slice.
+
+Functions:
+    question_matrix
+    build_related
+    related_FN
+    write_related
+    read_related
+    main
+
+Usage
+    python gethamrelated.py output/element3.json --k 10
+    python gethamrelated.py output/element3.json --show G5A01
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import math
+import os
+import re
+import time
+import zlib
+from collections import Counter
+import numpy as np
+from gethamquestionclasses import msg
+from gethamtopics import tokenize
+
+DEFAULT_K = 10
+BLOCK_ROWS = 256
+_ANSWER_LETTERS = 'ABCD'
+_ANSWER_PREFIX = re.compile(r'^[A-D]\.\s*')
+_JSON_NAME = re.compile(r'(\.v2)?\.json(\.gz|\.xz)?$')
+
+def _question_terms(question):
+    terms = tokenize(question['text'])
+    pos = _ANSWER_LETTERS.find(question['correct'])
+    if 0 <= pos < len(question['answers']):
+        terms += tokenize(_ANSWER_PREFIX.sub('', question['answers'][pos]))
+    return terms
+
+def question_matrix(questions):
+    """
+    Returns the float32 (questions, terms) matrix of L2 normalized TF-IDF rows
+
+    """
+    counts = [Counter(_question_terms(q)) for q in questions]
+    df = Counter(term for count in counts for term in count)
+    columns = {term: i for i, term in enumerate(sorted(df))}
+    documents = len(counts)
+    idf = {term: math.log((1 + documents) / (1 + n)) + 1 for term, n in df.items()}
+    matrix = np.zeros((documents, len(columns)), dtype=np.float32)
+    for row, count in enumerate(counts):
+        for term, n in count.items():
+            matrix[row, columns[term]] = (1 + math.log(n)) * idf[term]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def build_related(questions, k=DEFAULT_K, block_rows=BLOCK_ROWS):
+    """
+    Returns (neighbors, scores): per question the ordinals of its k most similar
+    other questions, best first, and their cosine similarities
+
+    """
+    matrix = question_matrix(questions)
+    rows = len(matrix)
+    k = max(0, min(k, rows - 1))
+    neighbors = np.zeros((rows, k), dtype=np.uint16)
+    scores = np.zeros((rows, k), dtype=np.float16)
+    if not k:
+        return neighbors, scores
+    for start in range(0, rows, block_rows):
+        stop = min(start + block_rows, rows)
+        block = matrix[start:stop] @ matrix.T
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        best = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(block, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        neighbors[start:stop] = np.take_along_axis(best, order, axis=1)
+        scores[start:stop] = np.take_along_axis(best_scores, order, axis=1)
+    return neighbors, scores
+
+def _qids_crc(qids):
+    return zlib.crc32('\n'.join(qids).encode('utf-8'))
+
+def related_FN(element_FN):
+    """
+    Returns the neighbor table file of an element JSON file
+
+    """
+    return _JSON_NAME.sub('', element_FN) + '.related.npz'
+
+def write_related(out_FN, qids, neighbors, scores):
+    """
+    Writes a neighbor table, returns its size in bytes
+
+    """
+    os.makedirs(os.path.dirname(out_FN) or '.', exist_ok=True)
+    with open(out_FN, 'wb') as file:
+        np.savez_compressed(file, neighbors=neighbors, scores=scores,
+                            qids_crc=np.array(_qids_crc(qids), dtype=np.uint32))
+    return os.path.getsize(out_FN)
+
+def read_related(in_FN, qids):
+    """
+    Returns (neighbors, scores) of a neighbor table file, None if it is missing
+    or was built for other questions
+
+    """
+    if not os.path.isfile(in_FN):
+        return None
+    with np.load(in_FN) as data:
+        if int(data['qids_crc']) != _qids_crc(qids) or len(data['neighbors']) != len(qids):
+            msg('Warning', 'W791', f'{in_FN} does not match the pool, not used')
+            return None
+        return data['neighbors'], data['scores']
+
+def main():
+    """
+    Build the neighbor table of an element JSON file if called from commandline
+
+    """
+    # imported here: gethamelementclasses imports this module on demand
+    from gethamelementclasses import ElementPool
+    parser = argparse.ArgumentParser(description='Build the related questions table')
+    parser.add_argument('element_FN', help='element JSON file')
+    parser.add_argument('--k', type=int, default=DEFAULT_K, help='neighbors per question')
+    parser.add_argument('--show', nargs='+', default=[], help='qids to show the related of')
+    args = parser.parse_args()
+    pool = ElementPool(element_FN=args.element_FN)
+    questions = list(pool.iter_questions())
+    if not args.show:
+        start = time.perf_counter()
+        neighbors, scores = build_related(questions, args.k)
+        elapsed = time.perf_counter() - start
+        out_FN = related_FN(args.element_FN)
+        size = write_related(out_FN, pool.get_qids(), neighbors, scores)
+        msg('Info', 'I791', f'{out_FN}: {len(questions)} x {neighbors.shape[1]} neighbors '
+            f'in {elapsed * 1000:.0f}ms, {size:,} bytes')
+    texts = {q['qid']: q['text'] for q in questions}
+    for qid in args.show:
+        msg('Info', 'I792', f'{qid} {texts.get(qid, "not in the pool")[:70]}')
+        for other in pool.related(qid, args.k):
+            msg('Info', 'I793', f'    {other} {texts[other][:70]}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+#-*- coding: utf-8 -*-
+"""
+Normalized (schema 2) element JSON and the reader for both schemas
+
+The element JSON written by gethamquestions.py (schema 1) repeats data: each
+question carries a copy of its group topics, the subelement/group/qid that
+follow from its position, and every answer starts with its "A. " letter.
+Schema 2 stores each string once in a shared table and refers to it by index:
+
+    {
+      "schema": 2,
+      "filename": ..., "timestamp": ..., "elem": "3", ...,   (as schema 1)
+      "strings": ["COMMISSION'S RULES", "General class control ...", ...],
+      "subelements": [{
+        "sub_el": "G1", "description": 0, "numq": "5", "numg": "5",
+        "groups": [{
+          "group_id": "A", "description": 1, "topics": [2, 3], "subtopics": [],
+          "questions": [{
+            "num": "01", "text": 4, "correct": "C", "fcc": 5,
+            "answers": [6, 7, 8, 9],       (string indexes, letter prefix dropped)
+            "topics": [0]                  (indexes into the group topics)
+          }, ...]
+        }]
+      }]
+    }
+
+Keys that can be derived are left out (subelement "elem", group "subelement",
+question "subelement", "group", "qid", empty "figure") and restored by
+inflate_element.  Answers that do not start with their "A. " prefix are kept
+verbatim ("answers_raw": true).  inflate_element(normalize_element(e)) == e.
+Inflated records share the table strings, so a loaded schema 2 file holds
+one copy of each repeated topic, description and citation.
+
+Functions:
+    element_dict
+    normalize_element
+    inflate_element
+    read_element
+    write_element
+    main
+
+Usage
+    python gethamschema.py element3.json element3.v2.json
+    python gethamschema.py --inflate element3.v2.json element3.json
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import json
+import os
+from gethamquestionclasses import msg
+from gethamcompress import open_text
+
+SCHEMA_VERSION = 2
+_SEPARATORS = (',', ':')
+_ANSWER_LETTERS = 'ABCDEFGH'
+
+class _StringTable:
+    """
+    Assigns each distinct string an index in first seen order
+
+    """
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def add(self, string):
+        pos = self.index.get(string)
+        if pos is None:
+            pos = self.index[string] = len(self.strings)
+            self.strings.append(string)
+        return pos
+
+    def add_list(self, strings):
+        return [self.add(string) for string in strings]
+
+def element_dict(element):
+    """
+    Returns an element JSON object for an Element instance (see close_element)
+
+    """
+    if isinstance(element, dict):
+        return element
+    return json.loads(json.dumps(element, default=vars))
+
+def _normalize_question(question, group, group_topics, table):
+    qid = question['subelement'] + question['group'] + question['num']
+    out = {}
+    for key, value in question.items():
+        if key in ('subelement', 'group'):
+            if value != group[key if key == 'subelement' else 'group_id']:
+                out[key] = value
+        elif key == 'qid':
+            if value != qid:
+                out[key] = value
+        elif key in ('text', 'fcc'):
+            out[key] = table.add(value)
+        elif key == 'figure':
+            if value:
+                out[key] = table.add(value)
+        elif key == 'answers':
+            prefixes = [f'{letter}. ' for letter in _ANSWER_LETTERS[:len(value)]]
+            if all(answer.startswith(prefix) for answer, prefix in zip(value, prefixes)):
+                out[key] = table.add_list(answer[3:] for answer in value)
+            else:
+                out[key] = table.add_list(value)
+                out['answers_raw'] = True
+        elif key == 'topics':
+            if all(topic in group_topics for topic in value):
+                out[key] = [group_topics.index(topic) for topic in value]
+            else:
+                out['topic_strings'] = table.add_list(value)
+        else:
+            out[key] = value
+    return out
+
+def normalize_element(element):
+    """
+    Returns the schema 2 object of a schema 1 element JSON object (or Element)
+
+    """
+    element = element_dict(element)
+    table = _StringTable()
+    out = {'schema': SCHEMA_VERSION}
+    out.update((key, value) for key, value in element.items() if key != 'subelements')
+    out['strings'] = table.strings
+    subelements = out['subelements'] = []
+    for subelement in element['subelements']:
+        se_out = {}
+        for key, value in subelement.items():
+            if key == 'elem':
+                if value != element.get('elem'):
+                    se_out[key] = value
+            elif key == 'description':
+                se_out[key] = table.add(value)
+            elif key != 'groups':
+                se_out[key] = value
+        groups = se_out['groups'] = []
+        for group in subelement['groups']:
+            g_out = {}
+            for key, value in group.items():
+                if key == 'subelement':
+                    if value != subelement['sub_el']:
+                        g_out[key] = value
+                elif key == 'description':
+                    g_out[key] = table.add(value)
+                elif key in ('topics', 'subtopics'):
+                    g_out[key] = table.add_list(value)
+                elif key != 'questions':
+                    g_out[key] = value
+            group_topics = group.get('topics', [])
+            g_out['questions'] = [_normalize_question(question, group, group_topics, table)
+                                  for question in group['questions']]
+            groups.append(g_out)
+        subelements.append(se_out)
+    return out
+
+def _inflate_question(question, subelement, group_id, group_topics, strings):
+    out = {'subelement': question.get('subelement', subelement),
+           'group': question.get('group', group_id),
+           'num': question['num']}
+    out['qid'] = question.get('qid', out['subelement'] + out['group'] + out['num'])
+    for key, value in question.items():
+        if key in ('subelement', 'group', 'num', 'qid', 'answers_raw'):
+            continue
+        if key in ('text', 'fcc', 'figure'):
+            out[key] = strings[value]
+        elif key == 'answers':
+            if question.get('answers_raw'):
+                out[key] = [strings[pos] for pos in value]
+            else:
+                out[key] = [f'{letter}. {strings[pos]}'
+                            for letter, pos in zip(_ANSWER_LETTERS, value)]
+        elif key == 'topics':
+            out[key] = [group_topics[pos] for pos in value]
+        elif key == 'topic_strings':
+            out['topics'] = [strings[pos] for pos in value]
+        else:
+            out[key] = value
+        if key == 'correct' and 'figure' not in question:
+            out['figure'] = ''
+    return out
+
+def inflate_element(element):
+    """
+    Returns the schema 1 element JSON object of a schema 2 object, schema 1
+    objects are returned unchanged
+
+    """
+    if element.get('schema') != SCHEMA_VERSION:
+        return element
+    strings = element['strings']
+    out = {key: value for key, value in element.items()
+           if key not in ('schema', 'strings', 'subelements')}
+    subelements = out['subelements'] = []
+    for subelement in element['subelements']:
+        se_out = {'elem': subelement.get('elem', element.get('elem'))}
+        for key, value in subelement.items():
+            if key == 'description':
+                se_out[key] = strings[value]
+            elif key != 'groups':
+                se_out[key] = value
+        groups = se_out['groups'] = []
+        for group in subelement['groups']:
+            g_out = {'subelement': group.get('subelement', subelement['sub_el'])}
+            for key, value in group.items():
+                if key == 'description':
+                    g_out[key] = strings[value]
+                elif key in ('topics', 'subtopics'):
+                    g_out[key] = [strings[pos] for pos in value]
+                elif key != 'questions':
+                    g_out[key] = value
+            group_topics = g_out.get('topics', [])
+            g_out['questions'] = [_inflate_question(question, g_out['subelement'],
+                                                    g_out['group_id'], group_topics, strings)
+                                  for question in group['questions']]
+            groups.append(g_out)
+        subelements.append(se_out)
+    return out
+
+def read_element(element_FN):
+    """
+    Reads an element JSON file of either schema, gzip/lzma compressed or not,
+    returns the schema 1 object
+
+    """
+    with open_text(element_FN) as file:
+        return inflate_element(json.load(file))
+
+def write_element(element, out_FN, schema=SCHEMA_VERSION):
+    """
+    Writes an element JSON object (or Element) as schema 1 (indented, as
+    close_element writes it) or compact schema 2, compressed if out_FN ends
+    with .gz or .xz
+
+    """
+    if schema == SCHEMA_VERSION:
+        str_out = json.dumps(normalize_element(element), separators=_SEPARATORS,
+                             ensure_ascii=False)
+    else:
+        str_out = json.dumps(element, default=vars, indent=2)
+    os.makedirs(os.path.dirname(out_FN) or '.', exist_ok=True)
+    with open_text(out_FN, 'w') as file:
+        file.write(str_out)
+    return os.path.getsize(out_FN)
+
+def main():
+    """
+    Convert an element JSON file between the schemas if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Convert element JSON to/from schema 2')
+    parser.add_argument('in_FN', help='element JSON file, either schema')
+    parser.add_argument('out_FN', help='file to write')
+    parser.add_argument('--inflate', action='store_true', help='write schema 1')
+    args = parser.parse_args()
+    element = read_element(args.in_FN)
+    size = write_element(element, args.out_FN, 1 if args.inflate else SCHEMA_VERSION)
+    msg('Info', 'I701', f'{args.out_FN} written, schema {1 if args.inflate else SCHEMA_VERSION}: '
+        f'{size:,} bytes (from {os.path.getsize(args.in_FN):,})')
+
+if __name__ == '__main__':
+    main()
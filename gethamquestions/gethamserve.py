@@ -0,0 +1,363 @@
+#-*- coding: utf-8 -*-
+"""
+Query daemon over a Unix socket: element pools and help loaded once, kept hot
+
+Shell scripts and cron jobs looking up a few qids pay for interpreter startup,
+imports and a full load of the element and help JSON on every call.  The
+daemon loads the pools (ElementPool) and help (ElementHelp) once and answers
+requests over a Unix socket; the client needs the standard library only, so
+a lookup is one round trip.
+
+Protocol: every message is a 4 byte big-endian length and that many bytes of
+UTF-8 JSON.  A connection may carry any number of request/response pairs.
+
+    request   {"op": "questions", "qids": "T1A01 T1A02", "options": ""}
+    response  {"ok": true, "result": [...]}  or  {"ok": false, "error": "..."}
+
+    ops       ping                        pools, help entries, requests served
+              questions  qids, options    ElementPool.get_questions_by_ids records
+              help       qids             {qid: help}
+              related    qid, k           ElementPool.related
+              complete   query, count     Autocomplete.complete over the pools
+              fcc        reference        qids citing an FCC rule
+              reload                      read the pool and help files again
+              stop                        stop the daemon
+
+Question records are spliced from the pools' cached JSON, not serialized per
+request.  Requests are served one at a time (the lookups take microseconds),
+each connection in its own thread.
+
+Classes:
+    PoolServer
+    Client
+
+Functions:
+    send_message
+    recv_message
+    serve
+    main
+
+Usage
+    python gethamquestions.py --serve /tmp/getham.sock --pool output/element2.json
+        --pool output/element3.json --help-file aianswers2.history.json
+    python gethamserve.py /tmp/getham.sock questions T1A01 T1A02
+    python gethamserve.py /tmp/getham.sock related T1A01 --k 3
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from gethamquestionclasses import msg
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE = 64 << 20            # larger messages are refused
+OPS = ('ping', 'questions', 'help', 'related', 'complete', 'fcc', 'reload', 'stop')
+
+def send_message(sock, data):
+    """
+    Sends one message (JSON bytes) with its length header
+
+    """
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            raise ValueError(f'connection closed, {len(data)} of {size} bytes received')
+        data += chunk
+    return bytes(data)
+
+def recv_message(sock):
+    """
+    Returns the JSON bytes of the next message, None if the peer closed the
+    connection between messages
+
+    """
+    first = sock.recv(HEADER.size)
+    if not first:
+        return None
+    if len(first) < HEADER.size:
+        first += _recv_exact(sock, HEADER.size - len(first))
+    size, = HEADER.unpack(first)
+    if size > MAX_MESSAGE:
+        raise ValueError(f'message of {size:,} bytes, more than {MAX_MESSAGE:,}')
+    return _recv_exact(sock, size)
+
+def _qid_list(request):
+    qids = request['qids']
+    if isinstance(qids, str):
+        return qids.split()
+    if isinstance(qids, list) and all(isinstance(qid, str) for qid in qids):
+        return qids
+    raise TypeError(f'qids must be a string or a list of strings, not {qids!r}')
+
+def _text(request, key):
+    value = request[key]
+    if not isinstance(value, str):
+        raise TypeError(f'{key} must be a string, not {value!r}')
+    return value
+
+def _number(request, key, default):
+    value = request.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise TypeError(f'{key} must be an integer >= 0, not {value!r}')
+    return value
+
+class PoolServer:
+    """
+    The pools and help of the daemon and the request dispatch
+
+    ...
+
+    Attributes
+    ----------
+    pool_FNs : list
+        element JSON files, one ElementPool each
+    help_FNs : list
+        help history files, merged into one {qid: help}
+    pools : list
+    element_help : dict
+    requests : int
+        Requests served
+    stopping : bool
+        Set by the stop request
+
+    """
+    def __init__(self, pool_FNs, help_FNs=()):
+        self.pool_FNs = list(pool_FNs)
+        self.help_FNs = list(help_FNs)
+        self.pools = []
+        self.element_help = {}
+        self.requests = 0
+        self.stopping = False
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Reads the pool and help files, builds the lookup indexes
+
+        """
+        # imported here: the client uses this module without the pool classes
+        from gethamelementclasses import ElementPool, ElementHelp
+        pools = [ElementPool(element_FN=FN) for FN in self.pool_FNs]
+        element_help = {}
+        for help_FN in self.help_FNs:
+            element_help.update(ElementHelp(help_FN).element_help)
+        for pool in pools:
+            # build the qid index and the record index before the first request
+            pool.get_questions_by_ids(pool.get_qids()[:1])
+        self.pools = pools
+        self.element_help = element_help
+
+    def _pool_of(self, qid):
+        for pool in self.pools:
+            if qid in pool.get_ordinals():
+                return pool
+        return None
+
+    def handle(self, data):
+        """
+        Returns the response (JSON bytes) to a request (JSON bytes)
+
+        """
+        try:
+            request = json.loads(data)
+            op = request.get('op') if isinstance(request, dict) else None
+            if op not in OPS:
+                raise ValueError(f'unknown op {op!r}, one of {", ".join(OPS)}')
+            with self._lock:
+                self.requests += 1
+                result = getattr(self, f'_op_{op}')(request)
+        except Exception as err:  #pylint: disable-msg=broad-except
+            # any failure is the client's answer, the connection stays open
+            return json.dumps({'ok': False, 'error': f'{type(err).__name__}: {err}'}).encode()
+        if isinstance(result, bytes):
+            return b'{"ok":true,"result":' + result + b'}'
+        return json.dumps({'ok': True, 'result': result}).encode('utf-8')
+
+    def _op_ping(self, request):
+        return {'pools': [pool.element_pool['elem'] for pool in self.pools],
+                'questions': sum(len(pool.get_qids()) for pool in self.pools),
+                'help': len(self.element_help), 'requests': self.requests,
+                'uptime': round(time.time() - self.started, 1)}
+
+    def _op_questions(self, request):
+        qids = _qid_list(request)
+        options = _text(request, 'options') if 'options' in request else ''
+        # each pool returns a JSON array of cached records, joined without parsing
+        parts = [pool.get_questions_json(qids, options) for pool in self.pools]
+        return b'[' + b','.join(part[1:-1] for part in parts if len(part) > 2) + b']'
+
+    def _op_help(self, request):
+        return {qid: self.element_help[qid] for qid in _qid_list(request)
+                if qid in self.element_help}
+
+    def _op_related(self, request):
+        qid = _text(request, 'qid')
+        k = _number(request, 'k', 5)
+        pool = self._pool_of(qid)
+        return pool.related(qid, k) if pool else []
+
+    def _op_complete(self, request):
+        query = _text(request, 'query')
+        count = _number(request, 'count', 10)
+        found = [item for pool in self.pools
+                 for item in pool.get_autocomplete().complete(query, count)]
+        found.sort(key=lambda item: item['distance'])
+        return found[:count]
+
+    def _op_fcc(self, request):
+        reference = _text(request, 'reference')
+        return [qid for pool in self.pools for qid in pool.get_fcc_index().lookup(reference)]
+
+    def _op_reload(self, request):
+        self.load()
+        return self._op_ping(request)
+
+    def _op_stop(self, request):
+        self.stopping = True
+        return {'requests': self.requests}
+
+class _Handler(socketserver.BaseRequestHandler):
+    """
+    Serves the requests of one connection until the client closes it
+
+    """
+    def handle(self):
+        pool_server = self.server.pool_server
+        while True:
+            try:
+                data = recv_message(self.request)
+                if data is None:
+                    return
+                send_message(self.request, pool_server.handle(data))
+            except (OSError, ValueError) as err:
+                msg('Warning', 'W831', f'connection dropped: {err}')
+                return
+            if pool_server.stopping:
+                # shutdown waits for serve_forever, which runs in another thread
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+def _is_serving(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return False
+    return True
+
+def serve(socket_path, pool_FNs, help_FNs=()):
+    """
+    Loads the pools and help, serves requests on socket_path until stopped by
+    a stop request, Ctrl-C or SIGTERM
+
+    """
+    if os.path.exists(socket_path):
+        if _is_serving(socket_path):
+            msg('Error', 'E831', f'a daemon is already serving {socket_path}')
+            return
+        os.remove(socket_path)          # left over from a daemon that was killed
+    start = time.perf_counter()
+    pool_server = PoolServer(pool_FNs, help_FNs)
+    server = socketserver.ThreadingUnixStreamServer(socket_path, _Handler)
+    server.daemon_threads = True
+    server.pool_server = pool_server
+    os.chmod(socket_path, 0o600)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    ping = pool_server._op_ping({})
+    msg('Info', 'I831', f'serving {ping["questions"]} questions of elements '
+        f'{", ".join(map(str, ping["pools"]))} and {ping["help"]} help entries on {socket_path} '
+        f'(loaded in {time.perf_counter() - start:.2f}s), Ctrl-C to stop')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        msg('Info', 'I832', f'stopped after {pool_server.requests} requests')
+
+class Client:
+    """
+    A connection to the daemon, reused for any number of requests, i.e.
+
+        with Client('/tmp/getham.sock') as client:
+            records = client.request('questions', qids='T1A01 T1A02')
+
+    """
+    def __init__(self, socket_path, timeout=30.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(socket_path)
+
+    def request(self, op, **params):
+        """
+        Returns the result of one request, raises ValueError with the daemon's
+        error
+
+        """
+        send_message(self.sock, json.dumps(dict(params, op=op)).encode('utf-8'))
+        data = recv_message(self.sock)
+        if data is None:
+            raise ValueError('connection closed by the daemon')
+        response = json.loads(data)
+        if not response['ok']:
+            raise ValueError(response['error'])
+        return response['result']
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def main():
+    """
+    Send one request to the daemon and print the result if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Query the gethamquestions daemon')
+    parser.add_argument('socket', help='socket of the daemon (gethamquestions.py --serve)')
+    parser.add_argument('op', choices=OPS)
+    parser.add_argument('args', nargs='*', help='qids, a query or an FCC reference')
+    parser.add_argument('--k', type=int, default=5, help='related questions')
+    parser.add_argument('--count', type=int, default=10, help='completions')
+    parser.add_argument('--strip', action='store_true', help='strip the "A. " answer prefixes')
+    parser.add_argument('--indent', type=int, default=None, help='indent the JSON output')
+    args = parser.parse_args()
+    params = {'questions': {'qids': args.args,
+                            'options': 'strip-answer-prefix' if args.strip else ''},
+              'help': {'qids': args.args},
+              'related': {'qid': ' '.join(args.args), 'k': args.k},
+              'complete': {'query': ' '.join(args.args), 'count': args.count},
+              'fcc': {'reference': ' '.join(args.args)}}.get(args.op, {})
+    try:
+        with Client(args.socket) as client:
+            result = client.request(args.op, **params)
+    except (OSError, ValueError) as err:
+        msg('Error', 'E832', f'{args.socket}: {err}')
+        sys.exit(1)
+    print(json.dumps(result, indent=args.indent))
+
+if __name__ == '__main__':
+    main()
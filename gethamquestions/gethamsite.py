@@ -0,0 +1,250 @@
+#-*- coding: utf-8 -*-
+"""
+Incremental static study site: one HTML page per question, group and subelement
+
+The pages of an element pool and its help (ElementHelp) are served as static
+files, i.e. from a CDN:
+
+    site/element2/index.html       the subelements
+    site/element2/T1.html          the groups of a subelement
+    site/element2/T1A.html         the questions of a group
+    site/element2/T1A01.html       a question, its answers and help
+
+Every page is described by the data it shows (its context).  The sha256 of
+the context and PAGE_VERSION is kept per page in site/element2/manifest.json;
+a rebuild renders only the pages whose hash changed (an errata, a help edit)
+and deletes pages no longer in the pool.  Changed pages are rendered and
+written in a process pool, a few pages are rendered in process.
+
+Functions:
+    page_contexts
+    render_page
+    build_site
+    main
+
+Usage
+    python gethamsite.py output/element2.json site --help-file aianswers.history.json
+    python gethamsite.py output/element2.json site --workers 8
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from gethamquestionclasses import msg
+from gethamhelpcache import HELP_FIELDS
+from gethamschema import element_dict, inflate_element, read_element
+
+PAGE_VERSION = 1                  # change with the templates: every page is rendered again
+MANIFEST_FN = 'manifest.json'
+POOL_THRESHOLD = 32               # fewer changed pages are rendered in process
+_CORRECT = ' class="correct"'
+HELP_TITLES = {'topics': 'Topics', 'explanation': 'Explanation', 'memory_aid': 'Memory aid'}
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+</head>
+<body>
+<nav>{nav}</nav>
+<main>
+{body}
+</main>
+</body>
+</html>
+"""
+
+def _link(page, text):
+    return f'<a href="{html.escape(page)}.html">{html.escape(text)}</a>'
+
+def page_contexts(element, element_help=None):
+    """
+    Returns {page name: context} of every page of an element JSON object (or
+    Element), with help from an ElementHelp.element_help dict
+
+    """
+    element = inflate_element(element_dict(element))
+    element_help = element_help or {}
+    title = f'Element {element["elem"]} {element.get("elname", "")} ' \
+            f'{element["yrvalid"]["begin"]}-{element["yrvalid"]["end"]}'
+    pages = {'index': {'kind': 'element', 'title': title,
+                       'subelements': [[se['sub_el'], se['description']]
+                                       for se in element['subelements']]}}
+    qids = [q['qid'] for se in element['subelements'] for g in se['groups']
+            for q in g['questions']]
+    position = {qid: i for i, qid in enumerate(qids)}
+    for se in element['subelements']:
+        pages[se['sub_el']] = {
+            'kind': 'subelement', 'title': f'{se["sub_el"]} {se["description"]}',
+            'up': ['index', title],
+            'groups': [[g['subelement'] + g['group_id'], g['description']]
+                       for g in se['groups']]}
+        for g in se['groups']:
+            code = g['subelement'] + g['group_id']
+            pages[code] = {
+                'kind': 'group', 'title': f'{code} {g["description"]}',
+                'up': [se['sub_el'], se['description']],
+                'topics': g.get('topics', []),
+                'questions': [[q['qid'], q['text']] for q in g['questions']]}
+            for q in g['questions']:
+                i = position[q['qid']]
+                helps = element_help.get(q['qid']) or {}
+                pages[q['qid']] = {
+                    'kind': 'question', 'title': q['qid'],
+                    'up': [code, g['description']],
+                    'previous': qids[i - 1] if i else '',
+                    'next': qids[i + 1] if i + 1 < len(qids) else '',
+                    'text': q['text'], 'answers': q['answers'], 'correct': q['correct'],
+                    'figure': q['figure'], 'fcc': q['fcc'],
+                    'help': {field: helps[field] for field in HELP_FIELDS
+                             if helps.get(f'{field}_valid') and helps.get(field)}}
+    return pages
+
+def _context_hash(context):
+    data = json.dumps([PAGE_VERSION, context], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+def render_page(context):
+    """
+    Returns the HTML of a page context
+
+    """
+    kind = context['kind']
+    nav = [_link('index', 'Pool')]
+    if 'up' in context and context['up'][0] != 'index':
+        nav.append(_link(*context['up']))
+    if kind == 'question':
+        for name, label in (('previous', 'Previous'), ('next', 'Next')):
+            if context[name]:
+                nav.append(_link(context[name], f'{label} {context[name]}'))
+    body = [f'<h1>{html.escape(context["title"])}</h1>']
+    if kind == 'element':
+        body.append('<ul>' + ''.join(f'<li>{_link(sub_el, f"{sub_el} {description}")}</li>'
+                                     for sub_el, description in context['subelements'])
+                    + '</ul>')
+    elif kind == 'subelement':
+        body.append('<ul>' + ''.join(f'<li>{_link(code, f"{code} {description}")}</li>'
+                                     for code, description in context['groups']) + '</ul>')
+    elif kind == 'group':
+        if context['topics']:
+            body.append('<p class="topics">' + html.escape('; '.join(context['topics'])) + '</p>')
+        body.append('<ol>' + ''.join(f'<li>{_link(qid, qid)} {html.escape(text)}</li>'
+                                     for qid, text in context['questions']) + '</ol>')
+    else:
+        body.append(f'<p class="question">{html.escape(context["text"])}</p>')
+        if context['figure']:
+            body.append(f'<p class="figure">Figure {html.escape(context["figure"])}</p>')
+        body.append('<ol class="answers" type="A">' + ''.join(
+            f'<li{_CORRECT if answer[:1] == context["correct"] else ""}>'
+            f'{html.escape(answer[3:] if answer[1:3] == ". " else answer)}</li>'
+            for answer in context['answers']) + '</ol>')
+        body.append(f'<details><summary>Answer</summary><p>{html.escape(context["correct"])}'
+                    + (f' {html.escape(context["fcc"])}' if context['fcc'] else '')
+                    + '</p></details>')
+        for field, text in context['help'].items():
+            body.append(f'<section class="{field}"><h2>{HELP_TITLES[field]}</h2>'
+                        f'<p>{html.escape(text)}</p></section>')
+    return _PAGE.format(title=html.escape(context['title']), nav=' | '.join(nav),
+                        body='\n'.join(body))
+
+def _write_page(out_dir, name, context):
+    """
+    Renders and writes one page, returns its size (run in the process pool)
+
+    """
+    data = render_page(context).encode('utf-8')
+    with open(os.path.join(out_dir, f'{name}.html'), 'wb') as file:
+        file.write(data)
+    return len(data)
+
+def _write_pages(args):
+    out_dir, pages = args
+    return sum(_write_page(out_dir, name, context) for name, context in pages)
+
+def build_site(element, out_dir, element_help=None, workers=None, force=False):
+    """
+    Writes the changed pages of an element pool into out_dir
+
+    Parameters
+    ----------
+    element : Element or element JSON object
+    out_dir : str
+        The pool's site directory, i.e. site/element2
+    element_help : dict
+        ElementHelp.element_help, or None
+    workers : int
+        Processes of the pool, None for the number of CPUs
+    force : bool
+        Render every page
+
+    Returns
+    -------
+    dict of the page counts: 'pages', 'written', 'deleted', 'bytes'
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_FN = os.path.join(out_dir, MANIFEST_FN)
+    old_hashes = {}
+    if os.path.isfile(manifest_FN) and not force:
+        with open(manifest_FN, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        if manifest.get('version') == PAGE_VERSION:
+            old_hashes = manifest['pages']
+    pages = page_contexts(element, element_help)
+    hashes = {name: _context_hash(context) for name, context in pages.items()}
+    changed = [(name, pages[name]) for name, digest in hashes.items()
+               if old_hashes.get(name) != digest
+               or not os.path.isfile(os.path.join(out_dir, f'{name}.html'))]
+    if len(changed) < POOL_THRESHOLD or workers == 1:
+        written = _write_pages((out_dir, changed))
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunks = [(out_dir, changed[i::workers * 4]) for i in range(workers * 4)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            written = sum(executor.map(_write_pages, chunks))
+    deleted = 0
+    for name in old_hashes:
+        if name not in hashes:
+            page_FN = os.path.join(out_dir, f'{name}.html')
+            if os.path.isfile(page_FN):
+                os.remove(page_FN)
+                deleted += 1
+    tmp = manifest_FN + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as file:
+        json.dump({'version': PAGE_VERSION, 'pages': hashes}, file, indent=0)
+    os.replace(tmp, manifest_FN)
+    return {'pages': len(pages), 'written': len(changed), 'deleted': deleted, 'bytes': written}
+
+def main():
+    """
+    Build the static site of an element JSON file if called from commandline
+
+    """
+    # imported here: build_site takes the help dict, only the command line reads the file
+    from gethamelementclasses import ElementHelp
+    parser = argparse.ArgumentParser(description='Static study site of an element pool')
+    parser.add_argument('element_FN', help='element JSON file')
+    parser.add_argument('site_dir', help='site directory, the pool is written to element{N}/')
+    parser.add_argument('--help-file', dest='help_FN', default='',
+                        help='help history file, i.e. aianswers.history.json')
+    parser.add_argument('--workers', type=int, default=None, help='render processes')
+    parser.add_argument('--force', action='store_true', help='render every page')
+    args = parser.parse_args()
+    element = read_element(args.element_FN)
+    element_help = ElementHelp(args.help_FN).element_help if args.help_FN else None
+    out_dir = os.path.join(args.site_dir, f'element{element["elem"]}')
+    start = time.perf_counter()
+    counts = build_site(element, out_dir, element_help, args.workers, args.force)
+    msg('Info', 'I811', f'{out_dir}: {counts["written"]} of {counts["pages"]} pages written '
+        f'({counts["bytes"]:,} bytes), {counts["deleted"]} deleted in '
+        f'{time.perf_counter() - start:.2f}s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#-*- coding: utf-8 -*-
+"""
+Load element pools into an SQLite database for SQL queries across pool years
+
+Tables (one row per pool year in elements, loading a year again replaces it):
+
+    elements     (id, elem, elname, yrvalid_begin, yrvalid_end,
+                  effective_begin, effective_end, filename, timestamp)
+    subelements  (id, element_id, sub_el, description, numq, numg)
+    groups       (id, subelement_id, code, group_id, description)    code: T1A
+    topics       (id, group_ref, position, topic)
+    questions    (id, element_id, group_ref, qid, num, text, correct, figure, fcc)
+    answers      (question_id, letter, text, is_correct)
+    question_topics (question_id, topic_id)
+    questions_fts   full text (fts5) over question and answer text
+
+Indexes on questions qid, group, figure and fcc and on groups code.  A pool is
+bulk loaded with executemany in one transaction.
+
+    SELECT e.yrvalid_begin, q.qid, q.fcc FROM questions q
+      JOIN elements e ON e.id = q.element_id WHERE q.fcc LIKE '%97.119%';
+    SELECT qid FROM questions_fts WHERE questions_fts MATCH 'antenna AND impedance';
+
+Functions:
+    connect
+    load_element
+    main
+
+Usage
+    python gethamquestions.py element2.docx --sqlite pools.db
+    python gethamsqlite.py pools.db output/element2.json output/element3.json.gz
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import sqlite3
+from gethamquestionclasses import msg
+from gethamschema import element_dict, inflate_element, read_element
+
+SCHEMA = """
+PRAGMA foreign_keys = ON;
+CREATE TABLE IF NOT EXISTS elements (
+    id INTEGER PRIMARY KEY, elem TEXT NOT NULL, elname TEXT,
+    yrvalid_begin TEXT, yrvalid_end TEXT, effective_begin TEXT, effective_end TEXT,
+    filename TEXT, timestamp TEXT, UNIQUE (elem, yrvalid_begin));
+CREATE TABLE IF NOT EXISTS subelements (
+    id INTEGER PRIMARY KEY,
+    element_id INTEGER NOT NULL REFERENCES elements(id) ON DELETE CASCADE,
+    sub_el TEXT NOT NULL, description TEXT, numq INTEGER, numg INTEGER);
+CREATE TABLE IF NOT EXISTS groups (
+    id INTEGER PRIMARY KEY,
+    subelement_id INTEGER NOT NULL REFERENCES subelements(id) ON DELETE CASCADE,
+    code TEXT NOT NULL, group_id TEXT NOT NULL, description TEXT);
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY,
+    group_ref INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL, topic TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    element_id INTEGER NOT NULL REFERENCES elements(id) ON DELETE CASCADE,
+    group_ref INTEGER NOT NULL REFERENCES groups(id) ON DELETE CASCADE,
+    qid TEXT NOT NULL, num TEXT, text TEXT, correct TEXT, figure TEXT, fcc TEXT);
+CREATE TABLE IF NOT EXISTS answers (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    letter TEXT NOT NULL, text TEXT, is_correct INTEGER NOT NULL,
+    PRIMARY KEY (question_id, letter));
+CREATE TABLE IF NOT EXISTS question_topics (
+    question_id INTEGER NOT NULL REFERENCES questions(id) ON DELETE CASCADE,
+    topic_id INTEGER NOT NULL REFERENCES topics(id) ON DELETE CASCADE,
+    PRIMARY KEY (question_id, topic_id));
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(qid UNINDEXED, text, answers);
+CREATE INDEX IF NOT EXISTS questions_qid ON questions (qid);
+CREATE INDEX IF NOT EXISTS questions_group ON questions (group_ref);
+CREATE INDEX IF NOT EXISTS questions_figure ON questions (figure) WHERE figure <> '';
+CREATE INDEX IF NOT EXISTS questions_fcc ON questions (fcc);
+CREATE INDEX IF NOT EXISTS groups_code ON groups (code);
+CREATE INDEX IF NOT EXISTS subelements_element ON subelements (element_id);
+CREATE INDEX IF NOT EXISTS topics_group ON topics (group_ref);
+"""
+ANSWER_LETTERS = 'ABCDEFGH'
+
+def connect(db_FN):
+    """
+    Opens (and creates the tables of) a pools database
+
+    """
+    conn = sqlite3.connect(db_FN)
+    conn.executescript(SCHEMA)
+    return conn
+
+def _next_id(conn, table):
+    return conn.execute(f'SELECT coalesce(max(id), 0) + 1 FROM {table}').fetchone()[0]
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def load_element(conn, element):
+    """
+    Loads an Element (or element JSON object, either schema) in one transaction,
+    replacing an earlier load of the same element and pool years.  Returns the
+    number of questions loaded
+
+    """
+    element = inflate_element(element_dict(element))
+    yrvalid = element.get('yrvalid') or {}
+    effective = element.get('effective') or {}
+    subelement_rows = []
+    group_rows = []
+    topic_rows = []
+    question_rows = []
+    answer_rows = []
+    question_topic_rows = []
+    fts_rows = []
+    with conn:
+        old = conn.execute('SELECT id FROM elements WHERE elem = ? AND yrvalid_begin IS ?',
+                           (element['elem'], yrvalid.get('begin'))).fetchone()
+        if old:
+            conn.execute('DELETE FROM questions_fts WHERE rowid IN '
+                         '(SELECT id FROM questions WHERE element_id = ?)', old)
+            conn.execute('DELETE FROM elements WHERE id = ?', old)
+        element_id = conn.execute(
+            'INSERT INTO elements (elem, elname, yrvalid_begin, yrvalid_end, effective_begin,'
+            ' effective_end, filename, timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (element['elem'], element.get('elname'), yrvalid.get('begin'), yrvalid.get('end'),
+             effective.get('begin'), effective.get('end'), element.get('filename'),
+             str(element.get('timestamp', '')))).lastrowid
+        subelement_id = _next_id(conn, 'subelements')
+        group_id = _next_id(conn, 'groups')
+        topic_id = _next_id(conn, 'topics')
+        question_id = _next_id(conn, 'questions')
+        for subelement in element['subelements']:
+            subelement_rows.append((subelement_id, element_id, subelement['sub_el'],
+                                    subelement.get('description'),
+                                    _to_int(subelement.get('numq')),
+                                    _to_int(subelement.get('numg'))))
+            for group in subelement['groups']:
+                group_rows.append((group_id, subelement_id,
+                                   group['subelement'] + group['group_id'], group['group_id'],
+                                   group.get('description')))
+                topic_ids = {}
+                for position, topic in enumerate(group.get('topics', [])):
+                    topic_rows.append((topic_id, group_id, position, topic))
+                    topic_ids.setdefault(topic, topic_id)
+                    topic_id += 1
+                for question in group['questions']:
+                    question_rows.append((question_id, element_id, group_id, question['qid'],
+                                          question['num'], question['text'],
+                                          question['correct'], question['figure'],
+                                          question['fcc']))
+                    for letter, answer in zip(ANSWER_LETTERS, question['answers']):
+                        answer_rows.append((question_id, letter, answer,
+                                            int(letter == question['correct'])))
+                    for topic in dict.fromkeys(question.get('topics', [])):
+                        if topic in topic_ids:
+                            question_topic_rows.append((question_id, topic_ids[topic]))
+                    fts_rows.append((question_id, question['qid'], question['text'],
+                                     ' '.join(question['answers'])))
+                    question_id += 1
+                group_id += 1
+            subelement_id += 1
+        conn.executemany('INSERT INTO subelements VALUES (?, ?, ?, ?, ?, ?)', subelement_rows)
+        conn.executemany('INSERT INTO groups VALUES (?, ?, ?, ?, ?)', group_rows)
+        conn.executemany('INSERT INTO topics VALUES (?, ?, ?, ?)', topic_rows)
+        conn.executemany('INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         question_rows)
+        conn.executemany('INSERT INTO answers VALUES (?, ?, ?, ?)', answer_rows)
+        conn.executemany('INSERT INTO question_topics VALUES (?, ?)', question_topic_rows)
+        conn.executemany('INSERT INTO questions_fts (rowid, qid, text, answers) '
+                         'VALUES (?, ?, ?, ?)', fts_rows)
+    return len(question_rows)
+
+def main():
+    """
+    Load element JSON files into a pools database if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Load element JSON files into SQLite')
+    parser.add_argument('db_FN', help='database file, i.e. pools.db')
+    parser.add_argument('element_FNs', nargs='+', help='element JSON files, either schema')
+    args = parser.parse_args()
+    conn = connect(args.db_FN)
+    try:
+        for element_FN in args.element_FNs:
+            count = load_element(conn, read_element(element_FN))
+            msg('Info', 'I731', f'{element_FN}: {count} questions loaded into {args.db_FN}')
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    main()
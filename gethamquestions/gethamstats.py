@@ -0,0 +1,273 @@
+#-*- coding: utf-8 -*-
+"""
+Streaming question difficulty statistics from attempt logs
+
+An attempt log is NDJSON, one attempt per line:
+    {"qid": "T1A01", "choice": "B", ...}
+Lines are read in chunks of a fixed size, mapped to ElementPool ordinals and
+counted with np.bincount, so memory is bounded by the chunk size and the pool,
+not the log.  The only state is a (questions x 5) count matrix (A, B, C, D,
+other), which adds up: shards of a log can be counted in parallel and merged.
+Difficulty, distractor frequencies and per group/subelement aggregates are all
+derived from it.
+
+Classes:
+
+    AttemptStats
+
+Functions:
+    main
+
+Usage
+    python gethamstats.py element2.json attempts-*.ndjson --jobs 4 --out stats.json
+    cat attempts.ndjson | python gethamstats.py element2.json -
+    python gethamstats.py element2.json --merge stats-a.json stats-b.json --out stats.json
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from gethamquestionclasses import msg
+from gethamelementclasses import ElementPool
+from gethamgrading import letters_to_codes
+
+CHOICES = ('A', 'B', 'C', 'D', 'other')
+CHUNK_LINES = 100000
+
+class AttemptStats:
+    """
+    A class to count attempts per question and choice
+
+    ...
+
+    Attributes
+    ----------
+    qids : list
+        qid of each ordinal
+    counts : numpy int64 array, shape (questions, 5)
+        Number of times each choice (A, B, C, D, other) was picked
+    correct : numpy uint8 array
+        The correct answer code of each ordinal
+    unknown : int
+        Attempts with a qid that is not in the pool
+    bad_lines : int
+        Lines that could not be parsed
+
+    """
+    def __init__(self, element_pool):
+        if not isinstance(element_pool, ElementPool):
+            element_pool = ElementPool(element_pool)
+        self.qids = element_pool.get_qids()
+        self.ordinals = element_pool.get_ordinals()
+        self.correct = letters_to_codes([q['correct'] for q in element_pool.iter_questions()])
+        self.counts = np.zeros((len(self.qids), len(CHOICES)), dtype=np.int64)
+        self.unknown = 0
+        self.bad_lines = 0
+
+    def add(self, qid_ordinals, choice_codes):
+        """
+        Counts a chunk of attempts given as ordinal and choice code arrays
+
+        """
+        codes = np.minimum(np.asarray(choice_codes, dtype=np.intp), len(CHOICES) - 1)
+        keys = np.asarray(qid_ordinals, dtype=np.intp) * len(CHOICES) + codes
+        self.counts += np.bincount(keys, minlength=self.counts.size).reshape(self.counts.shape)
+
+    def add_lines(self, lines, chunk_lines=CHUNK_LINES):
+        """
+        Counts the attempts of an iterable of NDJSON lines, chunk by chunk
+
+        """
+        ordinals = self.ordinals
+        chunk_ords = []
+        chunk_choices = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                attempt = json.loads(line)
+                ordinal = ordinals.get(attempt['qid'])
+                choice = str(attempt.get('choice') or ' ')[:1]
+            except (ValueError, KeyError, TypeError):
+                self.bad_lines += 1
+                continue
+            if ordinal is None:
+                self.unknown += 1
+                continue
+            chunk_ords.append(ordinal)
+            chunk_choices.append(choice)
+            if len(chunk_ords) >= chunk_lines:
+                self.add(chunk_ords, letters_to_codes(chunk_choices))
+                chunk_ords = []
+                chunk_choices = []
+        if chunk_ords:
+            self.add(chunk_ords, letters_to_codes(chunk_choices))
+        return self
+
+    def add_file(self, ndjson_FN, chunk_lines=CHUNK_LINES):
+        """
+        Counts the attempts of an NDJSON file ('-' for stdin)
+
+        """
+        if ndjson_FN == '-':
+            return self.add_lines(sys.stdin, chunk_lines)
+        with open(ndjson_FN, 'r', encoding='utf-8') as file:
+            return self.add_lines(file, chunk_lines)
+
+    def merge(self, other):
+        """
+        Adds the counts of another AttemptStats for the same pool
+
+        """
+        if other.qids != self.qids:
+            raise ValueError('cannot merge statistics of different pools')
+        self.counts += other.counts
+        self.unknown += other.unknown
+        self.bad_lines += other.bad_lines
+        return self
+
+    def attempts(self):
+        """
+        Returns the number of attempts per ordinal
+
+        """
+        return self.counts.sum(axis=1)
+
+    def correct_counts(self):
+        """
+        Returns the number of correct attempts per ordinal
+
+        """
+        return self.counts[np.arange(len(self.qids)), self.correct]
+
+    def difficulty(self):
+        """
+        Returns the fraction of wrong attempts per ordinal (nan if never attempted)
+
+        """
+        attempts = self.attempts()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return 1.0 - self.correct_counts() / attempts
+
+    def choice_frequency(self):
+        """
+        Returns per ordinal the fraction of attempts picking A, B, C, D, other
+
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.counts / self.attempts()[:, None]
+
+    def aggregate(self, level='group'):
+        """
+        Returns {id: {'attempts', 'correct', 'difficulty'}} per 'group' (i.e. T1A)
+        or 'subelement' (i.e. T1)
+
+        """
+        width = 3 if level == 'group' else 2
+        keys = [qid[:width] for qid in self.qids]
+        names = sorted(set(keys))
+        index = {name: i for i, name in enumerate(names)}
+        key_ords = np.array([index[key] for key in keys], dtype=np.intp)
+        attempts = np.bincount(key_ords, weights=self.attempts(), minlength=len(names))
+        correct = np.bincount(key_ords, weights=self.correct_counts(), minlength=len(names))
+        result = {}
+        for i, name in enumerate(names):
+            result[name] = {'attempts': int(attempts[i]), 'correct': int(correct[i]),
+                            'difficulty': 1.0 - correct[i] / attempts[i] if attempts[i]
+                                          else None}
+        return result
+
+    def hardest(self, count=10, min_attempts=1):
+        """
+        Returns [(qid, difficulty, attempts)] for the hardest questions
+
+        """
+        attempts = self.attempts()
+        difficulty = np.where(attempts >= min_attempts, self.difficulty(), -1.0)
+        order = np.argsort(-difficulty, kind='stable')[:count]
+        return [(self.qids[i], float(difficulty[i]), int(attempts[i]))
+                for i in order if difficulty[i] >= 0]
+
+    def to_dict(self):
+        """
+        Returns a JSON serializable dict of the statistics, for merging shards
+
+        """
+        return {'qids': self.qids, 'choices': list(CHOICES), 'counts': self.counts.tolist(),
+                'unknown': self.unknown, 'bad_lines': self.bad_lines,
+                'groups': self.aggregate('group'),
+                'subelements': self.aggregate('subelement')}
+
+    def save(self, stats_FN):
+        """
+        Writes the statistics as JSON
+
+        """
+        with open(stats_FN, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file)
+
+    def load(self, stats_FN):
+        """
+        Adds the counts of a statistics file written by save
+
+        """
+        with open(stats_FN, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data['qids'] != self.qids:
+            raise ValueError(f'{stats_FN}: statistics of a different pool')
+        self.counts += np.array(data['counts'], dtype=np.int64)
+        self.unknown += data['unknown']
+        self.bad_lines += data['bad_lines']
+        return self
+
+def _count_file(element_FN, ndjson_FN):
+    """
+    Process pool worker: returns (counts, unknown, bad lines) of one NDJSON file
+
+    """
+    with open(element_FN, 'r', encoding='utf-8-sig') as file:
+        stats = AttemptStats(json.load(file))
+    stats.add_file(ndjson_FN)
+    return stats.counts, stats.unknown, stats.bad_lines
+
+def main():
+    """
+    Count attempt logs or merge statistics files if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Question statistics from attempt logs')
+    parser.add_argument('element_FN', help='element JSON file, i.e. element2.json')
+    parser.add_argument('files', nargs='*', help="NDJSON attempt logs, '-' for stdin")
+    parser.add_argument('--merge', nargs='*', default=[], help='statistics files to merge')
+    parser.add_argument('--jobs', type=int, default=1, help='files counted in parallel')
+    parser.add_argument('--out', default='', help='statistics file to write')
+    args = parser.parse_args()
+    with open(args.element_FN, 'r', encoding='utf-8-sig') as file:
+        stats = AttemptStats(json.load(file))
+    for stats_FN in args.merge:
+        stats.load(stats_FN)
+    if args.jobs > 1 and '-' not in args.files:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            shards = pool.map(_count_file, [args.element_FN] * len(args.files), args.files)
+            for counts, unknown, bad_lines in shards:
+                stats.counts += counts
+                stats.unknown += unknown
+                stats.bad_lines += bad_lines
+    else:
+        for ndjson_FN in args.files:
+            stats.add_file(ndjson_FN)
+    msg('Info', 'I661', f'attempts={int(stats.counts.sum())} unknown qids={stats.unknown} '
+        f'bad lines={stats.bad_lines}')
+    for qid, difficulty, attempts in stats.hardest(10):
+        msg('Info', 'I662', f'{qid}: difficulty={difficulty:.2f} attempts={attempts}')
+    if args.out:
+        stats.save(args.out)
+        msg('Info', 'I663', f'statistics written to {args.out}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#-*- coding: utf-8 -*-
+"""
+A local stub of a chat completion endpoint, for offline runs and benchmarks
+of gethamenrichment.py
+
+The stub answers POST /v1/chat/completions with canned help for every "#qid"
+found in the user prompt.  Latency grows with the prompt size, and a fraction of
+requests can be failed with HTTP 429 to exercise retry and backoff.
+
+Functions:
+    start_stub_server
+    main
+
+Usage
+    python gethamstubllm.py --port 8765 --latency 0.2 --fail-rate 0.05
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from gethamquestionclasses import msg
+
+REGEX_QID = re.compile(r'#(?P<qid>[TGE]\d[A-H]\d\d)\s')
+
+def stub_answer(qid):
+    """
+    Returns canned help for a question id
+
+    """
+    return {
+        'qid': qid,
+        'topics': f'Stub topic for {qid}; Second stub topic',
+        'explanation': f'Stub explanation for question {qid}.',
+        'memory_aid': f'Stub memory aid for {qid}.',
+    }
+
+def _response(status, reason, payload):
+    body = json.dumps(payload).encode('utf-8')
+    head = (f'HTTP/1.1 {status} {reason}\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n')
+    return head.encode('latin-1') + body
+
+async def start_stub_server(host='127.0.0.1', port=8765, latency=0.2, fail_rate=0.0,
+                            per_kchar=0.05):
+    """
+    Start the stub server and return the asyncio Server (port 0 picks a free port)
+
+    Parameters
+    ----------
+    latency : float
+        Fixed seconds of delay per request
+    fail_rate : float
+        Fraction of requests answered with HTTP 429
+    per_kchar : float
+        Additional seconds of delay per 1000 characters of prompt
+    """
+
+    async def handle(reader, writer):
+        try:
+            await reader.readline()         # request line, any path is accepted
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                if key.strip().lower() == 'content-length':
+                    length = int(value)
+            request = json.loads(await reader.readexactly(length)) if length else {}
+            prompt = ''.join(m.get('content', '') for m in request.get('messages', [])
+                             if m.get('role') == 'user')
+            await asyncio.sleep(latency + per_kchar * len(prompt) / 1000)
+            if random.random() < fail_rate:
+                writer.write(_response(429, 'Too Many Requests',
+                                       {'error': {'message': 'stub rate limit'}}))
+            else:
+                answers = [stub_answer(m.group('qid')) for m in REGEX_QID.finditer(prompt)]
+                writer.write(_response(200, 'OK', {
+                    'model': request.get('model', 'stub'),
+                    'choices': [{'index': 0, 'message': {
+                        'role': 'assistant', 'content': json.dumps(answers)}}],
+                }))
+            await writer.drain()
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError) as err:
+            msg('Warning', 'W611', f'stub request failed: {err}')
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+async def _serve(args):
+    server = await start_stub_server(args.host, args.port, args.latency, args.fail_rate)
+    msg('Info', 'I611', f'stub LLM listening on http://{args.host}:{args.port}'
+        '/v1/chat/completions')
+    async with server:
+        await server.serve_forever()
+
+def main():
+    """
+    Run the stub server if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Local stub chat completion server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+#-*- coding: utf-8 -*-
+"""
+Compact per user study state: mastery bitsets and a spaced repetition scheduler
+
+Questions are addressed by their dense ordinal in an ElementPool
+(ElementPool.get_ordinals()).  For each user the state is
+
+    mastered - a bitset, one bit per question
+    seen     - a bitset of the questions scheduled at least once
+    heap     - a binary heap of packed ints (due minute, Leitner box, ordinal),
+               one per seen question; the root is the next question due
+    next_new - a cursor to the next question never seen
+
+so picking the next question is a look at the heap root (constant cost) and
+reviewing it is one heap replace, O(log n).  A user serializes to
+12 + 2 * n/8 + 6 * seen bytes (116 bytes plus 6 per seen question for the
+Technician pool); the StudyStateStore keeps idle users in that form and the
+recently reviewed users decoded in a bounded LRU cache.  The next question of
+an idle user is read from the header and heap root of its bytes.
+
+Classes:
+
+    UserStudyState
+    StudyStateStore
+
+Functions:
+    minutes
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import heapq
+import struct
+import time
+from collections import OrderedDict
+from gethamelementclasses import ElementPool
+
+# review interval in minutes per Leitner box; reaching the last box is mastery
+INTERVALS = (10, 1440, 3 * 1440, 7 * 1440, 16 * 1440, 35 * 1440)
+MASTERED_BOX = len(INTERVALS) - 1
+EPOCH = 1577836800                  # 2020-01-01 UTC, due times are minutes from here
+_ORD_BITS = 16
+_BOX_BITS = 4
+_ORD_MASK = (1 << _ORD_BITS) - 1
+_BOX_MASK = (1 << _BOX_BITS) - 1
+_HEADER = struct.Struct('<4sHHI')    # magic, num_questions, next_new, heap length
+_MAGIC = b'GHS1'
+_ENTRY = struct.Struct('<IH')
+STATE_CACHE_SIZE = 1024             # decoded users kept by a StudyStateStore
+
+def minutes(now=None):
+    """
+    Returns time (epoch seconds, default now) as minutes since 2020-01-01
+
+    """
+    return int(((time.time() if now is None else now) - EPOCH) // 60)
+
+def _pack(due, box, ordinal):
+    return (due << (_ORD_BITS + _BOX_BITS)) | (box << _ORD_BITS) | ordinal
+
+def _unpack(entry):
+    return entry >> (_ORD_BITS + _BOX_BITS), (entry >> _ORD_BITS) & _BOX_MASK, \
+           entry & _ORD_MASK
+
+class UserStudyState:
+    """
+    A class to represent the study state of one user
+
+    ...
+
+    Attributes
+    ----------
+    num_questions : int
+        Number of questions in the pool
+    mastered : bytearray
+        Bitset, bit i is set if question ordinal i is mastered
+    seen : bytearray
+        Bitset, bit i is set if question ordinal i is in the heap
+    heap : list of int
+        Packed (due minute, box, ordinal) entries, a heapq heap
+    next_new : int
+        All ordinals below next_new have been seen, next_new itself is not
+
+    """
+    def __init__(self, num_questions):
+        self.num_questions = num_questions
+        self.mastered = bytearray((num_questions + 7) // 8)
+        self.seen = bytearray((num_questions + 7) // 8)
+        self.heap = []
+        self.next_new = 0
+
+    def __str__(self):
+        return (f'UserStudyState(questions={self.num_questions}, seen={len(self.heap)}, '
+                f'mastered={self.mastered_count()})')
+
+    @staticmethod
+    def _test(bits, ordinal):
+        return bits[ordinal >> 3] >> (ordinal & 7) & 1
+
+    @staticmethod
+    def _set(bits, ordinal, value):
+        if value:
+            bits[ordinal >> 3] |= 1 << (ordinal & 7)
+        else:
+            bits[ordinal >> 3] &= ~(1 << (ordinal & 7)) & 0xff
+
+    def is_mastered(self, ordinal):
+        """
+        Returns True if the question ordinal is mastered
+
+        """
+        return bool(self._test(self.mastered, ordinal))
+
+    def set_mastered(self, ordinal, value=True):
+        """
+        Sets (or clears) mastery of a question ordinal without scheduling it
+
+        """
+        self._set(self.mastered, ordinal, value)
+
+    def import_mastered(self, ordinals, now=None):
+        """
+        Marks questions mastered and schedules the unseen ones in the last box,
+        so they are not offered as new questions.  Returns the number scheduled
+
+        """
+        due = minutes(now) + INTERVALS[MASTERED_BOX]
+        scheduled = 0
+        for ordinal in ordinals:
+            self._set(self.mastered, ordinal, True)
+            if not self._test(self.seen, ordinal):
+                self.heap.append(_pack(due, MASTERED_BOX, ordinal))
+                self._set(self.seen, ordinal, True)
+                scheduled += 1
+        if scheduled:
+            heapq.heapify(self.heap)
+            self._advance_new()
+        return scheduled
+
+    def mastered_count(self):
+        """
+        Returns the number of mastered questions
+
+        """
+        return bin(int.from_bytes(self.mastered, 'little')).count('1')
+
+    def mastered_ordinals(self):
+        """
+        Returns the list of mastered ordinals
+
+        """
+        value = int.from_bytes(self.mastered, 'little')
+        return [i for i in range(self.num_questions) if value >> i & 1]
+
+    def next_question(self, now=None):
+        """
+        Returns the ordinal to study next: the most overdue question, else the
+        next question never seen, else the question due soonest (None if the
+        pool is empty)
+
+        """
+        now = minutes(now)
+        if self.heap and self.heap[0] >> (_ORD_BITS + _BOX_BITS) <= now:
+            return self.heap[0] & _ORD_MASK
+        self._advance_new()
+        if self.next_new < self.num_questions:
+            return self.next_new
+        return self.heap[0] & _ORD_MASK if self.heap else None
+
+    def _advance_new(self):
+        while self.next_new < self.num_questions and self._test(self.seen, self.next_new):
+            self.next_new += 1
+
+    @classmethod
+    def peek_next(cls, data, now=None):
+        """
+        Returns next_question of a state in binary form, reading the header and
+        the heap root only
+
+        """
+        magic, num_questions, next_new, heap_len = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f'not a study state record: {magic!r}')
+        size = (num_questions + 7) // 8
+        seen_pos = _HEADER.size + size
+        root = None
+        if heap_len:
+            high, low = _ENTRY.unpack_from(data, seen_pos + size)
+            root = (high << _ORD_BITS) | low
+        if root is not None and root >> (_ORD_BITS + _BOX_BITS) <= minutes(now):
+            return root & _ORD_MASK
+        if next_new < num_questions:
+            return next_new
+        return None if root is None else root & _ORD_MASK
+
+    def due_count(self, now=None):
+        """
+        Returns the number of seen questions that are due
+
+        """
+        now = minutes(now)
+        return sum(1 for entry in self.heap if entry >> (_ORD_BITS + _BOX_BITS) <= now)
+
+    def review(self, ordinal, correct, now=None):
+        """
+        Records an answer: a correct answer moves the question up one box,
+        a wrong answer moves it back to the first box and clears mastery.
+        Returns the new due time (minutes)
+
+        """
+        now = minutes(now)
+        box = -1
+        index = None
+        if self._test(self.seen, ordinal):
+            if self.heap[0] & _ORD_MASK == ordinal:
+                index = 0
+            else:
+                index = next(i for i, entry in enumerate(self.heap)
+                             if entry & _ORD_MASK == ordinal)
+            box = _unpack(self.heap[index])[1]
+        box = min(box + 1, MASTERED_BOX) if correct else 0
+        due = now + INTERVALS[box]
+        entry = _pack(due, box, ordinal)
+        if index == 0:
+            heapq.heapreplace(self.heap, entry)
+        elif index is not None:
+            # reviewed out of schedule order: O(n), the usual case is the root
+            self.heap[index] = entry
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, entry)
+            self._set(self.seen, ordinal, True)
+            self._advance_new()
+        self._set(self.mastered, ordinal, box == MASTERED_BOX)
+        return due
+
+    def to_bytes(self):
+        """
+        Returns the compact binary form of the state
+
+        """
+        heap = b''.join(_ENTRY.pack(entry >> _ORD_BITS, entry & _ORD_MASK)
+                        for entry in self.heap)
+        return _HEADER.pack(_MAGIC, self.num_questions, self.next_new, len(self.heap)) \
+            + bytes(self.mastered) + bytes(self.seen) + heap
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Returns a UserStudyState from its binary form
+
+        """
+        magic, num_questions, next_new, heap_len = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError(f'not a study state record: {magic!r}')
+        state = cls(num_questions)
+        state.next_new = next_new
+        pos = _HEADER.size
+        size = len(state.mastered)
+        state.mastered = bytearray(data[pos:pos + size])
+        state.seen = bytearray(data[pos + size:pos + 2 * size])
+        pos += 2 * size
+        # entries were written in heap order, so the list is already a heap
+        state.heap = [(high << _ORD_BITS) | low
+                      for high, low in _ENTRY.iter_unpack(data[pos:pos + 6 * heap_len])]
+        return state
+
+class StudyStateStore:
+    """
+    A class to hold the study state of many users in compact binary form
+
+    ...
+
+    Attributes
+    ----------
+    qids : list
+        qid of each ordinal
+    ordinals : dict
+        qid -> ordinal
+    users : dict
+        user id -> bytes (UserStudyState.to_bytes()), of a cached user as of
+        its eviction or the last flush
+
+    """
+    def __init__(self, element_pool, cache_size=STATE_CACHE_SIZE):
+        if not isinstance(element_pool, ElementPool):
+            element_pool = ElementPool(element_pool)
+        self.qids = element_pool.get_qids()
+        self.ordinals = element_pool.get_ordinals()
+        self.users = {}
+        self.cache_size = cache_size
+        self._states = OrderedDict()    # user id -> UserStudyState, least recent first
+
+    def __len__(self):
+        return len(self.users.keys() | self._states.keys())
+
+    def get(self, user_id):
+        """
+        Returns the UserStudyState of a user (a new one for an unknown user).
+        The state of a cached user is shared, changes are kept
+
+        """
+        state = self._states.get(user_id)
+        if state is not None:
+            self._states.move_to_end(user_id)
+            return state
+        data = self.users.get(user_id)
+        if data is None:
+            return UserStudyState(len(self.qids))
+        return UserStudyState.from_bytes(data)
+
+    def put(self, user_id, state):
+        """
+        Stores the state of a user in the cache, the least recent user is
+        encoded when the cache is full
+
+        """
+        self._states[user_id] = state
+        self._states.move_to_end(user_id)
+        while len(self._states) > self.cache_size:
+            old_id, old_state = self._states.popitem(last=False)
+            self.users[old_id] = old_state.to_bytes()
+
+    def flush(self):
+        """
+        Encodes the cached states into users
+
+        """
+        for user_id, state in self._states.items():
+            self.users[user_id] = state.to_bytes()
+
+    def import_mastered(self, user_id, qids, now=None):
+        """
+        Sets mastery from a legacy list of qid strings and schedules those
+        questions for review in the last box, unknown qids are ignored
+
+        """
+        state = self.get(user_id)
+        state.import_mastered([self.ordinals[qid] for qid in qids if qid in self.ordinals], now)
+        self.put(user_id, state)
+        return state
+
+    def next_qid(self, user_id, now=None):
+        """
+        Returns the qid the user should study next, or None
+
+        """
+        state = self._states.get(user_id)
+        if state is not None:
+            ordinal = state.next_question(now)
+        elif user_id in self.users:
+            ordinal = UserStudyState.peek_next(self.users[user_id], now)
+        else:
+            ordinal = 0 if self.qids else None
+        return None if ordinal is None else self.qids[ordinal]
+
+    def review(self, user_id, qid, correct, now=None):
+        """
+        Records an answer of a user, returns the updated UserStudyState
+
+        """
+        state = self.get(user_id)
+        state.review(self.ordinals[qid], correct, now)
+        self.put(user_id, state)
+        return state
+
+    def save(self, store_FN):
+        """
+        Writes all users as length prefixed (user id, state) records
+
+        """
+        self.flush()
+        with open(store_FN, 'wb') as file:
+            for user_id, data in self.users.items():
+                key = str(user_id).encode('utf-8')
+                file.write(struct.pack('<HI', len(key), len(data)))
+                file.write(key)
+                file.write(data)
+
+    def load(self, store_FN):
+        """
+        Reads users written by save (user ids are read back as str)
+
+        """
+        with open(store_FN, 'rb') as file:
+            data = file.read()
+        pos = 0
+        while pos < len(data):
+            key_len, data_len = struct.unpack_from('<HI', data, pos)
+            pos += 6
+            user_id = data[pos:pos + key_len].decode('utf-8')
+            pos += key_len
+            self.users[user_id] = data[pos:pos + data_len]
+            self._states.pop(user_id, None)
+            pos += data_len
@@ -0,0 +1,207 @@
+#-*- coding: utf-8 -*-
+"""
+Local TF-IDF classifier assigning group topics to the questions of a pool
+
+Each question can only be about the topics of its own group (Group.topics and
+Group.subtopics, split from the group description by Group.get_topics).  The
+question text with its answers and every candidate topic become TF-IDF vectors
+(sublinear term frequency, smoothed inverse document frequency over the whole
+pool).  Per group the question and topic vectors are dense numpy matrices over
+the terms of the group's topics, each row divided by the norm of its full
+vector, so one matrix multiply gives the cosine of every question x topic pair.
+
+The best topics scoring at least min_score (and the best topic with any
+overlap) are attached to the question as "topics", their cosines as
+"topic_scores".  No AI call is made, a whole pool is classified in
+milliseconds.
+
+Functions:
+    tokenize
+    document_frequencies
+    classify_group
+    classify_element
+    main
+
+Usage
+    python gethamquestions.py element3.docx --topics
+    python gethamtopics.py output/element3.json output/element3.topics.json --compare
+
+Change Log
+    2026-10-19 v01 - initial version
+"""
+
+import argparse
+import math
+import re
+import time
+from collections import Counter
+import numpy as np
+from gethamquestionclasses import msg
+from gethamschema import read_element, write_element
+
+DEFAULT_TOP = 2
+DEFAULT_MIN_SCORE = 0.15
+_WORD = re.compile(r'[a-z0-9]+')
+_ANSWER_PREFIX = re.compile(r'^[A-D]\.\s*')
+STOP_WORDS = frozenset("""
+a about all an and any are as at be by can do does for from has have how if in
+into is it its may of on or other that the these this those to was what when
+where which while who why will with would you your following these choices
+correct none true false statements
+""".split())
+
+def _stem(word):
+    """
+    Folds plurals, "antennas" -> "antenna", "batteries" -> "battery"
+    """
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+def tokenize(text):
+    """
+    Returns the terms of a text: lower case words without stop words, plurals folded
+    """
+    return [_stem(word) for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+def _get(obj, key):
+    return obj.get(key) or [] if isinstance(obj, dict) else getattr(obj, key, [])
+
+def _question_terms(question):
+    text = _get(question, 'text')
+    answers = ' '.join(_ANSWER_PREFIX.sub('', answer) for answer in _get(question, 'answers'))
+    return tokenize(text + ' ' + answers)
+
+def _candidates(group):
+    """
+    Returns the topics and subtopics of a group, once each
+    """
+    return list(dict.fromkeys(list(_get(group, 'topics')) + list(_get(group, 'subtopics'))))
+
+def document_frequencies(element):
+    """
+    Returns (number of documents, Counter term -> documents) over the
+    questions and candidate topics of an element
+    """
+    df = Counter()
+    documents = 0
+    for subelement in _get(element, 'subelements'):
+        for group in _get(subelement, 'groups'):
+            for topic in _candidates(group):
+                df.update(set(tokenize(topic)))
+                documents += 1
+            for question in _get(group, 'questions'):
+                df.update(set(_question_terms(question)))
+                documents += 1
+    return documents, df
+
+def _weights(terms, idf):
+    """
+    Returns (term -> tf-idf weight, norm) of a term list
+    """
+    weights = {term: (1 + math.log(count)) * idf(term) for term, count in Counter(terms).items()}
+    return weights, math.sqrt(sum(w * w for w in weights.values()))
+
+def classify_group(group, idf, top=DEFAULT_TOP, min_score=DEFAULT_MIN_SCORE):
+    """
+    Returns, per question of the group, the [(topic, score)] attached to it
+
+    Parameters
+    ----------
+    group : Group or group dict
+    idf : function
+        term -> inverse document frequency
+    """
+    questions = _get(group, 'questions')
+    candidates = _candidates(group)
+    if not questions or not candidates:
+        return [[] for _ in questions]
+    topic_weights = [_weights(tokenize(topic), idf) for topic in candidates]
+    columns = {term: i for i, term in enumerate(sorted({term for weights, _ in topic_weights
+                                                         for term in weights}))}
+    topic_matrix = np.zeros((len(candidates), len(columns)))
+    for row, (weights, norm) in enumerate(topic_weights):
+        for term, weight in weights.items():
+            topic_matrix[row, columns[term]] = weight / norm
+    question_matrix = np.zeros((len(questions), len(columns)))
+    for row, question in enumerate(questions):
+        weights, norm = _weights(_question_terms(question), idf)
+        for term, weight in weights.items():
+            column = columns.get(term)
+            if column is not None:
+                question_matrix[row, column] = weight / norm
+    scores = question_matrix @ topic_matrix.T
+    results = []
+    for row in scores:
+        ranked = np.argsort(-row, kind='stable')[:top]
+        chosen = [(candidates[i], round(float(row[i]), 3)) for i in ranked
+                  if row[i] >= min_score]
+        if not chosen and row[ranked[0]] > 0:
+            chosen = [(candidates[ranked[0]], round(float(row[ranked[0]]), 3))]
+        results.append(chosen)
+    return results
+
+def classify_element(element, top=DEFAULT_TOP, min_score=DEFAULT_MIN_SCORE):
+    """
+    Sets "topics" and "topic_scores" of every question of an Element or
+    element JSON object (schema 1), returns the number of questions with topics
+
+    """
+    documents, df = document_frequencies(element)
+    def idf(term):
+        return math.log((1 + documents) / (1 + df[term])) + 1
+    assigned = 0
+    for subelement in _get(element, 'subelements'):
+        for group in _get(subelement, 'groups'):
+            questions = _get(group, 'questions')
+            for question, chosen in zip(questions, classify_group(group, idf, top, min_score)):
+                topics = [topic for topic, _ in chosen]
+                scores = [score for _, score in chosen]
+                if isinstance(question, dict):
+                    question['topics'] = topics
+                    question['topic_scores'] = scores
+                else:
+                    question.topics = topics
+                    question.topic_scores = scores
+                assigned += bool(topics)
+    return assigned
+
+def main():
+    """
+    Classify the question topics of an element JSON file if called from commandline
+
+    """
+    parser = argparse.ArgumentParser(description='Assign group topics to questions')
+    parser.add_argument('element_FN', help='element JSON file')
+    parser.add_argument('out_FN', nargs='?', default='', help='element JSON file to write')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='topics per question')
+    parser.add_argument('--min-score', type=float, default=DEFAULT_MIN_SCORE)
+    parser.add_argument('--compare', action='store_true',
+                        help='agreement with the topics already in the file')
+    args = parser.parse_args()
+    element = read_element(args.element_FN)
+    before = {q['qid']: q.get('topics', []) for se in element['subelements']
+              for g in se['groups'] for q in g['questions']}
+    start = time.perf_counter()
+    assigned = classify_element(element, args.top, args.min_score)
+    elapsed = time.perf_counter() - start
+    msg('Info', 'I781', f'{args.element_FN}: topics for {assigned} of {len(before)} questions '
+        f'in {elapsed * 1000:.1f}ms')
+    if args.compare:
+        compared = agreed = 0
+        for se in element['subelements']:
+            for g in se['groups']:
+                for q in g['questions']:
+                    if before[q['qid']] and len(g.get('topics', [])) > 1:
+                        compared += 1
+                        agreed += bool(set(before[q['qid']]) & set(q['topics']))
+        msg('Info', 'I782', f'{agreed} of {compared} questions (groups with several topics) '
+            'share a topic with the file')
+    if args.out_FN:
+        write_element(element, args.out_FN, schema=1)
+        msg('Info', 'I783', f'written to {args.out_FN}')
+
+if __name__ == '__main__':
+    main()
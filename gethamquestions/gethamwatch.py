@@ -0,0 +1,275 @@
+#-*- coding: utf-8 -*-
+"""
+Watch a directory of question pools and help files and rebuild only what changed
+
+Sources are polled by mtime and size; a changed stat is confirmed with a
+sha256 of the content, so saving a file without changes rebuilds nothing.  A
+dependency manifest (output/build-manifest.json) records the content hash of
+every input each output was built from:
+
+    pool source (.docx/.txt) -> element{N}.json (+ element{N}.txt for .docx)
+    element{N}.json + help   -> element{N}.bundle.json  (gethambundle.py)
+    element{N}.json          -> web/element{N}/          (gethambrowserbundle.py)
+
+An output is rebuilt only when one of its recorded input hashes differs, so an
+edit that does not change the parsed questions stops at the element JSON (its
+hash ignores the parse timestamp).
+
+Classes:
+
+    BuildManifest
+    Watcher
+
+Usage
+    python gethamquestions.py --watch <dir>
+
+Change Log
+    2026-10-19 v01 - initial version
+    2026-10-19 v02 - removed the out_dir parameter, the pools are always written to ./output
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from gethamquestionclasses import msg
+from gethamhelploader import iter_help_history
+from gethambundle import build_bundle
+from gethambrowserbundle import write_browser_bundle
+
+OUTPUT_DIR = './output'
+MANIFEST_FN = 'build-manifest.json'
+POOL_PATTERNS = ('*.docx', '*.txt')
+HELP_PATTERNS = ('*.history.json', 'aianswers*.json')
+ELEMENT_BY_PREFIX = {'T': '2', 'G': '3', 'E': '4'}
+
+def file_hash(path):
+    """
+    Returns the sha256 hex digest of a file (or directory manifest), '' if missing
+
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, 'manifest.json')
+    if not os.path.isfile(path):
+        return ''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def element_hash(json_FN):
+    """
+    Returns the sha256 of an element JSON file ignoring its "timestamp", which
+    changes on every parse, '' if missing
+
+    """
+    if not os.path.isfile(json_FN):
+        return ''
+    with open(json_FN, 'r', encoding='utf-8-sig') as file:
+        element = json.load(file)
+    element.pop('timestamp', None)
+    return hashlib.sha256(json.dumps(element, sort_keys=True).encode('utf-8')).hexdigest()
+
+class BuildManifest:
+    """
+    A class to represent what each output was built from
+
+    ...
+
+    Attributes
+    ----------
+    manifest_FN : str
+        The manifest file
+    sources : dict
+        source path -> {'mtime', 'size', 'sha256', 'elem'}
+    outputs : dict
+        output path -> {'inputs': {input path: sha256}}
+
+    """
+    def __init__(self, manifest_FN):
+        self.manifest_FN = manifest_FN
+        self.sources = {}
+        self.outputs = {}
+        if os.path.isfile(manifest_FN):
+            with open(manifest_FN, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            self.sources = data.get('sources', {})
+            self.outputs = data.get('outputs', {})
+
+    def save(self):
+        """
+        Writes the manifest, replacing it atomically
+
+        """
+        os.makedirs(os.path.dirname(self.manifest_FN) or '.', exist_ok=True)
+        tmp = self.manifest_FN + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as file:
+            json.dump({'sources': self.sources, 'outputs': self.outputs}, file, indent=1)
+        os.replace(tmp, self.manifest_FN)
+
+    def is_current(self, output, inputs):
+        """
+        Returns True if output exists and was built from exactly these input hashes
+
+        """
+        return os.path.exists(output) and self.outputs.get(output, {}).get('inputs') == inputs
+
+    def record(self, output, inputs):
+        """
+        Records the input hashes an output was built from
+
+        """
+        self.outputs[output] = {'inputs': inputs}
+
+class Watcher:
+    """
+    A class to poll a directory and rebuild changed pools and their artifacts
+
+    ...
+
+    Attributes
+    ----------
+    watch_dir : str
+        The directory with pool sources and help files
+    out_dir : str
+        Where get_element_pool writes, always ./output
+    interval : float
+        Seconds between polls
+    manifest : BuildManifest
+
+    """
+    def __init__(self, watch_dir, interval=2.0):
+        self.watch_dir = watch_dir
+        # not a parameter: get_element_pool and State.close_element write ./output
+        self.out_dir = OUTPUT_DIR
+        self.interval = interval
+        self.manifest = BuildManifest(os.path.join(self.out_dir, MANIFEST_FN))
+
+    def _sources(self, patterns):
+        outputs = {os.path.abspath(path) for path in self.manifest.outputs}
+        for name in sorted(os.listdir(self.watch_dir)):
+            path = os.path.join(self.watch_dir, name)
+            if os.path.isfile(path) and os.path.abspath(path) not in outputs \
+               and any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                yield path
+
+    def _changed(self, path):
+        """
+        Returns the content hash of path if it changed since the last poll, else None
+
+        """
+        stat = os.stat(path)
+        known = self.manifest.sources.get(path, {})
+        if known.get('mtime') == stat.st_mtime and known.get('size') == stat.st_size:
+            return None
+        sha256 = file_hash(path)
+        changed = known.get('sha256') != sha256
+        known.update({'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': sha256})
+        self.manifest.sources[path] = known
+        return sha256 if changed else None
+
+    def _build_pool(self, path, sha256):
+        # imported here: gethamquestions imports this module for --watch
+        from gethamquestions import get_element_pool
+        msg('Info', 'I681', f'rebuilding pool from {path}')
+        element = get_element_pool(path)
+        if not element:
+            msg('Error', 'E681', f'no element parsed from {path}')
+            return None
+        self.manifest.sources[path]['elem'] = element.elem
+        json_FN = os.path.join(self.out_dir, f'element{element.elem}.json')
+        self.manifest.record(json_FN, {path: sha256})
+        if element.filetype == 'Microsoft Word':
+            self.manifest.record(os.path.join(self.out_dir, f'element{element.elem}.txt'),
+                                 {path: sha256})
+        return element.elem
+
+    def _help_element(self, path):
+        for qid, _ in iter_help_history(path):
+            return ELEMENT_BY_PREFIX.get(qid[:1])
+        return None
+
+    def _build_downstream(self, elem):
+        """
+        Rebuilds the bundle and browser bundle of element elem if their inputs changed
+
+        """
+        built = []
+        json_FN = os.path.join(self.out_dir, f'element{elem}.json')
+        json_hash = element_hash(json_FN)
+        if not json_hash:
+            return built
+        help_FN = ''
+        for path in self._sources(HELP_PATTERNS):
+            if self.manifest.sources.get(path, {}).get('elem') == elem:
+                help_FN = path
+        inputs = {json_FN: json_hash}
+        if help_FN:
+            inputs[help_FN] = file_hash(help_FN)
+        bundle_FN = os.path.join(self.out_dir, f'element{elem}.bundle.json')
+        if not self.manifest.is_current(bundle_FN, inputs):
+            build_bundle(json_FN, help_FN, bundle_FN)
+            self.manifest.record(bundle_FN, inputs)
+            built.append(bundle_FN)
+        web_dir = os.path.join(self.out_dir, 'web', f'element{elem}')
+        if not self.manifest.is_current(web_dir, {json_FN: json_hash}):
+            with open(json_FN, 'r', encoding='utf-8-sig') as file:
+                write_browser_bundle(json.load(file), web_dir)
+            self.manifest.record(web_dir, {json_FN: json_hash})
+            built.append(web_dir)
+        return built
+
+    def poll_once(self):
+        """
+        Checks all sources once, rebuilds what they feed, returns the rebuilt outputs
+
+        """
+        built = []
+        elements = set()
+        for path in self._sources(POOL_PATTERNS):
+            sha256 = self._changed(path)
+            if sha256:
+                # the hash is recorded already, a bad file is retried once it changes
+                try:
+                    elem = self._build_pool(path, sha256)
+                except Exception as err:  #pylint: disable-msg=broad-except
+                    msg('Error', 'E682', f'{path}: {type(err).__name__}: {err}')
+                    elem = None
+                if elem:
+                    elements.add(elem)
+                    built.append(os.path.join(self.out_dir, f'element{elem}.json'))
+        for path in self._sources(HELP_PATTERNS):
+            if self._changed(path):
+                try:
+                    elem = self._help_element(path)
+                except Exception as err:  #pylint: disable-msg=broad-except
+                    msg('Error', 'E682', f'{path}: {type(err).__name__}: {err}')
+                    elem = None
+                self.manifest.sources[path]['elem'] = elem
+                if elem:
+                    elements.add(elem)
+        for elem in sorted(elements):
+            try:
+                built.extend(self._build_downstream(elem))
+            except Exception as err:  #pylint: disable-msg=broad-except
+                msg('Error', 'E682', f'element {elem}: {type(err).__name__}: {err}')
+        self.manifest.save()
+        return built
+
+    def run(self):
+        """
+        Polls until interrupted
+
+        """
+        msg('Info', 'I682', f'watching {self.watch_dir} every {self.interval}s, '
+            'Ctrl-C to stop')
+        try:
+            while True:
+                built = self.poll_once()
+                if built:
+                    msg('Info', 'I683', f'rebuilt: {", ".join(built)}')
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            msg('Info', 'I684', 'watch stopped')